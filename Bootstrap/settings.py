@@ -29,6 +29,11 @@ else:
     ini_defaults["UserData.Dirs"]["metadata_dir"] = "$HOME/Repositories/GameMetadata"
     ini_defaults["UserData.Dirs"]["scripts_dir"] = "$HOME/Repositories/JoyBox/Scripts"
 
+# UserData.Cache
+ini_defaults["UserData.Cache"] = {}
+ini_defaults["UserData.Cache"]["cache_budget_gb"] = "0"
+ini_defaults["UserData.Cache"]["cache_eviction_type"] = "LRU"
+
 # UserData.Protection
 ini_defaults["UserData.Protection"] = {}
 ini_defaults["UserData.Protection"]["general_passphrase"] = ""
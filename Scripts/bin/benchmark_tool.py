@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+# Imports
+import os, os.path
+import sys
+
+# Custom imports
+lib_folder = os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "lib"))
+sys.path.append(lib_folder)
+import config
+import system
+import benchmark
+import arguments
+import setup
+
+# Parse arguments
+parser = arguments.ArgumentParser(description = "Benchmark tool.")
+parser.add_input_path_argument()
+parser.add_enum_argument(
+    args = ("-b", "--benchmark_type"),
+    arg_type = config.BenchmarkType,
+    default = config.BenchmarkType.HASHING,
+    description = "Benchmark type")
+parser.add_enum_argument(
+    args = ("-a", "--hash_types"),
+    arg_type = config.HashType,
+    default = [config.HashType.XXH3],
+    description = "Hash types",
+    allow_multiple = True)
+parser.add_integer_argument(
+    args = ("-e", "--iterations"),
+    default = 3,
+    description = "Number of iterations to take the best time from")
+parser.add_integer_argument(
+    args = ("-n", "--num_entries"),
+    default = 50000,
+    description = "Number of synthetic entries to generate")
+parser.add_common_arguments()
+args, unknown = parser.parse_known_args()
+
+# Main
+def main():
+
+    # Check requirements
+    setup.CheckRequirements()
+
+    # Benchmark hashing
+    if args.benchmark_type == config.BenchmarkType.HASHING:
+        results = benchmark.BenchmarkHashing(
+            src = parser.get_input_path(),
+            algorithms = args.hash_types,
+            iterations = args.iterations,
+            verbose = args.verbose,
+            pretend_run = args.pretend_run,
+            exit_on_failure = args.exit_on_failure)
+        system.DisplayTable(results)
+
+    # Benchmark metadata parsing
+    elif args.benchmark_type == config.BenchmarkType.METADATA_PARSING:
+        results = benchmark.BenchmarkMetadataParsing(
+            num_entries = args.num_entries,
+            iterations = args.iterations,
+            verbose = args.verbose,
+            pretend_run = args.pretend_run,
+            exit_on_failure = args.exit_on_failure)
+        system.DisplayTable(results)
+
+    # Benchmark startup
+    elif args.benchmark_type == config.BenchmarkType.STARTUP:
+        results = benchmark.BenchmarkStartup(
+            src = parser.get_input_path() if args.input_path else None,
+            iterations = args.iterations,
+            verbose = args.verbose,
+            pretend_run = args.pretend_run,
+            exit_on_failure = args.exit_on_failure)
+        system.DisplayTable(results)
+
+    # Benchmark launch dispatch
+    elif args.benchmark_type == config.BenchmarkType.LAUNCH_DISPATCH:
+        results = benchmark.BenchmarkLaunchDispatch(
+            iterations = args.iterations,
+            verbose = args.verbose,
+            pretend_run = args.pretend_run,
+            exit_on_failure = args.exit_on_failure)
+        system.DisplayTable(results)
+
+    # Benchmark remote json
+    elif args.benchmark_type == config.BenchmarkType.REMOTE_JSON:
+        results = benchmark.BenchmarkRemoteJson(
+            iterations = args.iterations,
+            verbose = args.verbose,
+            pretend_run = args.pretend_run,
+            exit_on_failure = args.exit_on_failure)
+        system.DisplayTable(results)
+
+# Start
+main()
@@ -9,10 +9,12 @@ lib_folder = os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "lib
 sys.path.append(lib_folder)
 import config
 import system
+import environment
 import gameinfo
 import cache
 import arguments
 import setup
+import gui
 
 # Parse arguments
 parser = arguments.ArgumentParser(description = "Cache game files.")
@@ -27,6 +29,9 @@ parser.add_game_subcategory_argument()
 parser.add_game_name_argument()
 parser.add_boolean_argument(args = ("-k", "--keep_setup_files"), description = "Keep setup files")
 parser.add_boolean_argument(args = ("--force_cache_refresh"), description = "Force refresh of cached files")
+parser.add_boolean_argument(args = ("--prefetch"), description = "Prefetch recently played, pinned, and related games in the background")
+parser.add_integer_argument(args = ("--prefetch_limit"), default = config.cache_prefetch_max_games, description = "Maximum number of games to prefetch")
+parser.add_integer_argument(args = ("--prefetch_delay"), default = config.cache_prefetch_delay, description = "Seconds to wait between prefetched games")
 parser.add_common_arguments()
 args, unknown = parser.parse_known_args()
 
@@ -36,6 +41,17 @@ def main():
     # Check requirements
     setup.CheckRequirements()
 
+    # Prefetch games
+    if args.prefetch:
+        cache.PrefetchGamesToCache(
+            source_type = args.source_type,
+            max_games = args.prefetch_limit,
+            delay = args.prefetch_delay,
+            verbose = args.verbose,
+            pretend_run = args.pretend_run,
+            exit_on_failure = args.exit_on_failure)
+        return
+
     # Get input path
     input_path = parser.get_input_path()
 
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+# Imports
+import os, os.path
+import sys
+import time
+
+# Custom imports
+lib_folder = os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "lib"))
+sys.path.append(lib_folder)
+import config
+import system
+import cachemanager
+import arguments
+import setup
+
+# Parse arguments
+parser = arguments.ArgumentParser(description = "Cache tool.")
+parser.add_enum_argument(
+    args = ("-a", "--action"),
+    arg_type = config.CacheActionType,
+    default = config.CacheActionType.STATUS,
+    description = "Cache action type")
+parser.add_game_category_argument()
+parser.add_game_subcategory_argument()
+parser.add_game_name_argument()
+parser.add_integer_argument(args = ("-b", "--budget_gb"), description = "Cache budget in gigabytes (overrides ini)")
+parser.add_common_arguments()
+args, unknown = parser.parse_known_args()
+
+# Format size
+def FormatSize(num_bytes):
+    return "%.2f GB" % ((num_bytes or 0) / config.bytes_per_gigabyte)
+
+# Display cache status
+def DisplayCacheStatus(cache_status):
+    budget = cache_status["budget"]
+    usage = cache_status["usage"]
+    system.LogInfo("Cache usage: %s of %s (%s eviction)" % (
+        FormatSize(usage),
+        FormatSize(budget) if budget else "unlimited",
+        cache_status["eviction_type"]))
+    table_data = []
+    for entry in cache_status["games"]:
+        table_data.append({
+            "Category": entry["category"],
+            "Subcategory": entry["subcategory"],
+            "Name": entry["name"],
+            "Size": FormatSize(entry["size"]),
+            "Last launched": time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["last_launched"])) if entry["last_launched"] else "",
+            "Pinned": "Yes" if entry["pinned"] else ""
+        })
+    if len(table_data):
+        system.DisplayTable(table_data)
+    for entry in cache_status["pinned"]:
+        if not entry["installed"]:
+            system.LogInfo("Pinned but not cached: %s" % cachemanager.GetCacheGameKey(entry["category"], entry["subcategory"], entry["name"]))
+
+# Main
+def main():
+
+    # Check requirements
+    setup.CheckRequirements()
+
+    # Check game arguments
+    if args.action in [config.CacheActionType.PIN, config.CacheActionType.UNPIN]:
+        if not args.game_category or not args.game_subcategory or not args.game_name:
+            system.LogError("Game category, subcategory, and name are required to %s a game" % args.action.lower(), quit_program = True)
+
+    # Show cache status
+    if args.action == config.CacheActionType.STATUS:
+        DisplayCacheStatus(cachemanager.GetCacheStatus())
+
+    # Refresh cache sizes
+    elif args.action == config.CacheActionType.REFRESH:
+        DisplayCacheStatus(cachemanager.GetCacheStatus(measure_all = True))
+
+    # Pin game
+    elif args.action == config.CacheActionType.PIN:
+        cachemanager.PinGame(args.game_category, args.game_subcategory, args.game_name, pinned = True)
+
+    # Unpin game
+    elif args.action == config.CacheActionType.UNPIN:
+        cachemanager.PinGame(args.game_category, args.game_subcategory, args.game_name, pinned = False)
+
+    # Evict games down to the budget
+    elif args.action == config.CacheActionType.EVICT:
+        budget_bytes = None
+        if args.budget_gb is not None:
+            budget_bytes = int(args.budget_gb * config.bytes_per_gigabyte)
+        cachemanager.EnsureCacheSpace(
+            budget_bytes = budget_bytes,
+            verbose = args.verbose,
+            pretend_run = args.pretend_run,
+            exit_on_failure = args.exit_on_failure)
+        DisplayCacheStatus(cachemanager.GetCacheStatus())
+
+# Start
+main()
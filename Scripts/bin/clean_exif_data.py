@@ -7,9 +7,8 @@ import sys
 # Custom imports
 lib_folder = os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "lib"))
 sys.path.append(lib_folder)
-import command
-import programs
 import asset
+import exifsession
 import arguments
 import setup
 
@@ -34,6 +33,7 @@ def main():
         verbose = args.verbose,
         pretend_run = args.pretend_run,
         exit_on_failure = args.exit_on_failure)
+    exifsession.CloseExifToolSession()
 
 # Start
 main()
@@ -24,6 +24,7 @@ parser.add_enum_argument(
 parser.add_boolean_argument(args = ("-e", "--encrypt"), description = "Encrypt files")
 parser.add_boolean_argument(args = ("-d", "--decrypt"), description = "Decrypt files")
 parser.add_boolean_argument(args = ("-k", "--keep_originals"), description = "Keep original files")
+parser.add_jobs_argument(default = cryption.GetDefaultCryptionJobs())
 parser.add_common_arguments()
 args, unknown = parser.parse_known_args()
 
@@ -45,27 +46,33 @@ def main():
     if not passphrase:
         system.LogError("No passphrase set", quit_program = True)
 
-    # Encrypt file
+    # Encrypt files
     if args.encrypt:
-        for file in system.BuildFileList(input_path):
-            cryption.EncryptFile(
-                src = file,
-                passphrase = passphrase,
-                delete_original = not args.keep_originals,
-                verbose = args.verbose,
-                pretend_run = args.pretend_run,
-                exit_on_failure = args.exit_on_failure)
+        results = cryption.EncryptFilesWithResults(
+            src = input_path,
+            passphrase = passphrase,
+            delete_original = not args.keep_originals,
+            jobs = args.jobs,
+            verbose = args.verbose,
+            pretend_run = args.pretend_run,
+            exit_on_failure = args.exit_on_failure)
+        for result in results:
+            if not result["success"] and not args.pretend_run:
+                system.LogError("Unable to encrypt file '%s'" % result["src"])
 
-    # Decrypt file
+    # Decrypt files
     elif args.decrypt:
-        for file in system.BuildFileList(input_path):
-            cryption.DecryptFile(
-                src = file,
-                passphrase = passphrase,
-                delete_original = not args.keep_originals,
-                verbose = args.verbose,
-                pretend_run = args.pretend_run,
-                exit_on_failure = args.exit_on_failure)
+        results = cryption.DecryptFilesWithResults(
+            src = input_path,
+            passphrase = passphrase,
+            delete_original = not args.keep_originals,
+            jobs = args.jobs,
+            verbose = args.verbose,
+            pretend_run = args.pretend_run,
+            exit_on_failure = args.exit_on_failure)
+        for result in results:
+            if not result["success"] and not args.pretend_run:
+                system.LogError("Unable to decrypt file '%s'" % result["src"])
 
 # Start
 main()
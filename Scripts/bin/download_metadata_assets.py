@@ -31,6 +31,8 @@ parser.add_enum_argument(
     default = config.GenerationModeType.STANDARD,
     description = "Generation mode")
 parser.add_boolean_argument(args = ("-e", "--skip_existing"), description = "Skip existing files")
+parser.add_jobs_argument(default = config.metadata_asset_max_jobs)
+parser.add_integer_argument(args = ("-r", "--rate_limit"), default = 0, description = "Maximum network requests per second (0 for unlimited)")
 parser.add_common_arguments()
 args, unknown = parser.parse_known_args()
 
@@ -62,6 +64,9 @@ def main():
 
     # Automatic according to standard layout
     elif args.generation_mode == config.GenerationModeType.STANDARD:
+
+        # Gather games
+        game_entries = []
         for game_supercategory in parser.get_selected_supercategories():
             for game_category, game_subcategories in parser.get_selected_subcategories().items():
                 for game_subcategory in game_subcategories:
@@ -70,25 +75,33 @@ def main():
                         game_category,
                         game_subcategory)
                     for game_name in game_names:
-                        success = collection.DownloadMetadataAsset(
-                            game_supercategory = game_supercategory,
-                            game_category = game_category,
-                            game_subcategory = game_subcategory,
-                            game_name = game_name,
-                            asset_url = None,
-                            asset_type = args.asset_type,
-                            skip_existing = args.skip_existing,
-                            verbose = args.verbose,
-                            pretend_run = args.pretend_run,
-                            exit_on_failure = args.exit_on_failure)
-                        if not success:
-                            system.LogError(
-                                message = "Download of metadata asset failed!",
-                                game_supercategory = game_supercategory,
-                                game_category = game_category,
-                                game_subcategory = game_subcategory,
-                                game_name = game_name,
-                                quit_program = True)
+                        game_entries.append((game_supercategory, game_category, game_subcategory, game_name))
+
+        # Download assets
+        summary = collection.DownloadMetadataAssets(
+            game_entries = game_entries,
+            asset_type = args.asset_type,
+            skip_existing = args.skip_existing,
+            jobs = args.jobs,
+            rate_limit = args.rate_limit,
+            verbose = args.verbose,
+            pretend_run = args.pretend_run,
+            exit_on_failure = args.exit_on_failure)
+
+        # Show summary
+        system.LogInfo("Downloaded %d, skipped %d, failed %d metadata assets" % (
+            len(summary["downloaded"]),
+            len(summary["skipped"]),
+            len(summary["failed"])))
+        for asset_job, reason in summary["failed"]:
+            system.LogError(
+                message = "Download of metadata asset failed! (%s)" % reason,
+                game_supercategory = asset_job["supercategory"],
+                game_category = asset_job["category"],
+                game_subcategory = asset_job["subcategory"],
+                game_name = asset_job["name"])
+        if len(summary["failed"]):
+            system.QuitProgram()
 
 # Start
 main()
@@ -11,6 +11,7 @@ import config
 import system
 import metadata
 import metadatacollector
+import webdriverpool
 import arguments
 import setup
 
@@ -27,6 +28,7 @@ parser.add_string_argument(args = ("--keys_to_check"), description = "Check agai
 parser.add_boolean_argument(args = ("--force_download"), description = "Force download")
 parser.add_boolean_argument(args = ("--allow_replacing"), description = "Allow replacing")
 parser.add_boolean_argument(args = ("-a", "--select_automatically"), description = "Select game automatically")
+parser.add_jobs_argument(default = config.metadata_scrape_max_jobs)
 parser.add_common_arguments()
 args, unknown = parser.parse_known_args()
 
@@ -53,9 +55,11 @@ def main():
         force_download = args.force_download,
         allow_replacing = args.allow_replacing,
         select_automatically = args.select_automatically,
+        jobs = args.jobs,
         verbose = args.verbose,
         pretend_run = args.pretend_run,
         exit_on_failure = args.exit_on_failure)
+    webdriverpool.CloseWebDriverPools(verbose = args.verbose)
 
 # Start
 main()
@@ -36,6 +36,7 @@ parser.add_enum_argument(
     args = ("-t", "--passphrase_type"),
     arg_type = config.PassphraseType,
     description = "Passphrase type")
+parser.add_jobs_argument()
 parser.add_common_arguments()
 args, unknown = parser.parse_known_args()
 
@@ -64,6 +65,7 @@ def main():
             game_subcategory = args.game_subcategory,
             game_root = parser.get_input_path(),
             passphrase = passphrase,
+            jobs = args.jobs,
             verbose = args.verbose,
             pretend_run = args.pretend_run,
             exit_on_failure = args.exit_on_failure)
@@ -91,6 +93,7 @@ def main():
                             game_subcategory = game_subcategory,
                             game_root = game_root,
                             passphrase = passphrase,
+                            jobs = args.jobs,
                             verbose = args.verbose,
                             pretend_run = args.pretend_run,
                             exit_on_failure = args.exit_on_failure)
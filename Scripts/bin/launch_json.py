@@ -84,8 +84,7 @@ def main():
 
         # Read metadata for this category/subcategory pair
         metadata_file = environment.GetMetadataFile(game_category, game_subcategory)
-        metadata_obj = metadata.Metadata()
-        metadata_obj.import_from_metadata_file(metadata_file)
+        metadata_obj = metadata.GetIndexedMetadata(metadata_file)
 
         # Select random game entry
         random_game_entry = metadata_obj.get_random_entry()
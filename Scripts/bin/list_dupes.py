@@ -7,14 +7,21 @@ import sys
 # Custom imports
 lib_folder = os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "lib"))
 sys.path.append(lib_folder)
-import programs
-import command
+import system
+import hashing
 import arguments
 import setup
 
 # Parse arguments
 parser = arguments.ArgumentParser(description = "List duplicate files.")
 parser.add_input_path_argument()
+parser.add_boolean_argument(
+    args = ("-a", "--include_archives"),
+    description = "Also list zip archives with identical contents")
+parser.add_boolean_argument(
+    args = ("-z", "--include_empty"),
+    description = "Also list empty files")
+parser.add_jobs_argument()
 parser.add_common_arguments()
 args, unknown = parser.parse_known_args()
 
@@ -27,28 +34,35 @@ def main():
     # Get input path
     input_path = parser.get_input_path()
 
-    # Get tool
-    dupes_tool = None
-    if programs.IsToolInstalled("JDupes"):
-        dupes_tool = programs.GetToolProgram("JDupes")
-    if not dupes_tool:
-        system.LogError("JDupes was not found", quit_program = True)
-
-    # Get list command
-    list_cmd = [
-        dupes_tool,
-        "--recurse",
-        "--print-summarize",
-        "--size",
-        input_path
-    ]
-
-    # Run list command
-    command.RunCheckedCommand(
-        cmd = list_cmd,
+    # Find duplicates
+    duplicate_groups = hashing.FindDuplicateGroups(
+        directory = input_path,
+        include_archives = args.include_archives,
+        include_empty = args.include_empty,
+        jobs = args.jobs,
         verbose = args.verbose,
         pretend_run = args.pretend_run,
         exit_on_failure = args.exit_on_failure)
 
+    # List duplicates
+    duplicate_count = 0
+    duplicate_size = 0
+    for duplicate_group in duplicate_groups:
+        system.LogInfo("Duplicate %s set (%d bytes each, hash %s):" % (
+            duplicate_group["type"],
+            duplicate_group["size"],
+            duplicate_group["hash"]))
+        for duplicate_file in duplicate_group["files"]:
+            system.LogInfo("    %s" % duplicate_file)
+        duplicate_count += len(duplicate_group["files"]) - 1
+        if duplicate_group["type"] == "file":
+            duplicate_size += duplicate_group["size"] * (len(duplicate_group["files"]) - 1)
+
+    # Summarize duplicates
+    system.LogInfo("%d duplicate files (in %d sets), occupying %d bytes" % (
+        duplicate_count,
+        len(duplicate_groups),
+        duplicate_size))
+
 # Start
 main()
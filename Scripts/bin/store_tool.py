@@ -12,6 +12,7 @@ import system
 import environment
 import gameinfo
 import stores
+import storeindex
 import arguments
 import setup
 
@@ -104,6 +105,7 @@ def main():
             verbose = args.verbose,
             pretend_run = args.pretend_run,
             exit_on_failure = args.exit_on_failure)
+        storeindex.FlushStoreIdentifierIndex()
 
     # Install game
     elif args.store_action == config.StoreActionType.INSTALL_GAME:
@@ -43,8 +43,7 @@ def main():
         for game_subcategory in config.subcategory_map[game_category]:
             metadata_file = environment.GetMetadataFile(game_category, game_subcategory)
             if system.IsPathFile(metadata_file):
-                metadata_obj = metadata.Metadata()
-                metadata_obj.import_from_metadata_file(metadata_file)
+                metadata_obj = metadata.GetIndexedMetadata(metadata_file)
                 metadata_obj.verify_files()
 
     # Verify json files
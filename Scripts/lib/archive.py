@@ -122,6 +122,21 @@ def GetArchiveChecksums(archive_file):
                     checksums.append(entry)
     return checksums
 
+# Get archive content signature
+def GetArchiveContentSignature(archive_file):
+    if not system.GetFilenameExtension(archive_file).lower() in config.ArchiveZipFileType.cvalues():
+        return None
+    if not system.IsPathFile(archive_file):
+        return None
+    try:
+        with zipfile.ZipFile(archive_file) as zf:
+            signature = tuple(sorted((info.CRC, info.file_size) for info in zf.infolist() if not info.is_dir()))
+            if len(signature) > 0:
+                return signature
+    except (zipfile.BadZipFile, OSError):
+        pass
+    return None
+
 # Get archive compression flags
 def GetArchiveCompressionFlags(archive_type, password, volume_size):
     compression_flags = []
@@ -81,6 +81,18 @@ class ArgumentParser:
             type = str,
             help = description)
 
+    # Add integer argument
+    def add_integer_argument(
+        self,
+        args,
+        default = None,
+        description = None):
+        self.parser.add_argument(
+            *args if isinstance(args, tuple) else (args,),
+            default = default,
+            type = int,
+            help = description)
+
     # Add boolean argument
     def add_boolean_argument(
         self,
@@ -224,6 +236,15 @@ class ArgumentParser:
 
     #################################################
 
+    # Add jobs argument
+    def add_jobs_argument(self, args = ("-j", "--jobs"), default = 1, description = "Number of parallel jobs"):
+        self.add_integer_argument(
+            args = args,
+            default = default,
+            description = description)
+
+    #################################################
+
     # Add common arguments
     def add_common_arguments(self):
         self.add_boolean_argument(
@@ -5,9 +5,8 @@ import sys
 # Local imports
 import config
 import system
-import command
-import programs
 import network
+import exifsession
 import image
 import google
 
@@ -18,32 +17,12 @@ def CleanExifData(
     pretend_run = False,
     exit_on_failure = False):
 
-    # Get tool
-    exif_tool = None
-    if programs.IsToolInstalled("ExifTool"):
-        exif_tool = programs.GetToolProgram("ExifTool")
-    if not exif_tool:
-        system.LogError("ExifTool was not found")
-        return False
-
-    # Get clean command
-    clean_cmd = [
-        exif_tool,
-        "-overwrite_original",
-        "-All=",
-        "-r",
-        asset_file
-    ]
-
-    # Run clean command
-    code = command.RunBlockingCommand(
-        cmd = clean_cmd,
-        options = command.CommandOptions(
-            blocking_processes = [exif_tool]),
+    # Clean through the shared exiftool session, directories are walked by exiftool itself
+    return exifsession.RunExifToolCommand(
+        args = ["-overwrite_original", "-All=", "-r", asset_file],
         verbose = verbose,
         pretend_run = pretend_run,
         exit_on_failure = exit_on_failure)
-    return (code == 0)
 
 # Download asset
 def DownloadAsset(
@@ -66,8 +45,8 @@ def DownloadAsset(
                 exit_on_failure = exit_on_failure)
             return success
 
-    # Download file by default
-    success = network.DownloadUrl(
+    # Stream file by default
+    success = network.DownloadUrlToFile(
         url = asset_url,
         output_file = asset_file,
         verbose = verbose,
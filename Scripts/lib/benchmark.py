@@ -0,0 +1,475 @@
+# Imports
+import os, os.path
+import sys
+import time
+import json
+import hashlib
+import threading
+import subprocess
+import http.server
+
+# Local imports
+import config
+import system
+import environment
+import hashing
+import metadata
+
+###########################################################
+
+# Time function
+def TimeFunction(func, iterations = 1):
+    best_time = None
+    result = None
+    for iteration in range(max(iterations, 1)):
+        start_time = time.perf_counter()
+        result = func()
+        elapsed_time = time.perf_counter() - start_time
+        if best_time is None or elapsed_time < best_time:
+            best_time = elapsed_time
+    return best_time, result
+
+# Get throughput
+def GetThroughput(num_bytes, seconds):
+    if not seconds:
+        return 0
+    return (num_bytes / config.bytes_per_megabyte) / seconds
+
+###########################################################
+
+# Benchmark hashing
+def BenchmarkHashing(
+    src,
+    algorithms = [config.HashType.XXH3],
+    chunksize = config.hash_chunk_size,
+    iterations = 3,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+
+    # Get files
+    benchmark_files = []
+    if system.IsPathFile(src):
+        benchmark_files = [src]
+    elif system.IsPathDirectory(src):
+        benchmark_files = system.BuildFileList(src)
+    total_size = sum([os.path.getsize(file) for file in benchmark_files])
+
+    # Plain read loop, allocating a new chunk per read
+    def hash_with_read():
+        digests = []
+        for file in benchmark_files:
+            hashers = [hashing.CreateHasher(algorithm) for algorithm in algorithms]
+            with open(file, "rb") as f:
+                while (chunk := f.read(chunksize)):
+                    for hasher in hashers:
+                        hasher.update(chunk)
+            digests.append([hasher.hexdigest() for hasher in hashers])
+        return digests
+
+    # Zero copy loop, using the given mmap threshold
+    def hash_with_chunks(mmap_threshold):
+        digests = []
+        for file in benchmark_files:
+            hashers = [hashing.CreateHasher(algorithm) for algorithm in algorithms]
+            with open(file, "rb", buffering = 0) as f:
+                for chunk in hashing.ReadFileChunks(f, chunksize = chunksize, mmap_threshold = mmap_threshold):
+                    for hasher in hashers:
+                        hasher.update(chunk)
+            digests.append([hasher.hexdigest() for hasher in hashers])
+        return digests
+
+    # Run each mode
+    benchmark_modes = [
+        ("Read", hash_with_read),
+        ("ReadInto", lambda: hash_with_chunks(None)),
+        ("Mmap", lambda: hash_with_chunks(0))
+    ]
+    results = []
+    expected_digests = None
+    for mode_name, mode_func in benchmark_modes:
+        if verbose:
+            system.LogInfo("Benchmarking %s hashing of %d files ..." % (mode_name, len(benchmark_files)))
+        if pretend_run:
+            continue
+        elapsed_time, digests = TimeFunction(mode_func, iterations)
+        if expected_digests is None:
+            expected_digests = digests
+        elif digests != expected_digests:
+            system.LogError("Hashing mode %s produced different digests" % mode_name, quit_program = exit_on_failure)
+        results.append({
+            "Mode": mode_name,
+            "Files": len(benchmark_files),
+            "Bytes": total_size,
+            "Seconds": "%.3f" % elapsed_time,
+            "MB/s": "%.1f" % GetThroughput(total_size, elapsed_time)
+        })
+    return results
+
+###########################################################
+
+# Write synthetic pegasus file
+def WriteSyntheticPegasusFile(pegasus_file, game_platform, num_entries):
+    with open(pegasus_file, "w", encoding="utf8", newline="\n") as file:
+        file.write("collection: %s\n" % game_platform.val())
+        file.write("launch: {env.JOYBOX_LAUNCH_JSON}\n")
+        file.write("\n\n")
+        for index in range(num_entries):
+            game_name = "Synthetic Game %06d" % index
+            file.write("game: %s\n" % game_name)
+            file.write("file: %s/%s.json\n" % (game_name, game_name))
+            file.write("developer: Developer %d\n" % (index % 97))
+            file.write("publisher: Publisher %d\n" % (index % 89))
+            file.write("genre: Action\n")
+            file.write("description:\n")
+            for line_index in range(4):
+                file.write("  Description line %d for %s.\n" % (line_index, game_name))
+            file.write("release: %04d-01-01\n" % (1980 + index % 40))
+            file.write("players: %d\n" % (1 + index % 4))
+            file.write("assets.boxfront: %s.jpg\n" % game_name)
+            file.write("assets.video: %s.mp4\n" % game_name)
+            file.write("x-playable: True\n")
+            file.write("\n\n")
+
+# Benchmark metadata parsing
+def BenchmarkMetadataParsing(
+    num_entries = 50000,
+    iterations = 3,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+
+    # Create temporary directory
+    tmp_dir_success, tmp_dir_result = system.CreateTemporaryDirectory(
+        verbose = verbose,
+        pretend_run = pretend_run)
+    if not tmp_dir_success:
+        return []
+
+    # Write synthetic file
+    game_platform = config.Platform.members()[0]
+    pegasus_file = system.JoinPaths(tmp_dir_result, "metadata.pegasus.txt")
+    if verbose:
+        system.LogInfo("Writing synthetic pegasus file with %d entries ..." % num_entries)
+    WriteSyntheticPegasusFile(pegasus_file, game_platform, num_entries)
+    total_size = os.path.getsize(pegasus_file)
+    target_name = "Synthetic Game %06d" % (num_entries // 2)
+    metadata_obj = metadata.Metadata()
+    metadata_obj.import_from_pegasus_file(pegasus_file)
+    metadata_obj.export_to_sidecar_file(pegasus_file)
+
+    # Parse every entry
+    def parse_full():
+        metadata_obj = metadata.Metadata()
+        metadata_obj.import_from_pegasus_file(pegasus_file)
+        return len(metadata_obj.get_all_sorted_names())
+
+    # Parse a single entry
+    def parse_filtered():
+        metadata_obj = metadata.Metadata()
+        metadata_obj.import_from_pegasus_file(
+            pegasus_file = pegasus_file,
+            entry_filter = lambda game_platform, game_name: game_name == target_name)
+        return len(metadata_obj.get_all_sorted_names())
+
+    # Load from a current sidecar snapshot
+    def load_sidecar():
+        metadata_obj = metadata.Metadata()
+        metadata_obj.import_from_metadata_file(
+            metadata_file = pegasus_file,
+            use_sidecar = True)
+        return len(metadata_obj.get_all_sorted_names())
+
+    # Run each mode
+    benchmark_modes = [
+        ("Full", parse_full),
+        ("Filtered", parse_filtered),
+        ("Sidecar", load_sidecar)
+    ]
+    results = []
+    for mode_name, mode_func in benchmark_modes:
+        if verbose:
+            system.LogInfo("Benchmarking %s metadata parsing ..." % mode_name)
+        if pretend_run:
+            continue
+        elapsed_time, num_parsed = TimeFunction(mode_func, iterations)
+        results.append({
+            "Mode": mode_name,
+            "Entries": num_parsed,
+            "Bytes": total_size,
+            "Seconds": "%.3f" % elapsed_time,
+            "MB/s": "%.1f" % GetThroughput(total_size, elapsed_time),
+            "Entries/s": "%.0f" % (num_entries / elapsed_time if elapsed_time else 0)
+        })
+
+    # Clean up
+    system.RemoveDirectory(
+        dir = tmp_dir_result,
+        verbose = verbose,
+        pretend_run = pretend_run,
+        exit_on_failure = exit_on_failure)
+    return results
+
+###########################################################
+
+# Get startup import counts
+def GetStartupImportCounts(script_file):
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", script_file, "--help"],
+        stdout = subprocess.DEVNULL,
+        stderr = subprocess.PIPE,
+        text = True)
+    num_modules = 0
+    num_plugins = 0
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        module_name = line.split("|")[-1].strip()
+        if module_name == "imported package":
+            continue
+        num_modules += 1
+        if module_name.startswith("tools.") or module_name.startswith("emulators."):
+            num_plugins += 1
+    return num_modules, num_plugins
+
+# Benchmark startup
+def BenchmarkStartup(
+    src = None,
+    iterations = 3,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+
+    # Get scripts
+    script_files = []
+    if src and system.IsPathFile(src):
+        script_files = [src]
+    else:
+        script_dir = src if src and system.IsPathDirectory(src) else environment.GetScriptsBinDir()
+        script_files = system.BuildFileListByExtensions(script_dir, extensions = [".py"])
+
+    # Run each script until its arguments are parsed
+    results = []
+    for script_file in script_files:
+        if verbose:
+            system.LogInfo("Benchmarking startup of %s ..." % script_file)
+        if pretend_run:
+            continue
+        def start_script():
+            return subprocess.run(
+                [sys.executable, script_file, "--help"],
+                stdout = subprocess.DEVNULL,
+                stderr = subprocess.DEVNULL).returncode
+        elapsed_time, returncode = TimeFunction(start_script, iterations)
+        num_modules, num_plugins = GetStartupImportCounts(script_file)
+        results.append({
+            "Script": system.GetFilenameFile(script_file),
+            "Seconds": "%.3f" % elapsed_time,
+            "Modules": num_modules,
+            "Plugins": num_plugins,
+            "Code": returncode
+        })
+    return results
+
+# Launch dispatch methods (name: lookup code run in a fresh interpreter)
+launch_dispatch_methods = {
+    "Scan": (
+        "import programs\n"
+        "game_launcher = None\n"
+        "for emulator in programs.GetEmulators():\n"
+        "    if game_platform in emulator.GetPlatforms():\n"
+        "        game_launcher = emulator\n"
+        "        break\n"),
+    "Index (cold)": (
+        "import environment, launcherindex\n"
+        "environment.GetCacheLauncherIndexFile = lambda: cold_index_file\n"
+        "game_launcher = launcherindex.GetLauncherForPlatform(game_platform)\n"),
+    "Index (warm)": (
+        "import launcherindex\n"
+        "game_launcher = launcherindex.GetLauncherForPlatform(game_platform)\n")
+}
+
+# Benchmark launch dispatch
+def BenchmarkLaunchDispatch(
+    platform_type = None,
+    iterations = 3,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+
+    # Get platform
+    if not platform_type:
+        platform_type = config.Platform.NINTENDO_GAME_BOY_ADVANCE
+
+    # Warm the persisted index so the warm method measures a plain lookup
+    import launcherindex
+    launcherindex.GetPlatformLauncherIndex()
+
+    # Run each lookup in a fresh interpreter, as a launch would
+    results = []
+    for method_name, method_code in launch_dispatch_methods.items():
+        if verbose:
+            system.LogInfo("Benchmarking launch dispatch using %s ..." % method_name)
+        if pretend_run:
+            continue
+        tmp_dir_success, tmp_dir_result = system.CreateTemporaryDirectory()
+        if not tmp_dir_success:
+            return results
+        script_code = (
+            "import sys, time\n"
+            "sys.path.insert(0, %r)\n"
+            "start_time = time.perf_counter()\n"
+            "game_platform = %r\n"
+            "cold_index_file = %r\n"
+            "%s"
+            "print(time.perf_counter() - start_time, len([name for name in sys.modules if name.startswith('emulators.')]), game_launcher.GetName() if game_launcher else '')\n"
+        ) % (
+            os.path.dirname(os.path.abspath(__file__)),
+            str(platform_type),
+            system.JoinPaths(tmp_dir_result, config.launcher_index_filename),
+            method_code)
+        best_lookup = (0.0, "0", "")
+        def run_lookup():
+            nonlocal best_lookup
+            if system.IsPathFile(system.JoinPaths(tmp_dir_result, config.launcher_index_filename)):
+                system.RemoveFile(system.JoinPaths(tmp_dir_result, config.launcher_index_filename))
+            process = subprocess.run(
+                [sys.executable, "-c", script_code],
+                stdout = subprocess.PIPE,
+                stderr = subprocess.DEVNULL,
+                text = True)
+            lookup_output = process.stdout.split(maxsplit = 2)
+            if len(lookup_output) == 3:
+                lookup_time = float(lookup_output[0])
+                if not best_lookup[0] or lookup_time < best_lookup[0]:
+                    best_lookup = (lookup_time, lookup_output[1], lookup_output[2].strip())
+            return process.returncode
+        elapsed_time, returncode = TimeFunction(run_lookup, iterations)
+        lookup_time, num_plugins, launcher_name = best_lookup
+        system.RemoveDirectory(tmp_dir_result)
+        results.append({
+            "Method": method_name,
+            "Platform": str(platform_type),
+            "Launcher": launcher_name,
+            "Lookup seconds": "%.4f" % lookup_time,
+            "Process seconds": "%.3f" % elapsed_time,
+            "Plugins": num_plugins,
+            "Code": returncode
+        })
+    return results
+
+###########################################################
+
+# Local stand-in json server that honors conditional requests
+class StandInJsonHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    # Handle GET request
+    def do_GET(self):
+        self.server.num_requests += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.headers.get("If-None-Match") == self.server.etag:
+            self.server.num_not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", self.server.etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.server.body)))
+        self.send_header("ETag", self.server.etag)
+        self.end_headers()
+        self.wfile.write(self.server.body)
+
+    # Keep benchmark output quiet
+    def log_message(self, format, *args):
+        pass
+
+# Start stand-in json server
+def StartStandInJsonServer(json_data, latency = 0):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StandInJsonHandler)
+    server.daemon_threads = True
+    server.body = json.dumps(json_data).encode("utf-8")
+    server.etag = "\"%s\"" % hashlib.sha256(server.body).hexdigest()[:16]
+    server.latency = latency
+    server.num_requests = 0
+    server.num_not_modified = 0
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    return server
+
+# Benchmark remote json requests
+def BenchmarkRemoteJson(
+    num_requests = 50,
+    latency = 0.01,
+    iterations = 3,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+
+    # Start stand-in server
+    import requests
+    import network
+    json_data = {"releases": [{"id": index, "name": "Release %d" % index} for index in range(500)]}
+    server = StartStandInJsonServer(json_data, latency = latency)
+    url = "http://127.0.0.1:%d/releases.json" % server.server_port
+
+    # Keep the http cache away from the real one
+    tmp_dir_success, tmp_dir_result = system.CreateTemporaryDirectory()
+    if not tmp_dir_success:
+        server.shutdown()
+        return []
+    original_cache_dir_func = environment.GetCacheHttpDir
+    environment.GetCacheHttpDir = lambda: tmp_dir_result
+
+    # Request methods
+    def fetch_bare():
+        return requests.get(url, headers = {"Accept": "application/json"}).json()
+    def fetch_pooled():
+        return network.GetRemoteJson(url)
+    def fetch_revalidate():
+        return network.GetRemoteJson(url, use_cache = True, cache_ttl = 0)
+    def fetch_fresh():
+        return network.GetRemoteJson(url, use_cache = True)
+    methods = [
+        ("Bare requests", fetch_bare),
+        ("Pooled session", fetch_pooled),
+        ("Cache (revalidate)", fetch_revalidate),
+        ("Cache (fresh)", fetch_fresh)
+    ]
+
+    # Run each method
+    results = []
+    try:
+        for method_name, method_func in methods:
+            if verbose:
+                system.LogInfo("Benchmarking remote json using %s ..." % method_name)
+            if pretend_run:
+                continue
+            method_func()
+            server.num_requests = 0
+            server.num_not_modified = 0
+            def run_requests():
+                matches = 0
+                for index in range(num_requests):
+                    if method_func() == json_data:
+                        matches += 1
+                return matches
+            elapsed_time, matches = TimeFunction(run_requests, iterations)
+            results.append({
+                "Method": method_name,
+                "Requests": num_requests,
+                "Seconds": "%.3f" % elapsed_time,
+                "Per request ms": "%.2f" % (elapsed_time * 1000 / num_requests),
+                "Server hits": server.num_requests // max(iterations, 1),
+                "Not modified": server.num_not_modified // max(iterations, 1),
+                "Correct": matches == num_requests
+            })
+    finally:
+        environment.GetCacheHttpDir = original_cache_dir_func
+        server.shutdown()
+        system.RemoveDirectory(tmp_dir_result)
+    return results
+
+###########################################################
@@ -1,15 +1,18 @@
 # Imports
 import os, os.path
 import sys
+import time
 
 # Local imports
 import config
 import command
 import system
+import environment
 import transform
 import platforms
 import gameinfo
 import locker
+import cachemanager
 import gui
 
 # Check if game file is in cache already
@@ -40,11 +43,58 @@ def RemoveGameFromCache(
         pretend_run = pretend_run,
         exit_on_failure = exit_on_failure)
 
+    # Record removal
+    if not pretend_run:
+        cachemanager.RecordGameRemoval(game_info.get_category(), game_info.get_subcategory(), game_info.get_name())
+
 # Install game to cache
 def InstallGameToCache(
     game_info,
     source_type,
     keep_setup_files = False,
+    allow_eviction = True,
+    show_gui = True,
+    jobs = None,
+    wait_for_lock = True,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+
+    # Check if already installed
+    if IsGameInCache(game_info):
+        return True
+
+    # Only one process may install a game at a time, they share its staging directory
+    install_lock = system.LockFile(GetCacheInstallLockFile(game_info))
+    if not install_lock.acquire(blocking = False):
+        if not wait_for_lock:
+            if verbose:
+                system.LogInfo("Skipping %s, it is being installed by another process" % game_info.get_name())
+            return False
+        system.LogInfo("Waiting for another process to finish installing %s" % game_info.get_name())
+        install_lock.acquire()
+    try:
+        return InstallLockedGameToCache(
+            game_info = game_info,
+            source_type = source_type,
+            keep_setup_files = keep_setup_files,
+            allow_eviction = allow_eviction,
+            show_gui = show_gui,
+            jobs = jobs,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+    finally:
+        install_lock.release()
+
+# Install game to cache while holding its install lock
+def InstallLockedGameToCache(
+    game_info,
+    source_type,
+    keep_setup_files = False,
+    allow_eviction = True,
+    show_gui = True,
+    jobs = None,
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
@@ -61,11 +111,23 @@ def InstallGameToCache(
 
     # Check if source files are available
     if not locker.DoesRemotePathContainFiles(game_remote_rom_dir):
+        if not show_gui:
+            system.LogWarning("Source files are not available for %s (%s)" % (game_name, game_platform))
+            return False
         gui.DisplayErrorPopup(
             title_text = "Source files unavailable",
             message_text = "Source files are not available\n%s\n%s" % (game_name, game_platform))
         return False
 
+    # Make room in the cache
+    if allow_eviction and cachemanager.GetCacheBudget():
+        cachemanager.EnsureCacheSpace(
+            required_bytes = locker.GetRemotePathSize(game_remote_rom_dir) or 0,
+            exclude_games = [(game_info.get_category(), game_info.get_subcategory(), game_name)],
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+
     # Create temporary directory
     tmp_dir_success, tmp_dir_result = system.CreateTemporaryDirectory(
         verbose = verbose,
@@ -73,18 +135,48 @@ def InstallGameToCache(
     if not tmp_dir_success:
         return False
 
-    # Download files
-    success = locker.DownloadAndDecryptPath(
+    # Get staging directory
+    # Games that need no transformation are decrypted straight into a staging
+    # directory next to the cache, so installing them is only a rename
+    is_transform_platform = platforms.IsTransformPlatform(game_platform)
+    staging_dir = None
+    if not is_transform_platform:
+        staging_dir = GetCacheStagingDir(game_info)
+        system.RemoveDirectory(
+            dir = staging_dir,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+
+    # Download files, decrypting each one as soon as it lands
+    timings = {}
+    start_time = time.perf_counter()
+    success, result = locker.DownloadAndDecryptPath(
         src = game_remote_rom_dir,
         dest = tmp_dir_result,
+        output_dir = staging_dir,
+        jobs = jobs,
+        timings = timings,
         verbose = verbose,
         pretend_run = pretend_run,
         exit_on_failure = exit_on_failure)
     if not success:
+        system.RemoveDirectory(
+            dir = tmp_dir_result,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+        if staging_dir:
+            system.RemoveDirectory(
+                dir = staging_dir,
+                verbose = verbose,
+                pretend_run = pretend_run,
+                exit_on_failure = exit_on_failure)
         return False
 
     # Check if transformation is required
-    if platforms.IsTransformPlatform(game_platform):
+    install_start_time = time.perf_counter()
+    if is_transform_platform:
 
         # Install transformed game
         def InstallTransformedGame():
@@ -95,28 +187,36 @@ def InstallGameToCache(
                 verbose = verbose,
                 pretend_run = pretend_run,
                 exit_on_failure = exit_on_failure)
-        gui.DisplayLoadingWindow(
-            title_text = "Installing to cache",
-            message_text = "Transforming and adding game to cache\n%s\n%s" % (game_name, game_platform),
-            failure_text = "Unable to install game to cache",
-            image_file = game_artwork,
-            run_func = InstallTransformedGame)
+        if show_gui:
+            gui.DisplayLoadingWindow(
+                title_text = "Installing to cache",
+                message_text = "Transforming and adding game to cache\n%s\n%s" % (game_name, game_platform),
+                failure_text = "Unable to install game to cache",
+                image_file = game_artwork,
+                run_func = InstallTransformedGame)
+        else:
+            InstallTransformedGame()
     else:
 
         # Install game
         def InstallGame():
-            return AddGameToCache(
+            return AddStagedGameToCache(
                 game_info = game_info,
-                source_dir = tmp_dir_result,
+                staging_dir = staging_dir,
                 verbose = verbose,
                 pretend_run = pretend_run,
                 exit_on_failure = exit_on_failure)
-        gui.DisplayLoadingWindow(
-            title_text = "Installing to cache",
-            message_text = "Adding game to cache\n%s\n%s" % (game_name, game_platform),
-            failure_text = "Unable to install game to cache",
-            image_file = game_artwork,
-            run_func = InstallGame)
+        if show_gui:
+            gui.DisplayLoadingWindow(
+                title_text = "Installing to cache",
+                message_text = "Adding game to cache\n%s\n%s" % (game_name, game_platform),
+                failure_text = "Unable to install game to cache",
+                image_file = game_artwork,
+                run_func = InstallGame)
+        else:
+            InstallGame()
+    timings["install"] = time.perf_counter() - install_start_time
+    timings["total"] = time.perf_counter() - start_time
 
     # Delete temporary directory
     system.RemoveDirectory(
@@ -125,13 +225,137 @@ def InstallGameToCache(
         pretend_run = pretend_run,
         exit_on_failure = exit_on_failure)
 
+    # Report stage timing
+    if verbose:
+        system.LogInfo("Cache install timing for %s: download %.2fs, decrypt %.2fs (%.2fs after download), install %.2fs, total %.2fs" % (
+            game_name,
+            timings.get("download", 0),
+            timings.get("decrypt", 0),
+            timings.get("decrypt_tail", 0),
+            timings.get("install", 0),
+            timings.get("total", 0)))
+
     # Check if game is now installed
     if not IsGameInCache(game_info):
+        if not show_gui:
+            system.LogError("Game could not be cached %s (%s)" % (game_name, game_platform))
+            return False
         gui.DisplayErrorPopup(
             title_text = "Failed to cache game",
             message_text = "Game could not be cached\n%s\n%s" % (game_name, game_platform))
+    elif not pretend_run:
+        cachemanager.RecordGameInstall(game_info.get_category(), game_info.get_subcategory(), game_name)
     return True
 
+# Prefetch likely next games into cache
+def PrefetchGamesToCache(
+    source_type,
+    max_games = config.cache_prefetch_max_games,
+    delay = config.cache_prefetch_delay,
+    jobs = config.cache_prefetch_jobs,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+
+    # Run in the background
+    environment.SetBackgroundProcessPriority()
+
+    # Prefetch candidates until the budget is reached
+    num_prefetched = 0
+    budget_bytes = cachemanager.GetCacheBudget()
+    for game_category, game_subcategory, game_name in cachemanager.GetPrefetchCandidates():
+        if num_prefetched >= max_games:
+            break
+
+        # Get game info
+        json_file = environment.GetJsonMetadataFile(
+            game_supercategory = config.Supercategory.ROMS,
+            game_category = config.Category.from_enum(game_category),
+            game_subcategory = config.Subcategory.from_enum(game_subcategory),
+            game_name = game_name)
+        if not system.IsPathFile(json_file):
+            continue
+        game_info = gameinfo.GameInfo(
+            json_file = json_file,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+        if IsGameInCache(game_info):
+            continue
+
+        # Stop once the next game would go over budget, prefetching never evicts
+        if budget_bytes:
+            game_size = locker.GetRemotePathSize(game_info.get_remote_rom_dir())
+            if game_size is None:
+                continue
+            cache_usage = cachemanager.GetCacheStatus()["usage"]
+            if cache_usage + game_size > budget_bytes:
+                system.LogInfo("Cache budget reached, stopping prefetch before %s" % game_name)
+                break
+
+        # Install game
+        if verbose:
+            system.LogInfo("Prefetching %s (%s)" % (game_name, game_info.get_platform()))
+        success = InstallGameToCache(
+            game_info = game_info,
+            source_type = source_type,
+            allow_eviction = False,
+            show_gui = False,
+            jobs = jobs,
+            wait_for_lock = False,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+        if success:
+            num_prefetched += 1
+
+        # Give foreground work room to breathe
+        if delay:
+            time.sleep(delay)
+    return num_prefetched
+
+# Get cache install lock file
+def GetCacheInstallLockFile(game_info):
+    return system.JoinPaths(
+        environment.GetCacheRootDir(),
+        config.cache_locks_dirname,
+        str(game_info.get_category()),
+        str(game_info.get_subcategory()),
+        game_info.get_name() + config.lock_file_extension)
+
+# Get cache staging directory
+def GetCacheStagingDir(game_info):
+    return game_info.get_local_cache_dir() + ".partial"
+
+# Add staged game to cache
+def AddStagedGameToCache(
+    game_info,
+    staging_dir,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+
+    # Clear any leftover cache directory
+    game_local_cache_dir = game_info.get_local_cache_dir()
+    system.RemoveDirectory(
+        dir = game_local_cache_dir,
+        verbose = verbose,
+        pretend_run = pretend_run,
+        exit_on_failure = exit_on_failure)
+
+    # Move staging directory into place
+    success = system.MoveFileOrDirectory(
+        src = staging_dir,
+        dest = game_local_cache_dir,
+        verbose = verbose,
+        pretend_run = pretend_run,
+        exit_on_failure = exit_on_failure)
+    if not success:
+        return False
+
+    # Return result
+    return IsGameInCache(game_info)
+
 # Add game to cache
 def AddGameToCache(
     game_info,
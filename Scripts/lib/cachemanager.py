@@ -0,0 +1,413 @@
+# Imports
+import os, os.path
+import sys
+import time
+import threading
+import contextlib
+
+# Local imports
+import config
+import environment
+import system
+import ini
+
+# Process-wide cache manager
+cache_manager = None
+cache_manager_lock = threading.RLock()
+
+###########################################################
+
+# Get cache budget in bytes (zero means unlimited)
+def GetCacheBudget():
+    if not ini.HasIniField("UserData.Cache", "cache_budget_gb"):
+        return 0
+    try:
+        return int(float(ini.GetIniValue("UserData.Cache", "cache_budget_gb")) * config.bytes_per_gigabyte)
+    except ValueError:
+        system.LogWarning("Cache budget is not a number, treating cache as unlimited")
+        return 0
+
+# Get cache eviction type
+def GetCacheEvictionType():
+    if not ini.HasIniField("UserData.Cache", "cache_eviction_type"):
+        return config.CacheEvictionType.LRU
+    eviction_type = config.CacheEvictionType.from_string(ini.GetIniValue("UserData.Cache", "cache_eviction_type"))
+    if not eviction_type:
+        return config.CacheEvictionType.LRU
+    return eviction_type
+
+# Get cache game key
+def GetCacheGameKey(game_category, game_subcategory, game_name):
+    return "/".join([str(game_category), str(game_subcategory), str(game_name)])
+
+# Get cache game dirs
+def GetCacheGameDirs(game_category, game_subcategory, game_name):
+    cache_dirs = [environment.GetCacheGamingRomDir(game_category, game_subcategory, game_name)]
+    game_category = config.Category.from_enum(game_category)
+    game_subcategory = config.Subcategory.from_enum(game_subcategory)
+    if game_category and game_subcategory:
+        cache_dirs.append(environment.GetCacheGamingInstallDir(game_category, game_subcategory, game_name))
+    return cache_dirs
+
+# Measure cache game size
+def MeasureCacheGameSize(game_category, game_subcategory, game_name):
+    total_size = 0
+    for cache_dir in GetCacheGameDirs(game_category, game_subcategory, game_name):
+        for cache_file in system.BuildFileList(cache_dir, ignore_symlinks = True):
+            try:
+                total_size += os.path.getsize(cache_file)
+            except OSError:
+                pass
+    return total_size
+
+# Find cached games on disk
+def FindCachedGames():
+    cached_games = []
+    roms_root_dir = environment.GetCacheGamingRomsRootDir()
+    for game_category in system.GetDirectoryContents(roms_root_dir):
+        category_dir = system.JoinPaths(roms_root_dir, game_category)
+        for game_subcategory in system.GetDirectoryContents(category_dir):
+            subcategory_dir = system.JoinPaths(category_dir, game_subcategory)
+            for game_name in system.GetDirectoryContents(subcategory_dir):
+                game_dir = system.JoinPaths(subcategory_dir, game_name)
+                if game_name.endswith(".partial") or not system.DoesDirectoryContainFiles(game_dir):
+                    continue
+                cached_games.append((game_category, game_subcategory, game_name))
+    return cached_games
+
+# Cache manager
+class CacheManager:
+
+    # Constructor
+    def __init__(self, state_file):
+
+        # Save params
+        self.state_file = state_file
+        self.lock_file = system.LockFile(state_file + config.lock_file_extension)
+
+        # Tracked games
+        self.games = {}
+        self.dirty = False
+
+    # Load state from disk
+    def load(self):
+        self.games = {}
+        self.dirty = False
+        if not os.path.isfile(self.state_file):
+            return
+        state_data = system.ReadJsonFile(self.state_file)
+        if state_data.get("version") != config.cache_state_version:
+            return
+        games = state_data.get("games")
+        if isinstance(games, dict):
+            self.games = games
+
+    # Hold the state lock file and reload, so changes from other processes are kept
+    @contextlib.contextmanager
+    def locked(self):
+        with self.lock_file:
+            self.load()
+            yield
+
+    # Reload state written by other processes
+    def sync(self):
+        with self.locked():
+            pass
+
+    # Save state to disk
+    def save(self):
+        if not self.dirty:
+            return True
+        os.makedirs(os.path.dirname(self.state_file), exist_ok = True)
+        success = system.WriteJsonFile(
+            src = self.state_file,
+            json_data = {
+                "version": config.cache_state_version,
+                "games": self.games
+            },
+            atomic = True)
+        if success:
+            self.dirty = False
+        return success
+
+    # Get entry for a game, creating it if needed
+    def get_entry(self, game_category, game_subcategory, game_name):
+        game_key = GetCacheGameKey(game_category, game_subcategory, game_name)
+        if game_key not in self.games:
+            self.games[game_key] = {
+                "category": str(game_category),
+                "subcategory": str(game_subcategory),
+                "name": str(game_name),
+                "size": None,
+                "installed": False,
+                "last_launched": 0,
+                "pinned": False
+            }
+            self.dirty = True
+        return self.games[game_key]
+
+    # Refresh tracked games against what is actually on disk
+    def refresh(self, measure_all = False):
+        with self.locked():
+            cached_keys = set()
+            for game_category, game_subcategory, game_name in FindCachedGames():
+                entry = self.get_entry(game_category, game_subcategory, game_name)
+                cached_keys.add(GetCacheGameKey(game_category, game_subcategory, game_name))
+                if not entry["installed"]:
+                    entry["installed"] = True
+                    self.dirty = True
+                if measure_all or entry["size"] is None:
+                    entry["size"] = MeasureCacheGameSize(game_category, game_subcategory, game_name)
+                    self.dirty = True
+                if not entry["last_launched"]:
+                    rom_dir = environment.GetCacheGamingRomDir(game_category, game_subcategory, game_name)
+                    entry["last_launched"] = int(os.path.getmtime(rom_dir))
+                    self.dirty = True
+            for game_key, entry in self.games.items():
+                if entry["installed"] and game_key not in cached_keys:
+                    entry["installed"] = False
+                    entry["size"] = None
+                    self.dirty = True
+            self.save()
+
+    # Record a finished install
+    def record_install(self, game_category, game_subcategory, game_name):
+        with self.locked():
+            entry = self.get_entry(game_category, game_subcategory, game_name)
+            entry["installed"] = True
+            entry["size"] = MeasureCacheGameSize(game_category, game_subcategory, game_name)
+            self.dirty = True
+            return self.save()
+
+    # Record a launch
+    def record_launch(self, game_category, game_subcategory, game_name):
+        with self.locked():
+            entry = self.get_entry(game_category, game_subcategory, game_name)
+            entry["last_launched"] = int(time.time())
+            self.dirty = True
+            return self.save()
+
+    # Record a removal
+    def record_removal(self, game_category, game_subcategory, game_name):
+        with self.locked():
+            entry = self.get_entry(game_category, game_subcategory, game_name)
+            entry["installed"] = False
+            entry["size"] = None
+            if not entry["pinned"] and not entry["last_launched"]:
+                self.games.pop(GetCacheGameKey(game_category, game_subcategory, game_name), None)
+            self.dirty = True
+            return self.save()
+
+    # Set pinned state
+    def set_pinned(self, game_category, game_subcategory, game_name, pinned):
+        with self.locked():
+            entry = self.get_entry(game_category, game_subcategory, game_name)
+            entry["pinned"] = pinned
+            self.dirty = True
+            return self.save()
+
+    # Check if game is pinned
+    def is_pinned(self, game_category, game_subcategory, game_name):
+        entry = self.games.get(GetCacheGameKey(game_category, game_subcategory, game_name))
+        return bool(entry and entry["pinned"])
+
+    # Get launched entries, most recent first
+    def get_recent_entries(self):
+        launched_entries = [entry for entry in self.games.values() if entry["last_launched"]]
+        return sorted(launched_entries, key = lambda entry: entry["last_launched"], reverse = True)
+
+    # Get installed entries
+    def get_installed_entries(self):
+        return [entry for entry in self.games.values() if entry["installed"]]
+
+    # Get used bytes
+    def get_usage(self):
+        return sum(entry["size"] or 0 for entry in self.get_installed_entries())
+
+    # Get eviction candidates, most evictable first
+    def get_eviction_candidates(self, eviction_type = config.CacheEvictionType.LRU, exclude_keys = []):
+        candidates = []
+        for game_key, entry in self.games.items():
+            if entry["installed"] and not entry["pinned"] and game_key not in exclude_keys:
+                candidates.append(entry)
+        if eviction_type == config.CacheEvictionType.SIZE_AWARE:
+            now = time.time()
+            candidates.sort(key = lambda entry: (entry["size"] or 0) * max(now - entry["last_launched"], 1), reverse = True)
+        else:
+            candidates.sort(key = lambda entry: entry["last_launched"])
+        return candidates
+
+    # Get entries to evict so that the required bytes fit within the budget
+    def plan_eviction(self, required_bytes, budget_bytes, eviction_type = config.CacheEvictionType.LRU, exclude_keys = []):
+        planned_entries = []
+        excess_bytes = self.get_usage() + required_bytes - budget_bytes
+        for entry in self.get_eviction_candidates(eviction_type, exclude_keys):
+            if excess_bytes <= 0:
+                break
+            planned_entries.append(entry)
+            excess_bytes -= entry["size"] or 0
+        return (excess_bytes <= 0, planned_entries)
+
+###########################################################
+
+# Get cache manager
+def GetCacheManager():
+    global cache_manager
+    if cache_manager is None:
+        manager = CacheManager(environment.GetCacheStateFile())
+        manager.load()
+        manager.refresh()
+        cache_manager = manager
+    return cache_manager
+
+# Get cache status
+def GetCacheStatus(measure_all = False):
+    with cache_manager_lock:
+        manager = GetCacheManager()
+        if measure_all:
+            manager.refresh(measure_all = True)
+        else:
+            manager.sync()
+        return {
+            "budget": GetCacheBudget(),
+            "usage": manager.get_usage(),
+            "eviction_type": GetCacheEvictionType(),
+            "games": sorted(manager.get_installed_entries(), key = lambda entry: entry["last_launched"], reverse = True),
+            "pinned": sorted([entry for entry in manager.games.values() if entry["pinned"]], key = lambda entry: entry["name"])
+        }
+
+# Get games worth prefetching, most likely next first
+def GetPrefetchCandidates(recent_games = config.cache_prefetch_recent_games):
+    candidates = []
+    seen_keys = set()
+    def add_candidate(game_category, game_subcategory, game_name):
+        game_key = GetCacheGameKey(game_category, game_subcategory, game_name)
+        if game_key in seen_keys:
+            return
+        seen_keys.add(game_key)
+        with cache_manager_lock:
+            entry = GetCacheManager().games.get(game_key)
+        if not entry or not entry["installed"]:
+            candidates.append((game_category, game_subcategory, game_name))
+    with cache_manager_lock:
+        manager = GetCacheManager()
+        manager.sync()
+        recent_entries = manager.get_recent_entries()[:recent_games]
+
+        # Pinned games come first, then recently played ones
+        for entry in sorted(manager.games.values(), key = lambda entry: entry["last_launched"], reverse = True):
+            if entry["pinned"]:
+                add_candidate(entry["category"], entry["subcategory"], entry["name"])
+        for entry in recent_entries:
+            add_candidate(entry["category"], entry["subcategory"], entry["name"])
+
+    # Then the rest of the collections those games belong to
+    for entry in recent_entries:
+        game_category = config.Category.from_enum(entry["category"])
+        game_subcategory = config.Subcategory.from_enum(entry["subcategory"])
+        if not game_category or not game_subcategory:
+            continue
+        json_dir = environment.GetJsonMetadataDir(config.Supercategory.ROMS, game_category, game_subcategory)
+        for json_file in system.BuildFileListByExtensions(json_dir, extensions = [".json"]):
+            game_name = system.GetFilenameBasename(json_file)
+            if json_file == environment.GetJsonMetadataIgnoreFile(config.Supercategory.ROMS, game_category, game_subcategory):
+                continue
+            add_candidate(entry["category"], entry["subcategory"], game_name)
+    return candidates
+
+# Remove cached game
+def RemoveCachedGame(
+    game_category,
+    game_subcategory,
+    game_name,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+    for cache_dir in GetCacheGameDirs(game_category, game_subcategory, game_name):
+        success = system.RemoveDirectory(
+            dir = cache_dir,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+        if not success:
+            return False
+    if not pretend_run:
+        RecordGameRemoval(game_category, game_subcategory, game_name)
+    return True
+
+# Evict cached games until the required bytes fit within the budget
+def EnsureCacheSpace(
+    required_bytes = 0,
+    exclude_games = [],
+    budget_bytes = None,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+
+    # Get budget
+    if budget_bytes is None:
+        budget_bytes = GetCacheBudget()
+    if not budget_bytes:
+        return True
+
+    # Plan eviction
+    with cache_manager_lock:
+        manager = GetCacheManager()
+        manager.sync()
+        exclude_keys = [GetCacheGameKey(*game) for game in exclude_games]
+        fits, planned_entries = manager.plan_eviction(
+            required_bytes = required_bytes,
+            budget_bytes = budget_bytes,
+            eviction_type = GetCacheEvictionType(),
+            exclude_keys = exclude_keys)
+
+    # Leave the cache alone if nothing short of unpinning would make room
+    if not fits:
+        system.LogWarning("Cache budget of %.1f MB cannot fit %.1f MB without evicting pinned games" % (
+            budget_bytes / config.bytes_per_megabyte,
+            required_bytes / config.bytes_per_megabyte))
+        return False
+
+    # Evict games
+    for entry in planned_entries:
+        if verbose:
+            system.LogInfo("Evicting %s from cache (%.1f MB)" % (entry["name"], (entry["size"] or 0) / config.bytes_per_megabyte))
+        success = RemoveCachedGame(
+            game_category = entry["category"],
+            game_subcategory = entry["subcategory"],
+            game_name = entry["name"],
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+        if not success:
+            return False
+    return True
+
+# Record cached game install
+def RecordGameInstall(game_category, game_subcategory, game_name):
+    with cache_manager_lock:
+        return GetCacheManager().record_install(game_category, game_subcategory, game_name)
+
+# Record cached game removal
+def RecordGameRemoval(game_category, game_subcategory, game_name):
+    with cache_manager_lock:
+        return GetCacheManager().record_removal(game_category, game_subcategory, game_name)
+
+# Record cached game launch
+def RecordGameLaunch(game_category, game_subcategory, game_name):
+    with cache_manager_lock:
+        return GetCacheManager().record_launch(game_category, game_subcategory, game_name)
+
+# Pin cached game
+def PinGame(game_category, game_subcategory, game_name, pinned = True):
+    with cache_manager_lock:
+        return GetCacheManager().set_pinned(game_category, game_subcategory, game_name, pinned)
+
+# Check if cached game is pinned
+def IsGamePinned(game_category, game_subcategory, game_name):
+    with cache_manager_lock:
+        manager = GetCacheManager()
+        manager.sync()
+        return manager.is_pinned(game_category, game_subcategory, game_name)
+
+###########################################################
@@ -18,6 +18,7 @@ import metadata
 import metadataentry
 import metadatacollector
 import metadataassetcollector
+import storeindex
 
 ############################################################
 
@@ -44,6 +45,7 @@ def HashGameFiles(
     game_subcategory,
     game_root,
     passphrase = None,
+    jobs = 1,
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
@@ -65,6 +67,7 @@ def HashGameFiles(
         offset = hash_offset,
         output_file = hash_file,
         passphrase = passphrase,
+        jobs = jobs,
         verbose = verbose,
         pretend_run = pretend_run,
         exit_on_failure = exit_on_failure)
@@ -294,7 +297,13 @@ def CreateGameJsonFile(
         verbose = verbose,
         pretend_run = pretend_run,
         exit_on_failure = exit_on_failure)
-    return success
+    if not success:
+        return False
+
+    # Update store identifier index
+    if not pretend_run:
+        storeindex.UpdateStoreIdentifierIndex(json_file_path)
+    return True
 
 ############################################################
 
@@ -652,59 +661,48 @@ def DoesMetadataAssetExist(
         asset_type = asset_type)
     return system.DoesPathExist(output_asset_file)
 
-# Download metadata asset
-def DownloadMetadataAsset(
+# Create metadata asset job
+def CreateMetadataAssetJob(
     game_supercategory,
     game_category,
     game_subcategory,
     game_name,
     asset_url,
-    asset_type,
-    skip_existing = False,
+    asset_type):
+    return {
+        "supercategory": game_supercategory,
+        "category": game_category,
+        "subcategory": game_subcategory,
+        "name": game_name,
+        "platform": gameinfo.DeriveGamePlatformFromCategories(game_category, game_subcategory),
+        "asset_url": asset_url,
+        "asset_type": asset_type,
+        "output_dir": environment.GetLockerGamingAssetDir(game_category, game_subcategory, asset_type),
+        "output_file": environment.GetLockerGamingAssetFile(game_category, game_subcategory, game_name, asset_type),
+        "tmp_dir": None,
+        "original_file": None,
+        "converted_file": None
+    }
+
+# Fetch metadata asset into a temporary directory
+def FetchMetadataAsset(
+    asset_job,
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
 
-    # Check if asset exists
-    asset_exists = DoesMetadataAssetExist(
-        game_supercategory = game_supercategory,
-        game_category = game_category,
-        game_subcategory = game_subcategory,
-        game_name = game_name,
-        asset_type = asset_type)
-    if skip_existing and asset_exists:
-        return True
-
-    # Get platform
-    game_platform = gameinfo.DeriveGamePlatformFromCategories(game_category, game_subcategory)
-
-    # Get output asset
-    output_asset_dir = environment.GetLockerGamingAssetDir(game_category, game_subcategory, asset_type)
-    output_asset_file = environment.GetLockerGamingAssetFile(game_category, game_subcategory, game_name, asset_type)
-    output_asset_ext = system.GetFilenameExtension(output_asset_file)
-
     # Create temporary directory
     tmp_dir_success, tmp_dir_result = system.CreateTemporaryDirectory(verbose = verbose)
     if not tmp_dir_success:
         return False
-
-    # Check asset url
-    if not network.IsUrlReachable(asset_url):
-        asset_url = metadataassetcollector.CollectMetadataAssetFromAll(
-            game_platform = game_platform,
-            game_name = game_name,
-            asset_type = asset_type,
-            verbose = verbose,
-            pretend_run = pretend_run,
-            exit_on_failure = exit_on_failure)
-    if not network.IsUrlReachable(asset_url):
-        return False
+    asset_job["tmp_dir"] = tmp_dir_result
 
     # Get temp asset
-    tmp_asset_file_original = system.JoinPaths(tmp_dir_result, system.ReplaceInvalidPathCharacters(system.GetFilenameFile(asset_url)))
-    tmp_asset_file_converted = tmp_asset_file_original + output_asset_ext
+    asset_url = asset_job["asset_url"]
+    asset_job["original_file"] = system.JoinPaths(tmp_dir_result, system.ReplaceInvalidPathCharacters(system.GetFilenameFile(asset_url)))
+    asset_job["converted_file"] = asset_job["original_file"] + system.GetFilenameExtension(asset_job["output_file"])
     system.MakeDirectory(
-        dir = output_asset_dir,
+        dir = asset_job["output_dir"],
         verbose = verbose,
         pretend_run = pretend_run,
         exit_on_failure = exit_on_failure)
@@ -712,59 +710,317 @@ def DownloadMetadataAsset(
     # Download asset
     success = asset.DownloadAsset(
         asset_url = asset_url,
-        asset_file = tmp_asset_file_original,
-        asset_type = asset_type,
+        asset_file = asset_job["original_file"],
+        asset_type = asset_job["asset_type"],
         verbose = verbose,
         pretend_run = pretend_run,
         exit_on_failure = exit_on_failure)
     if not success:
-        system.LogError("Download failed for asset %s of '%s' - '%s'" % (asset_type, game_platform, game_name))
+        system.LogError("Download failed for asset %s of '%s' - '%s'" % (asset_job["asset_type"], asset_job["platform"], asset_job["name"]))
         return False
+    return True
+
+# Prepare fetched metadata asset
+def PrepareMetadataAsset(
+    asset_job,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
 
     # Convert asset
     success = asset.ConvertAsset(
-        asset_src = tmp_asset_file_original,
-        asset_dest = tmp_asset_file_converted,
-        asset_type = asset_type,
+        asset_src = asset_job["original_file"],
+        asset_dest = asset_job["converted_file"],
+        asset_type = asset_job["asset_type"],
         verbose = verbose,
         pretend_run = pretend_run,
         exit_on_failure = exit_on_failure)
     if not success:
-        system.LogError("Convert failed for asset %s of '%s' - '%s'" % (asset_type, game_platform, game_name))
+        system.LogError("Convert failed for asset %s of '%s' - '%s'" % (asset_job["asset_type"], asset_job["platform"], asset_job["name"]))
         return False
 
     # Clean asset
     success = asset.CleanAsset(
-        asset_file = tmp_asset_file_converted,
-        asset_type = asset_type,
+        asset_file = asset_job["converted_file"],
+        asset_type = asset_job["asset_type"],
         verbose = verbose,
         pretend_run = pretend_run,
         exit_on_failure = exit_on_failure)
     if not success:
-        system.LogError("Clean failed for asset %s of '%s' - '%s'" % (asset_type, game_platform, game_name))
+        system.LogError("Clean failed for asset %s of '%s' - '%s'" % (asset_job["asset_type"], asset_job["platform"], asset_job["name"]))
         return False
+    return True
+
+# Store prepared metadata asset
+def StoreMetadataAsset(
+    asset_job,
+    skip_existing = False,
+    upload_files = True,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
 
     # Backup asset
     success = locker.BackupFiles(
-        src = tmp_asset_file_converted,
-        dest = output_asset_file,
-        show_progress = True,
+        src = asset_job["converted_file"],
+        dest = asset_job["output_file"],
+        show_progress = upload_files,
         skip_existing = skip_existing,
+        upload_files = upload_files,
         verbose = verbose,
         pretend_run = pretend_run,
         exit_on_failure = exit_on_failure)
     if not success:
-        system.LogError("Backup failed for asset %s of '%s' - '%s'" % (asset_type, game_platform, game_name))
+        system.LogError("Backup failed for asset %s of '%s' - '%s'" % (asset_job["asset_type"], asset_job["platform"], asset_job["name"]))
         return False
+    return True
 
-    # Delete temporary directory
-    system.RemoveDirectory(
-        dir = tmp_dir_result,
-        verbose = verbose,
-        pretend_run = pretend_run,
-        exit_on_failure = exit_on_failure)
+# Remove temporary files of metadata asset job
+def CleanupMetadataAssetJob(
+    asset_job,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+    if asset_job["tmp_dir"]:
+        system.RemoveDirectory(
+            dir = asset_job["tmp_dir"],
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+        asset_job["tmp_dir"] = None
 
-    # Should be successful
-    return True
+# Download metadata asset
+def DownloadMetadataAsset(
+    game_supercategory,
+    game_category,
+    game_subcategory,
+    game_name,
+    asset_url,
+    asset_type,
+    skip_existing = False,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+
+    # Check if asset exists
+    asset_exists = DoesMetadataAssetExist(
+        game_supercategory = game_supercategory,
+        game_category = game_category,
+        game_subcategory = game_subcategory,
+        game_name = game_name,
+        asset_type = asset_type)
+    if skip_existing and asset_exists:
+        return True
+
+    # Create asset job
+    asset_job = CreateMetadataAssetJob(
+        game_supercategory = game_supercategory,
+        game_category = game_category,
+        game_subcategory = game_subcategory,
+        game_name = game_name,
+        asset_url = asset_url,
+        asset_type = asset_type)
+
+    # Check asset url
+    if not network.IsUrlReachable(asset_url):
+        asset_job["asset_url"] = metadataassetcollector.CollectMetadataAssetFromAll(
+            game_platform = asset_job["platform"],
+            game_name = game_name,
+            asset_type = asset_type,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+        if not network.IsUrlReachable(asset_job["asset_url"]):
+            return False
+
+    # Fetch, prepare, and store asset
+    try:
+        success = FetchMetadataAsset(
+            asset_job = asset_job,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+        if success:
+            success = PrepareMetadataAsset(
+                asset_job = asset_job,
+                verbose = verbose,
+                pretend_run = pretend_run,
+                exit_on_failure = exit_on_failure)
+        if success:
+            success = StoreMetadataAsset(
+                asset_job = asset_job,
+                skip_existing = skip_existing,
+                verbose = verbose,
+                pretend_run = pretend_run,
+                exit_on_failure = exit_on_failure)
+    finally:
+        CleanupMetadataAssetJob(
+            asset_job = asset_job,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+    return success
+
+# Download metadata assets through a staged pipeline
+# Searches and downloads run on a bounded network pool, conversion and
+# cleaning on a cpu pool, and locker uploads are batched at the end.
+# Choosing among search results stays on the calling thread.
+def DownloadMetadataAssets(
+    game_entries,
+    asset_type,
+    skip_existing = False,
+    jobs = config.metadata_asset_max_jobs,
+    rate_limit = 0,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+    import collections
+    import concurrent.futures
+
+    # Summary
+    summary = {
+        "downloaded": [],
+        "skipped": [],
+        "failed": []
+    }
+    def record_failure(asset_job, reason):
+        summary["failed"].append((asset_job, reason))
+        system.LogWarning("Metadata asset %s failed for '%s' - '%s': %s" % (asset_type, asset_job["platform"], asset_job["name"], reason))
+
+    # Create asset jobs
+    asset_jobs = []
+    for game_supercategory, game_category, game_subcategory, game_name in game_entries:
+        asset_job = CreateMetadataAssetJob(
+            game_supercategory = game_supercategory,
+            game_category = game_category,
+            game_subcategory = game_subcategory,
+            game_name = game_name,
+            asset_url = None,
+            asset_type = asset_type)
+        if skip_existing and system.DoesPathExist(asset_job["output_file"]):
+            summary["skipped"].append(asset_job)
+            continue
+        asset_jobs.append(asset_job)
+
+    # Network stage: search for candidates
+    rate_limiter = network.RateLimiter(rate_limit)
+    def search_asset(asset_job):
+        rate_limiter.wait()
+        return metadataassetcollector.CollectMetadataAssetsFromAll(
+            game_platform = asset_job["platform"],
+            game_name = asset_job["name"],
+            asset_type = asset_type,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+
+    # Cpu stage: convert, clean, and store locally
+    def prepare_asset(asset_job):
+        try:
+            success = PrepareMetadataAsset(
+                asset_job = asset_job,
+                verbose = verbose,
+                pretend_run = pretend_run,
+                exit_on_failure = exit_on_failure)
+            if not success:
+                return "Convert or clean failed"
+            success = StoreMetadataAsset(
+                asset_job = asset_job,
+                skip_existing = skip_existing,
+                upload_files = False,
+                verbose = verbose,
+                pretend_run = pretend_run,
+                exit_on_failure = exit_on_failure)
+            if not success:
+                return "Backup failed"
+            return None
+        finally:
+            CleanupMetadataAssetJob(
+                asset_job = asset_job,
+                verbose = verbose,
+                pretend_run = pretend_run,
+                exit_on_failure = exit_on_failure)
+
+    # Network stage: download, then hand off to the cpu stage
+    def fetch_asset(asset_job):
+        rate_limiter.wait()
+        success = FetchMetadataAsset(
+            asset_job = asset_job,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+        if not success:
+            CleanupMetadataAssetJob(
+                asset_job = asset_job,
+                verbose = verbose,
+                pretend_run = pretend_run,
+                exit_on_failure = exit_on_failure)
+            return None
+        return cpu_pool.submit(prepare_asset, asset_job)
+
+    # Run pipeline
+    network_pool = concurrent.futures.ThreadPoolExecutor(max_workers = max(jobs, 1))
+    cpu_pool = concurrent.futures.ThreadPoolExecutor(max_workers = os.cpu_count() or 1)
+    try:
+
+        # Keep a bounded number of searches running ahead of the user
+        pending_jobs = collections.deque(asset_jobs)
+        search_futures = collections.deque()
+        def submit_searches():
+            while pending_jobs and len(search_futures) < max(jobs, 1) * 2:
+                asset_job = pending_jobs.popleft()
+                search_futures.append((asset_job, network_pool.submit(search_asset, asset_job)))
+        submit_searches()
+
+        # Choose assets in order and start their downloads
+        fetch_futures = []
+        while search_futures:
+            asset_job, search_future = search_futures.popleft()
+            submit_searches()
+            try:
+                metadata_assets = search_future.result()
+            except Exception as e:
+                record_failure(asset_job, "Search failed (%s)" % e)
+                continue
+            asset_job["asset_url"] = metadataassetcollector.ChooseMetadataAsset(
+                game_name = asset_job["name"],
+                metadata_assets = metadata_assets)
+            if not asset_job["asset_url"]:
+                record_failure(asset_job, "No asset was chosen")
+                continue
+            fetch_futures.append((asset_job, network_pool.submit(fetch_asset, asset_job)))
+
+        # Collect results
+        for asset_job, fetch_future in fetch_futures:
+            try:
+                prepare_future = fetch_future.result()
+                if not prepare_future:
+                    record_failure(asset_job, "Download failed")
+                    continue
+                error = prepare_future.result()
+                if error:
+                    record_failure(asset_job, error)
+                    continue
+                summary["downloaded"].append(asset_job)
+            except Exception as e:
+                record_failure(asset_job, str(e))
+    finally:
+        network_pool.shutdown(wait = True)
+        cpu_pool.shutdown(wait = True)
+
+    # Upload stored assets in one batch per asset directory
+    upload_dirs = sorted(set(asset_job["output_dir"] for asset_job in summary["downloaded"]))
+    if upload_dirs:
+        success = locker.UploadBackupPaths(
+            paths = upload_dirs,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+        if not success:
+            for asset_job in summary["downloaded"]:
+                summary["failed"].append((asset_job, "Upload failed"))
+            summary["downloaded"] = []
+            system.LogWarning("Upload of metadata assets failed")
+    return summary
 
 ############################################################
@@ -5,6 +5,9 @@ import subprocess
 import getpass
 import shutil
 import copy
+import ntpath
+import time
+import threading
 
 # Local imports
 import config
@@ -15,6 +18,10 @@ import sandbox
 import capture
 import ini
 
+# Time spent waiting for blocking processes, per program
+command_wait_times = {}
+command_wait_times_lock = threading.Lock()
+
 ###########################################################
 
 # Create command string
@@ -405,6 +412,62 @@ def PostprocessCommand(
 
 ###########################################################
 
+# Start tracking command processes
+def StartCommandTracking(process, options):
+    if not isinstance(options.blocking_processes, list) or len(options.blocking_processes) == 0:
+        return None
+    tracker = environment.ProcessTracker(process.pid)
+    tracker.start()
+    return tracker
+
+# Record command wait time
+def RecordCommandWaitTime(cmd, wait_time):
+    program_name = ntpath.basename(GetStarterCommand(cmd))
+    with command_wait_times_lock:
+        wait_entry = command_wait_times.setdefault(program_name, {"count": 0, "seconds": 0.0})
+        wait_entry["count"] += 1
+        wait_entry["seconds"] += wait_time
+
+# Get command wait times
+def GetCommandWaitTimes():
+    with command_wait_times_lock:
+        return copy.deepcopy(command_wait_times)
+
+# Wait for command processes
+def WaitForCommandProcesses(cmd, process, tracker, options, verbose = False):
+    if not tracker:
+        return 0
+
+    # Wait for tracked descendants
+    start_time = time.perf_counter()
+    tracker.stop()
+    tracked_processes = tracker.get_processes()
+    environment.WaitForProcesses(tracked_processes)
+
+    # Only scan by name for processes that detached from the tracked tree
+    # (the starter itself is excluded by pid, so a launcher that hands off to an
+    # already running instance of itself still waits on that instance)
+    tracked_names = set()
+    for process_name in tracker.get_process_names():
+        tracked_names.add(ntpath.basename(process_name))
+    detached_names = []
+    for process_name in options.blocking_processes:
+        if ntpath.basename(process_name) not in tracked_names:
+            detached_names.append(process_name)
+    if len(detached_names) > 0:
+        environment.WaitForNamedProcesses(
+            process_names = detached_names,
+            ignore_pids = [process.pid] + [proc.pid for proc in tracked_processes])
+
+    # Record wait time
+    wait_time = time.perf_counter() - start_time
+    RecordCommandWaitTime(cmd, wait_time)
+    if verbose:
+        system.LogInfo("Waited %.3f seconds for blocking processes" % wait_time)
+    return wait_time
+
+###########################################################
+
 # Print command
 def PrintCommand(cmd):
     if isinstance(cmd, str):
@@ -436,26 +499,20 @@ def RunOutputCommand(
                 PrintCommand(cmd)
             if options.shell:
                 cmd = CreateCommandString(cmd)
-            output = ""
+            stderr = None
             if options.include_stderr:
-                output = subprocess.run(
-                    cmd,
-                    shell = options.shell,
-                    cwd = options.cwd,
-                    env = options.env,
-                    creationflags = options.creationflags,
-                    stdout = subprocess.PIPE,
-                    stderr = subprocess.STDOUT).stdout
-            else:
-                output = subprocess.run(
-                    cmd,
-                    shell = options.shell,
-                    cwd = options.cwd,
-                    env = options.env,
-                    creationflags = options.creationflags,
-                    stdout = subprocess.PIPE).stdout
-            if isinstance(options.blocking_processes, list) and len(options.blocking_processes) > 0:
-                environment.WaitForNamedProcesses(options.blocking_processes)
+                stderr = subprocess.STDOUT
+            process = subprocess.Popen(
+                cmd,
+                shell = options.shell,
+                cwd = options.cwd,
+                env = options.env,
+                creationflags = options.creationflags,
+                stdout = subprocess.PIPE,
+                stderr = stderr)
+            tracker = StartCommandTracking(process, options)
+            output = process.communicate()[0]
+            WaitForCommandProcesses(cmd, process, tracker, options, verbose = verbose)
             if options.allow_processing:
                 PostprocessCommand(
                     cmd = cmd,
@@ -507,7 +564,7 @@ def RunReturncodeCommand(
                 stdout = open(options.stdout, "w")
             if system.IsPathValid(options.stderr):
                 stderr = open(options.stderr, "w")
-            code = subprocess.call(
+            process = subprocess.Popen(
                 cmd,
                 shell = options.shell,
                 cwd = options.cwd,
@@ -515,8 +572,9 @@ def RunReturncodeCommand(
                 creationflags = options.creationflags,
                 stdout = stdout,
                 stderr = stderr)
-            if isinstance(options.blocking_processes, list) and len(options.blocking_processes) > 0:
-                environment.WaitForNamedProcesses(options.blocking_processes)
+            tracker = StartCommandTracking(process, options)
+            code = process.wait()
+            WaitForCommandProcesses(cmd, process, tracker, options, verbose = verbose)
             if system.IsPathValid(options.stdout):
                 stdout.close()
             if system.IsPathValid(options.stderr):
@@ -603,6 +661,7 @@ def RunBlockingCommand(
                 env = options.env,
                 creationflags = options.creationflags,
                 stdout = subprocess.PIPE)
+            tracker = StartCommandTracking(process, options)
             while True:
                 output = CleanCommandOutput(process.stdout.readline().rstrip())
                 if output == "" and process.poll() is not None:
@@ -610,8 +669,7 @@ def RunBlockingCommand(
                 if output:
                     system.LogInfo(output.strip())
             code = process.poll()
-            if isinstance(options.blocking_processes, list) and len(options.blocking_processes) > 0:
-                environment.WaitForNamedProcesses(options.blocking_processes)
+            WaitForCommandProcesses(cmd, process, tracker, options, verbose = verbose)
             if options.allow_processing:
                 PostprocessCommand(
                     cmd = cmd,
@@ -633,6 +691,116 @@ def RunBlockingCommand(
             system.LogError(e, quit_program = True)
         return 1
 
+# Run piped command
+def RunPipedCommand(
+    cmd,
+    input_chunks = None,
+    output_func = None,
+    error_func = None,
+    chunksize = config.transfer_chunk_size,
+    options = CommandOptions(),
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+    try:
+        cmd = CreateCommandList(cmd)
+        if not options:
+            options = CommandOptions()
+        if not pretend_run:
+            if options.allow_processing:
+                cmd, options = PreprocessCommand(
+                    cmd = cmd,
+                    options = options,
+                    verbose = verbose,
+                    exit_on_failure = exit_on_failure)
+            if verbose:
+                PrintCommand(cmd)
+            if options.shell:
+                cmd = CreateCommandString(cmd)
+            process = subprocess.Popen(
+                cmd,
+                shell = options.shell,
+                cwd = options.cwd,
+                env = options.env,
+                creationflags = options.creationflags,
+                stdin = subprocess.PIPE if input_chunks is not None else subprocess.DEVNULL,
+                stdout = subprocess.PIPE,
+                stderr = subprocess.PIPE,
+                bufsize = 0)
+            tracker = StartCommandTracking(process, options)
+            try:
+
+                # Feed input on a separate thread
+                input_errors = []
+                def write_input():
+                    try:
+                        for chunk in input_chunks:
+                            with memoryview(chunk) as chunk_view:
+                                num_written = 0
+                                while num_written < len(chunk_view):
+                                    num_written += process.stdin.write(chunk_view[num_written:])
+                    except (BrokenPipeError, OSError) as e:
+                        input_errors.append(e)
+                    finally:
+                        try:
+                            process.stdin.close()
+                        except OSError:
+                            pass
+                input_thread = None
+                if input_chunks is not None:
+                    input_thread = threading.Thread(target = write_input, daemon = True)
+                    input_thread.start()
+
+                # Read errors on a separate thread
+                def read_errors():
+                    for line in iter(process.stderr.readline, b""):
+                        if callable(error_func):
+                            error_func(CleanCommandOutput(line).rstrip())
+                error_thread = threading.Thread(target = read_errors, daemon = True)
+                error_thread.start()
+
+                # Stream output, an output function returning False stops the command
+                output_buffer = bytearray(chunksize)
+                output_view = memoryview(output_buffer)
+                while True:
+                    num_read = process.stdout.readinto(output_buffer)
+                    if not num_read:
+                        break
+                    if callable(output_func):
+                        if output_func(output_view[:num_read]) is False:
+                            process.kill()
+                            break
+                output_view.release()
+
+                # Finish
+                if input_thread:
+                    input_thread.join()
+                error_thread.join()
+                code = process.wait()
+                WaitForCommandProcesses(cmd, process, tracker, options, verbose = verbose)
+                if options.allow_processing:
+                    PostprocessCommand(
+                        cmd = cmd,
+                        options = options,
+                        verbose = verbose,
+                        exit_on_failure = exit_on_failure)
+                return code
+            finally:
+
+                # Never leave the process or its tracker behind on an abnormal exit
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+                if tracker:
+                    tracker.stop()
+        return 0
+    except Exception as e:
+        if verbose:
+            system.LogError(e)
+        elif exit_on_failure:
+            system.LogError(e, quit_program = True)
+        return 1
+
 # Run game command
 def RunGameCommand(
     game_info,
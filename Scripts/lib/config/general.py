@@ -163,9 +163,83 @@ max_disc_data_size_50gb = 44 * bytes_per_gigabyte
 max_disc_data_size_100gb = 88 * bytes_per_gigabyte
 
 # Buffer sizes
-hash_chunk_size = 2 ** 32
+hash_chunk_size = 4 * bytes_per_megabyte
+hash_mmap_threshold = 64 * bytes_per_megabyte
 transfer_chunk_size = 4096 * 1024
 
+# Metadata sidecar
+metadata_sidecar_extension = ".cache"
+metadata_sidecar_version = 1
+
+# Hash cache
+hash_cache_filename = "hashes.sqlite"
+hash_cache_max_entries = 2000000
+hash_cache_prune_interval = 1000
+
+# Hash partial sampling
+hash_partial_sample_size = 64 * bytes_per_kilobyte
+
+# Hash journal
+hash_journal_extension = ".journal"
+hash_journal_compact_interval = 100
+
+# Cryption
+cryption_max_jobs = 8
+
+# Network
+network_probe_timeout = 15
+network_download_timeout = 60
+network_request_timeout = 30
+
+# Http sessions
+http_pool_connections = 16
+http_pool_maxsize = 16
+http_retry_count = 3
+http_retry_backoff = 0.5
+
+# Http cache
+http_cache_dirname = "http"
+http_cache_version = 1
+http_cache_ttl = 3600
+http_cache_credential_params = ["key", "api_key", "apikey", "access_token", "token", "secret", "client_secret", "password", "signature", "sig", "auth"]
+http_cache_credential_headers = ["authorization", "cookie", "proxy-authorization", "x-api-key"]
+
+# ExifTool session
+exiftool_session_timeout = 10
+exiftool_log_args = 8
+
+# Metadata scraping
+metadata_scrape_max_jobs = 3
+metadata_scrape_delay = 5
+web_driver_pool_max_drivers = 3
+
+# Metadata assets
+metadata_asset_max_jobs = 4
+
+# Store identifier index
+store_index_filename = "store_index.json"
+store_index_version = 1
+
+# Cache manager
+cache_state_filename = "cache_state.json"
+cache_state_version = 1
+
+# Lock files
+lock_file_extension = ".lock"
+lock_file_poll_interval = 0.1
+cache_locks_dirname = "locks"
+
+# Platform launcher index
+launcher_index_filename = "launcher_index.json"
+launcher_index_version = 1
+
+# Cache prefetch
+cache_prefetch_max_games = 10
+cache_prefetch_recent_games = 5
+cache_prefetch_delay = 5
+cache_prefetch_jobs = 1
+background_process_nice = 19
+
 # Ignored install paths
 ignored_paths_install = [
     "ProgramData/Microsoft",
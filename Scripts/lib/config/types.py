@@ -381,6 +381,35 @@ class PlaylistType(EnumType):
     TREE                    = ("Tree")
     LOCAL                   = ("Local")
 
+# Hash types
+class HashType(EnumType):
+    CRC32                   = ("CRC32")
+    MD5                     = ("MD5")
+    SHA1                    = ("SHA1")
+    SHA256                  = ("SHA256")
+    XXH3                    = ("XXH3")
+
+# Cache eviction types
+class CacheEvictionType(EnumType):
+    LRU                     = ("LRU")
+    SIZE_AWARE              = ("SizeAware")
+
+# Cache action types
+class CacheActionType(EnumType):
+    STATUS                  = ("Status")
+    PIN                     = ("Pin")
+    UNPIN                   = ("Unpin")
+    EVICT                   = ("Evict")
+    REFRESH                 = ("Refresh")
+
+# Benchmark types
+class BenchmarkType(EnumType):
+    HASHING                 = ("Hashing")
+    METADATA_PARSING        = ("MetadataParsing")
+    STARTUP                 = ("Startup")
+    LAUNCH_DISPATCH         = ("LaunchDispatch")
+    REMOTE_JSON             = ("RemoteJson")
+
 # Merge types
 class MergeType(EnumType):
     REPLACE                 = ("Replace")
@@ -1,6 +1,10 @@
 # Imports
 import os, os.path
 import sys
+import string
+import time
+import threading
+import urllib.parse
 
 # Local imports
 import config
@@ -9,12 +13,21 @@ import programs
 import system
 import hashing
 
+# Determine if file uses the legacy encrypted name (md5 followed by ENC without a dot)
+def IsLegacyEncryptedFilename(src):
+    filename = system.GetFilenameFile(src)
+    legacy_suffix = config.EncryptedFileType.ENC.val()
+    if not filename.endswith(legacy_suffix):
+        return False
+    filename_hash = filename[:-len(legacy_suffix)]
+    return len(filename_hash) == 32 and all(c in string.hexdigits for c in filename_hash)
+
 # Determine if file is encrypted
 def IsFileEncrypted(src):
     for ext in config.EncryptedFileType.cvalues():
         if src.endswith(ext):
             return True
-    return False
+    return IsLegacyEncryptedFilename(src)
 
 # Determine if passphrase is valid
 def IsPassphraseValid(passphrase):
@@ -24,7 +37,7 @@ def IsPassphraseValid(passphrase):
 def GenerateEncryptedFilename(src):
     if IsFileEncrypted(src):
         return src
-    return hashing.CalculateStringMD5(src) + config.EncryptedFileType.ENC.val()
+    return hashing.CalculateStringMD5(src) + config.EncryptedFileType.ENC.cval()
 
 # Generate encrypted path
 def GenerateEncryptedPath(source_path):
@@ -32,6 +45,16 @@ def GenerateEncryptedPath(source_path):
     output_name = GenerateEncryptedFilename(system.GetFilenameFile(source_path))
     return system.JoinPaths(output_dir, output_name)
 
+# Parse embedded filename from a gpg status line
+def ParseEmbeddedFilenameStatus(line):
+    if not line.startswith("[GNUPG:] PLAINTEXT "):
+        return None
+    status_fields = line.split(" ", 4)
+    if len(status_fields) < 5 or not status_fields[4]:
+        return None
+    embedded_name = urllib.parse.unquote(status_fields[4]).replace("\\", "/")
+    return system.CleanRichText(os.path.basename(embedded_name))
+
 # Get embedded filename
 def GetEmbeddedFilename(
     src,
@@ -79,69 +102,94 @@ def GetEmbeddedFilename(
 def GetEmbeddedFileInfo(
     src,
     passphrase,
-    hasher,
+    algorithms = [config.HashType.XXH3],
+    encrypted_algorithms = [config.HashType.MD5],
     chunksize = config.hash_chunk_size,
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
 
-    # Get embedded filename
-    embedded_filename = GetEmbeddedFilename(
-        src = src,
-        passphrase = passphrase,
-        verbose = verbose,
-        pretend_run = pretend_run,
-        exit_on_failure = exit_on_failure)
-    if not embedded_filename:
-        return None
+    # Check passphrase
+    system.AssertIsNonEmptyString(passphrase, "passphrase")
 
-    # Create temporary directory
-    tmp_dir_success, tmp_dir_result = system.CreateTemporaryDirectory(
-        verbose = verbose,
-        pretend_run = pretend_run)
-    if not tmp_dir_success:
+    # Get tool
+    gpg_tool = None
+    if programs.IsToolInstalled("Gpg"):
+        gpg_tool = programs.GetToolProgram("Gpg")
+    if not gpg_tool:
+        system.LogError("Gpg was not found")
         return None
 
-    # Get temporary file
-    tmp_file = system.JoinPaths(tmp_dir_result, embedded_filename)
+    # Get streaming decrypt command
+    decrypt_cmd = [
+        gpg_tool,
+        "--passphrase", passphrase,
+        "--status-fd", "2",
+        "--quiet",
+        "--batch",
+        "--decrypt"
+    ]
 
-    # Decrypt file
-    success = DecryptFile(
-        src = src,
-        passphrase = passphrase,
-        output_file = tmp_file,
+    # Create hashers
+    plain_hashers = [hashing.CreateHasher(algorithm) for algorithm in algorithms]
+    encrypted_hashers = [hashing.CreateHasher(algorithm) for algorithm in encrypted_algorithms]
+    stream_info = {
+        "filename": None,
+        "size": 0,
+        "size_enc": 0
+    }
+
+    # Read ciphertext once, hashing it on its way to gpg
+    def read_encrypted():
+        with open(src, "rb", buffering = 0) as file:
+            for chunk in hashing.ReadFileChunks(file, chunksize = chunksize):
+                for hasher in encrypted_hashers:
+                    hasher.update(chunk)
+                stream_info["size_enc"] += len(chunk)
+                yield chunk
+
+    # Hash plaintext as gpg produces it
+    def read_plain(chunk):
+        for hasher in plain_hashers:
+            hasher.update(chunk)
+        stream_info["size"] += len(chunk)
+
+    # Capture embedded name from status lines
+    def read_status(line):
+        embedded_name = ParseEmbeddedFilenameStatus(line)
+        if embedded_name:
+            stream_info["filename"] = embedded_name
+
+    # Run streaming decrypt command
+    code = command.RunPipedCommand(
+        cmd = decrypt_cmd,
+        input_chunks = read_encrypted(),
+        output_func = read_plain,
+        error_func = read_status,
+        chunksize = chunksize,
+        options = command.CommandOptions(
+            blocking_processes = [gpg_tool]),
         verbose = verbose,
         pretend_run = pretend_run,
         exit_on_failure = exit_on_failure)
-    if not success:
-        system.RemoveDirectory(
-            dir = tmp_dir_result,
-            verbose = verbose,
-            pretend_run = pretend_run,
-            exit_on_failure = exit_on_failure)
+    if pretend_run:
+        return None
+    if code != 0 or not stream_info["filename"]:
+        system.LogError("Unable to decrypt file '%s'" % src)
         return None
 
     # Get file info
     file_info = {}
-    file_info["filename"] = embedded_filename
-    if callable(hasher):
-        file_info["hash"] = hasher(
-            src = tmp_file,
-            chunksize = chunksize,
-            verbose = verbose,
-            pretend_run = pretend_run,
-            exit_on_failure = exit_on_failure)
-    file_info["size"] = os.path.getsize(tmp_file)
+    file_info["filename"] = stream_info["filename"]
+    file_info["digests"] = {algorithm: hasher.hexdigest() for algorithm, hasher in zip(algorithms, plain_hashers)}
+    file_info["digests_enc"] = {algorithm: hasher.hexdigest() for algorithm, hasher in zip(encrypted_algorithms, encrypted_hashers)}
+    if len(algorithms) > 0:
+        file_info["hash"] = file_info["digests"][algorithms[0]]
+    if len(encrypted_algorithms) > 0:
+        file_info["hash_enc"] = file_info["digests_enc"][encrypted_algorithms[0]]
+    file_info["size"] = stream_info["size"]
+    file_info["size_enc"] = stream_info["size_enc"]
     file_info["mtime"] = int(os.path.getmtime(src))
-
-    # Clean up
-    system.RemoveDirectory(
-        dir = tmp_dir_result,
-        verbose = verbose,
-        pretend_run = pretend_run,
-        exit_on_failure = exit_on_failure)
-
-    # Return file info
     return file_info
 
 # Get real file path
@@ -281,14 +329,18 @@ def DecryptFile(
     if not system.IsPathValid(src):
         return False
 
-    # Check output file
+    # Decrypt next to the source, learning the output name from the same gpg call
     if not output_file:
-        output_file = GetRealFilePath(
+        output_file = DecryptFileToDirectory(
             src = src,
             passphrase = passphrase,
+            delete_original = delete_original,
             verbose = verbose,
             pretend_run = pretend_run,
             exit_on_failure = exit_on_failure)
+        return output_file is not None
+
+    # Check output file
     if not system.IsPathValid(output_file):
         return False
     if system.DoesPathExist(output_file):
@@ -348,53 +400,257 @@ def DecryptFile(
     # Check result
     return os.path.exists(output_file)
 
-# Encrypt files
-def EncryptFiles(
+# Decrypt file to directory
+def DecryptFileToDirectory(
     src,
     passphrase,
+    output_dir = None,
     delete_original = False,
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
-    output_files = []
-    for file in system.BuildFileList(src):
-        output_file = GenerateEncryptedPath(file)
-        success = EncryptFile(
-            src = file,
-            output_file = output_file,
-            passphrase = passphrase,
-            delete_original = delete_original,
+
+    # Check passphrase
+    system.AssertIsNonEmptyString(passphrase, "passphrase")
+
+    # Check source file
+    if not system.IsPathValid(src):
+        return None
+    if not output_dir:
+        output_dir = system.GetFilenameDirectory(src)
+
+    # Already decrypted
+    if not IsFileEncrypted(src):
+        output_file = system.JoinPaths(output_dir, system.GetFilenameFile(src))
+        if output_file == src:
+            return src
+        success = system.SmartCopy(
+            src = src,
+            dest = output_file,
+            skip_existing = True,
             verbose = verbose,
             pretend_run = pretend_run,
             exit_on_failure = exit_on_failure)
-        if success:
-            output_files.append(output_file)
-    return output_files
+        return output_file if success else None
 
-# Decrypt files
-def DecryptFiles(
+    # Get tool
+    gpg_tool = None
+    if programs.IsToolInstalled("Gpg"):
+        gpg_tool = programs.GetToolProgram("Gpg")
+    if not gpg_tool:
+        system.LogError("Gpg was not found")
+        return None
+
+    # Get decrypt command
+    decrypt_cmd = [
+        gpg_tool,
+        "--passphrase", passphrase,
+        "--status-fd", "2",
+        "--compress-algo", "none",
+        "--quiet",
+        "--batch",
+        "--decrypt",
+        src
+    ]
+    if pretend_run:
+        if verbose:
+            command.PrintCommand(decrypt_cmd)
+        return None
+
+    # Capture embedded name from status lines
+    stream_info = {"filename": None, "existing": False}
+    def read_status(line):
+        embedded_name = ParseEmbeddedFilenameStatus(line)
+        if embedded_name:
+            stream_info["filename"] = embedded_name
+            stream_info["existing"] = os.path.exists(system.JoinPaths(output_dir, embedded_name))
+
+    # Decrypt into a partial file, stopping once the output is known to exist
+    partial_file = system.JoinPaths(output_dir, "." + system.GetFilenameFile(src) + ".partial")
+    code = 1
+    try:
+        with open(partial_file, "wb") as file:
+            def write_output(chunk):
+                if stream_info["existing"]:
+                    return False
+                file.write(chunk)
+            code = command.RunPipedCommand(
+                cmd = decrypt_cmd,
+                output_func = write_output,
+                error_func = read_status,
+                options = command.CommandOptions(
+                    blocking_processes = [gpg_tool]),
+                verbose = verbose,
+                exit_on_failure = exit_on_failure)
+    except OSError as e:
+        system.LogError(e)
+    if stream_info["existing"]:
+        code = 0
+    if code != 0 or not stream_info["filename"]:
+        if os.path.exists(partial_file):
+            os.remove(partial_file)
+        system.LogError("Unable to decrypt file '%s'" % src, quit_program = exit_on_failure)
+        return None
+
+    # Move into place
+    output_file = system.JoinPaths(output_dir, stream_info["filename"])
+    if os.path.exists(output_file):
+        os.remove(partial_file)
+    else:
+        os.replace(partial_file, output_file)
+
+    # Delete original
+    if delete_original and os.path.exists(output_file):
+        system.RemoveFile(
+            file = src,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+    return output_file
+
+# Get default cryption jobs
+def GetDefaultCryptionJobs():
+    return max(1, min(os.cpu_count() or 1, config.cryption_max_jobs))
+
+# Run cryption jobs
+def RunCryptionJobs(
+    files,
+    job_func,
+    jobs = None,
+    description = "Processed",
+    verbose = False):
+    import concurrent.futures
+
+    # Get job count
+    if not isinstance(jobs, int) or jobs < 1:
+        jobs = GetDefaultCryptionJobs()
+
+    # Aggregate progress
+    file_sizes = [os.path.getsize(file) if os.path.isfile(file) else 0 for file in files]
+    progress = {"files": 0, "bytes": 0}
+    progress_lock = threading.Lock()
+    total_bytes = sum(file_sizes)
+
+    # Run a single job
+    def run_job(index):
+        start_time = time.perf_counter()
+        output_file = None
+        error = None
+        try:
+            output_file = job_func(files[index])
+        except Exception as e:
+            error = str(e)
+        result = {
+            "src": files[index],
+            "dest": output_file,
+            "success": output_file is not None,
+            "size": file_sizes[index],
+            "seconds": time.perf_counter() - start_time,
+            "error": error
+        }
+        with progress_lock:
+            progress["files"] += 1
+            progress["bytes"] += file_sizes[index]
+            if verbose:
+                system.LogInfo("%s %d/%d files (%.1f/%.1f MB)" % (
+                    description,
+                    progress["files"],
+                    len(files),
+                    progress["bytes"] / config.bytes_per_megabyte,
+                    total_bytes / config.bytes_per_megabyte))
+        return result
+
+    # Run jobs, keeping results in input order
+    if jobs == 1 or len(files) <= 1:
+        return [run_job(index) for index in range(len(files))]
+    with concurrent.futures.ThreadPoolExecutor(max_workers = jobs) as executor:
+        return list(executor.map(run_job, range(len(files))))
+
+# Encrypt files with per-file results
+def EncryptFilesWithResults(
     src,
     passphrase,
     delete_original = False,
+    jobs = None,
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
-    output_files = []
-    for file in system.BuildFileList(src):
-        output_file = GetRealFilePath(
+    def encrypt_job(file):
+        output_file = GenerateEncryptedPath(file)
+        success = EncryptFile(
             src = file,
+            output_file = output_file,
             passphrase = passphrase,
+            delete_original = delete_original,
             verbose = verbose,
             pretend_run = pretend_run,
             exit_on_failure = exit_on_failure)
-        success = DecryptFile(
+        return output_file if success else None
+    return RunCryptionJobs(
+        files = system.BuildFileList(src),
+        job_func = encrypt_job,
+        jobs = jobs,
+        description = "Encrypted",
+        verbose = verbose)
+
+# Decrypt files with per-file results
+def DecryptFilesWithResults(
+    src,
+    passphrase,
+    delete_original = False,
+    jobs = None,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+    def decrypt_job(file):
+        return DecryptFileToDirectory(
             src = file,
-            output_file = output_file,
             passphrase = passphrase,
             delete_original = delete_original,
             verbose = verbose,
             pretend_run = pretend_run,
             exit_on_failure = exit_on_failure)
-        if success:
-            output_files.append(output_file)
-    return output_files
+    return RunCryptionJobs(
+        files = system.BuildFileList(src),
+        job_func = decrypt_job,
+        jobs = jobs,
+        description = "Decrypted",
+        verbose = verbose)
+
+# Encrypt files
+def EncryptFiles(
+    src,
+    passphrase,
+    delete_original = False,
+    jobs = None,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+    results = EncryptFilesWithResults(
+        src = src,
+        passphrase = passphrase,
+        delete_original = delete_original,
+        jobs = jobs,
+        verbose = verbose,
+        pretend_run = pretend_run,
+        exit_on_failure = exit_on_failure)
+    return [result["dest"] for result in results if result["success"]]
+
+# Decrypt files
+def DecryptFiles(
+    src,
+    passphrase,
+    delete_original = False,
+    jobs = None,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+    results = DecryptFilesWithResults(
+        src = src,
+        passphrase = passphrase,
+        delete_original = delete_original,
+        jobs = jobs,
+        verbose = verbose,
+        pretend_run = pretend_run,
+        exit_on_failure = exit_on_failure)
+    return [result["dest"] for result in results if result["success"]]
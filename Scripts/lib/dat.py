@@ -124,7 +124,13 @@ class Dat:
             if verbose:
                 system.LogInfo("Examining '%s'" % file)
             file_dir = system.GetFilenameDirectory(file)
-            file_md5 = hashing.CalculateFileMD5(file, verbose = verbose, pretend_run = pretend_run, exit_on_failure = exit_on_failure)
+            file_digests = hashing.CalculateFileDigests(
+                src = file,
+                algorithms = [config.HashType.MD5],
+                verbose = verbose,
+                pretend_run = pretend_run,
+                exit_on_failure = exit_on_failure)
+            file_md5 = file_digests[config.HashType.MD5]
             if self.is_md5_present(file_md5):
                 game_entry = self.get_by_md5(file_md5)
                 file_path_new = system.JoinPaths(file_dir, game_entry[config.dat_key_file])
@@ -1,108 +1,118 @@
 # Imports
-from .a7800 import A7800
-from .ares import Ares
-from .atari800 import Atari800
-from .basiliskii import BasiliskII
-from .bgb import BGB
-from .bigpemu import BigPEmu
-from .blastem import BlastEm
-from .bsnes import BSnes
-from .cemu import Cemu
-from .citra import Citra
-from .computer import Computer
-from .computer import GetDosLaunchCommand as GetComputerDosLaunchCommand
-from .computer import ResolveJsonPath as ResolveComputerJsonPath
-from .computer import ResolveJsonPaths as ResolveComputerJsonPaths
-from .computer import BuildDiscTokenMap as BuildComputerDiscTokenMap
-from .cxbxreloaded import CxBxReloaded
-from .demul import Demul
-from .dolphin import Dolphin
-from .duckstation import DuckStation
-from .eka2l1 import EKA2L1
-from .flycast import Flycast
-from .fsuae import FSUAE
-from .kegafusion import KegaFusion
-from .mame import Mame
-from .mednafen import Mednafen
-from .melonds import MelonDS
-from .mesen import Mesen
-from .mgba import MGBA
-from .nestopia import Nestopia
-from .pcem import PCEm
-from .pcsx2 import PCSX2
-from .phoenix import Phoenix
-from .ppsspp import PPSSPP
-from .retroarch import RetroArch
-from .rpcs3 import RPCS3
-# from .ryujinx import Ryujinx
-from .sameboy import SameBoy
-from .sheepshaver import SheepShaver
-from .snes9x import Snes9x
-from .stella import Stella
-from .vicec64 import ViceC64
-from .vita3k import Vita3K
-from .winuae import WinUAE
-from .xemu import Xemu
-from .xenia import Xenia
-from .yuzu import Yuzu
+import importlib
+import threading
+
+# Emulator plugins (name: module, class, program names)
+emulator_plugins = {
+    "A7800": (".a7800", "A7800", ["A7800"]),
+    "Ares": (".ares", "Ares", ["Ares"]),
+    "Atari800": (".atari800", "Atari800", ["Atari800"]),
+    "BasiliskII": (".basiliskii", "BasiliskII", ["BasiliskII"]),
+    "BGB": (".bgb", "BGB", ["BGB"]),
+    "BigPEmu": (".bigpemu", "BigPEmu", ["BigPEmu"]),
+    "BlastEm": (".blastem", "BlastEm", ["BlastEm"]),
+    "BSnes": (".bsnes", "BSnes", ["BSnes"]),
+    "Cemu": (".cemu", "Cemu", ["Cemu"]),
+    "Citra": (".citra", "Citra", ["Citra"]),
+    "Computer": (".computer", "Computer", ["DosBoxX", "ScummVM"]),
+    "CxBxReloaded": (".cxbxreloaded", "CxBxReloaded", ["CxBxReloaded"]),
+    "Demul": (".demul", "Demul", ["Demul"]),
+    "Dolphin": (".dolphin", "Dolphin", ["Dolphin"]),
+    "DuckStation": (".duckstation", "DuckStation", ["DuckStation"]),
+    "EKA2L1": (".eka2l1", "EKA2L1", ["EKA2L1"]),
+    "Flycast": (".flycast", "Flycast", ["Flycast"]),
+    "FS-UAE": (".fsuae", "FSUAE", ["FS-UAE"]),
+    "KegaFusion": (".kegafusion", "KegaFusion", ["KegaFusion"]),
+    "Mame": (".mame", "Mame", ["Mame"]),
+    "Mesen": (".mesen", "Mesen", ["Mesen"]),
+    "Mednafen": (".mednafen", "Mednafen", ["Mednafen"]),
+    "melonDS": (".melonds", "MelonDS", ["melonDS"]),
+    "mGBA": (".mgba", "MGBA", ["mGBA"]),
+    "Nestopia": (".nestopia", "Nestopia", ["Nestopia"]),
+    "PCEm": (".pcem", "PCEm", ["PCEm"]),
+    "PCSX2": (".pcsx2", "PCSX2", ["PCSX2"]),
+    "Phoenix": (".phoenix", "Phoenix", ["Phoenix"]),
+    "PPSSPP": (".ppsspp", "PPSSPP", ["PPSSPP"]),
+    "RetroArch": (".retroarch", "RetroArch", ["RetroArch"]),
+    "RPCS3": (".rpcs3", "RPCS3", ["RPCS3"]),
+    # "Ryujinx": (".ryujinx", "Ryujinx", ["Ryujinx"]),
+    "SameBoy": (".sameboy", "SameBoy", ["SameBoy"]),
+    "SheepShaver": (".sheepshaver", "SheepShaver", ["SheepShaver"]),
+    "Snes9x": (".snes9x", "Snes9x", ["Snes9x"]),
+    "Stella": (".stella", "Stella", ["Stella"]),
+    "VICE-C64": (".vicec64", "ViceC64", ["VICE-C64"]),
+    "Vita3K": (".vita3k", "Vita3K", ["Vita3K"]),
+    "WinUAE": (".winuae", "WinUAE", ["WinUAE"]),
+    "Xemu": (".xemu", "Xemu", ["Xemu"]),
+    "Xenia": (".xenia", "Xenia", ["Xenia"]),
+    "Yuzu": (".yuzu", "Yuzu", ["Yuzu"])
+}
+
+# Lazily exported helpers (attribute: module, function)
+emulator_exports = {
+    "GetComputerDosLaunchCommand": (".computer", "GetDosLaunchCommand"),
+    "ResolveComputerJsonPath": (".computer", "ResolveJsonPath"),
+    "ResolveComputerJsonPaths": (".computer", "ResolveJsonPaths"),
+    "BuildComputerDiscTokenMap": (".computer", "BuildDiscTokenMap")
+}
+
+# Loaded emulator instances
+emulator_instances = {}
+emulator_instances_lock = threading.Lock()
+
+# Program name to emulator name
+emulator_program_names = {
+    program_name: emulator_name
+    for emulator_name, (module_name, class_name, program_names) in emulator_plugins.items()
+    for program_name in program_names
+}
+
+# Load attribute from a plugin module
+def LoadAttribute(module_name, attribute_name):
+    return getattr(importlib.import_module(module_name, __name__), attribute_name)
+
+# Resolve emulator classes and helpers on first access
+def __getattr__(attribute_name):
+    if attribute_name in emulator_exports:
+        return LoadAttribute(*emulator_exports[attribute_name])
+    for module_name, class_name, program_names in emulator_plugins.values():
+        if class_name == attribute_name:
+            return LoadAttribute(module_name, class_name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, attribute_name))
+
+# Get emulator names
+def GetEmulatorNames():
+    return list(emulator_plugins.keys())
+
+# Get emulator program names
+def GetEmulatorProgramNames():
+    return list(emulator_program_names.keys())
+
+# Get emulator name for program
+def GetEmulatorNameForProgram(program_name):
+    return emulator_program_names.get(program_name)
+
+# Get emulator by name
+def GetEmulatorByName(emulator_name):
+    if emulator_name not in emulator_plugins:
+        return None
+    with emulator_instances_lock:
+        if emulator_name not in emulator_instances:
+            module_name, class_name, program_names = emulator_plugins[emulator_name]
+            emulator_instances[emulator_name] = LoadAttribute(module_name, class_name)()
+        return emulator_instances[emulator_name]
+
+# Get emulator by program name
+def GetEmulatorByProgramName(program_name):
+    return GetEmulatorByName(GetEmulatorNameForProgram(program_name))
 
 # Get emulator map
 def GetEmulatorMap():
     instances = {}
-    def AddInstance(class_name):
-        instance = class_name()
-        instances[instance.GetName()] = instance
-    AddInstance(A7800)
-    AddInstance(Ares)
-    AddInstance(Atari800)
-    AddInstance(BasiliskII)
-    AddInstance(BGB)
-    AddInstance(BigPEmu)
-    AddInstance(BlastEm)
-    AddInstance(BSnes)
-    AddInstance(Cemu)
-    AddInstance(Citra)
-    AddInstance(Computer)
-    AddInstance(CxBxReloaded)
-    AddInstance(Demul)
-    AddInstance(Dolphin)
-    AddInstance(DuckStation)
-    AddInstance(EKA2L1)
-    AddInstance(Flycast)
-    AddInstance(FSUAE)
-    AddInstance(KegaFusion)
-    AddInstance(Mame)
-    AddInstance(Mesen)
-    AddInstance(Mednafen)
-    AddInstance(MelonDS)
-    AddInstance(MGBA)
-    AddInstance(Nestopia)
-    AddInstance(PCEm)
-    AddInstance(PCSX2)
-    AddInstance(Phoenix)
-    AddInstance(PPSSPP)
-    AddInstance(RetroArch)
-    AddInstance(RPCS3)
-    # AddInstance(Ryujinx)
-    AddInstance(SameBoy)
-    AddInstance(SheepShaver)
-    AddInstance(Snes9x)
-    AddInstance(Stella)
-    AddInstance(ViceC64)
-    AddInstance(Vita3K)
-    AddInstance(WinUAE)
-    AddInstance(Xemu)
-    AddInstance(Xenia)
-    AddInstance(Yuzu)
+    for emulator_name in emulator_plugins.keys():
+        instances[emulator_name] = GetEmulatorByName(emulator_name)
     return instances
 
 # Get emulator list
 def GetEmulatorList():
     return GetEmulatorMap().values()
-
-# Get emulator by name
-def GetEmulatorByName(tool_name):
-    for instance in GetEmulatorList():
-        if instance.GetName() == tool_name:
-            return instance
-    return None
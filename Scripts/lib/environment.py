@@ -4,6 +4,7 @@ import sys
 import signal
 import ntpath
 import time
+import threading
 
 # Local imports
 import config
@@ -183,17 +184,152 @@ def InterruptActiveNamedProcesses(process_names = []):
     except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess) as e:
         system.LogError(e)
 
+# Lower priority of current process so it yields CPU and disk to foreground work
+def SetBackgroundProcessPriority():
+    import psutil
+    try:
+        proc = psutil.Process()
+        if IsWindowsPlatform():
+            proc.nice(psutil.IDLE_PRIORITY_CLASS)
+            proc.ionice(psutil.IOPRIO_VERYLOW)
+        else:
+            proc.nice(config.background_process_nice)
+            if hasattr(psutil, "IOPRIO_CLASS_IDLE"):
+                proc.ionice(psutil.IOPRIO_CLASS_IDLE)
+        return True
+    except (psutil.AccessDenied, AttributeError, OSError) as e:
+        system.LogWarning("Unable to lower process priority (%s)" % e)
+        return False
+
+# Process tracker
+class ProcessTracker:
+
+    # Constructor
+    def __init__(self, pid, min_interval = 0.005, max_interval = 0.25):
+        self.pid = pid
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.processes = {}
+        self.process_names = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    # Collect current descendants of the root process
+    def collect(self):
+        import psutil
+        try:
+            descendants = psutil.Process(self.pid).children(recursive = True)
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return False
+        with self.lock:
+            for proc in descendants:
+                if proc.pid in self.processes:
+                    continue
+                self.processes[proc.pid] = proc
+                try:
+                    self.process_names[proc.pid] = proc.name()
+                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                    pass
+        return True
+
+    # Collect descendants with backoff until the root process exits
+    def run(self):
+        interval = self.min_interval
+        while not self.stop_event.is_set():
+            if not self.collect():
+                break
+            self.stop_event.wait(interval)
+            interval = min(interval * 2, self.max_interval)
+
+    # Start tracking
+    def start(self):
+        self.collect()
+        self.thread = threading.Thread(target = self.run, daemon = True)
+        self.thread.start()
+
+    # Stop tracking
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    # Get tracked processes
+    def get_processes(self):
+        with self.lock:
+            return list(self.processes.values())
+
+    # Get tracked process names
+    def get_process_names(self):
+        with self.lock:
+            return list(self.process_names.values())
+
+# Wait for processes using pidfds (returns processes that could not be watched)
+def WaitForProcessPidfds(processes = [], timeout = None):
+    import select
+    import psutil
+    pidfds = {}
+    unwatched = []
+    for proc in processes:
+        try:
+            pidfd = os.pidfd_open(proc.pid)
+        except ProcessLookupError:
+            continue
+        except OSError:
+            unwatched.append(proc)
+            continue
+        try:
+            is_same_process = proc.is_running()
+        except psutil.Error:
+            is_same_process = False
+        if is_same_process:
+            pidfds[pidfd] = proc
+        else:
+            os.close(pidfd)
+    poller = select.poll()
+    for pidfd in pidfds.keys():
+        poller.register(pidfd, select.POLLIN)
+    deadline = None
+    if timeout is not None:
+        deadline = time.monotonic() + timeout
+    while len(pidfds) > 0:
+        poll_timeout = None
+        if deadline is not None:
+            poll_timeout = max(int((deadline - time.monotonic()) * 1000), 0)
+        events = poller.poll(poll_timeout)
+        if len(events) == 0:
+            break
+        for pidfd, event in events:
+            poller.unregister(pidfd)
+            os.close(pidfd)
+            pidfds.pop(pidfd, None)
+    for pidfd in pidfds.keys():
+        os.close(pidfd)
+    return unwatched + list(pidfds.values())
+
 # Wait for processes
-def WaitForNamedProcesses(process_names = []):
+def WaitForProcesses(processes = [], timeout = None):
     import psutil
     try:
-        for proc in FindActiveNamedProcesses(process_names):
-            while True:
-                if not proc.is_running():
-                    break
-                system.SleepProgram(1)
+        if hasattr(os, "pidfd_open"):
+            start_time = time.monotonic()
+            processes = WaitForProcessPidfds(processes, timeout = timeout)
+            if timeout is not None:
+                timeout = max(timeout - (time.monotonic() - start_time), 0)
+        gone, alive = psutil.wait_procs(processes, timeout = timeout)
+        return alive
     except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess) as e:
         system.LogError(e)
+        return []
+
+# Wait for named processes
+def WaitForNamedProcesses(process_names = [], ignore_pids = [], timeout = None):
+    named_processes = []
+    for proc in FindActiveNamedProcesses(process_names):
+        if proc.pid not in ignore_pids and proc.pid != os.getpid():
+            named_processes.append(proc)
+    return WaitForProcesses(named_processes, timeout = timeout)
 
 ###########################################################
 # Tools
@@ -550,6 +686,26 @@ def GetScriptsExecutableExtension():
 def GetCacheRootDir():
     return ini.GetIniPathValue("UserData.Dirs", "cache_dir")
 
+# Get cache hashes file
+def GetCacheHashesFile():
+    return system.JoinPaths(GetCacheRootDir(), config.hash_cache_filename)
+
+# Get cache store index file
+def GetCacheStoreIndexFile():
+    return system.JoinPaths(GetCacheRootDir(), config.store_index_filename)
+
+# Get cache launcher index file
+def GetCacheLauncherIndexFile():
+    return system.JoinPaths(GetCacheRootDir(), config.launcher_index_filename)
+
+# Get cache http dir
+def GetCacheHttpDir():
+    return system.JoinPaths(GetCacheRootDir(), config.http_cache_dirname)
+
+# Get cache state file
+def GetCacheStateFile():
+    return system.JoinPaths(GetCacheRootDir(), config.cache_state_filename)
+
 # Get cache gaming root dir
 def GetCacheGamingRootDir():
     return system.JoinPaths(
@@ -0,0 +1,148 @@
+# Imports
+import threading
+import subprocess
+
+# Local imports
+import config
+import system
+import programs
+
+# Process-wide exiftool session
+exif_session = None
+exif_session_lock = threading.Lock()
+
+###########################################################
+
+# Persistent exiftool process fed through -stay_open
+class ExifToolSession:
+
+    # Constructor
+    def __init__(self, exif_tool):
+
+        # Save params
+        self.exif_tool = exif_tool
+
+        # Process state
+        self.process = None
+        self.lock = threading.Lock()
+        self.num_commands = 0
+
+    # Check if process is running
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None
+
+    # Start process
+    def open(self):
+        if self.is_running():
+            return
+        self.process = subprocess.Popen(
+            [self.exif_tool, "-stay_open", "True", "-@", "-"],
+            stdin = subprocess.PIPE,
+            stdout = subprocess.PIPE,
+            stderr = subprocess.STDOUT,
+            text = True,
+            encoding = "utf-8",
+            errors = "replace")
+
+    # Stop process
+    def close(self):
+        with self.lock:
+            if not self.process:
+                return
+            try:
+                if self.process.poll() is None:
+                    self.process.stdin.write("-stay_open\nFalse\n")
+                    self.process.stdin.flush()
+                    self.process.wait(timeout = config.exiftool_session_timeout)
+            except Exception:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+
+    # Run one command and return its output
+    def execute(self, args):
+        for arg in args:
+            if "\n" in arg:
+                raise ValueError("ExifTool argument contains a newline: %s" % arg)
+        with self.lock:
+            self.open()
+            self.num_commands += 1
+            ready_marker = "{ready%d}" % self.num_commands
+            for arg in args:
+                self.process.stdin.write(arg + "\n")
+            self.process.stdin.write("-execute%d\n" % self.num_commands)
+            self.process.stdin.flush()
+            output_lines = []
+            while True:
+                line = self.process.stdout.readline()
+                if not line:
+                    self.process = None
+                    raise RuntimeError("ExifTool exited unexpectedly")
+                if line.rstrip() == ready_marker:
+                    break
+                output_lines.append(line.rstrip("\n"))
+            return output_lines
+
+###########################################################
+
+# Check exiftool output for failures
+def DidExifToolSucceed(output_lines):
+    for line in output_lines:
+        if line.startswith("Error") or "weren't updated due to errors" in line:
+            return False
+    return True
+
+# Get exiftool session
+def GetExifToolSession():
+    global exif_session
+    with exif_session_lock:
+        if exif_session is None:
+            exif_tool = None
+            if programs.IsToolInstalled("ExifTool"):
+                exif_tool = programs.GetToolProgram("ExifTool")
+            if not exif_tool:
+                return None
+            session = ExifToolSession(exif_tool)
+            import atexit
+            atexit.register(session.close)
+            exif_session = session
+        return exif_session
+
+# Close exiftool session
+def CloseExifToolSession():
+    with exif_session_lock:
+        if exif_session:
+            exif_session.close()
+
+# Run exiftool command through the shared session
+def RunExifToolCommand(
+    args,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+
+    # Get session
+    session = GetExifToolSession()
+    if not session:
+        system.LogError("ExifTool was not found", quit_program = exit_on_failure)
+        return False
+
+    # Run command
+    if verbose:
+        system.LogInfo("Running exiftool %s" % " ".join(args[:config.exiftool_log_args] + (["..."] if len(args) > config.exiftool_log_args else [])))
+    if pretend_run:
+        return True
+    try:
+        output_lines = session.execute(args)
+    except Exception as e:
+        system.LogError("ExifTool command failed (%s)" % e, quit_program = exit_on_failure)
+        return False
+    if verbose:
+        for line in output_lines:
+            system.LogInfo(line)
+    success = DidExifToolSucceed(output_lines)
+    if not success:
+        system.LogError("\n".join(output_lines), quit_program = exit_on_failure)
+    return success
+
+###########################################################
@@ -13,6 +13,9 @@ import metadataentry
 import platforms
 import jsondata
 
+# Categories derived for each platform
+derived_platform_categories = {}
+
 ###########################################################
 
 # General gameinfo class
@@ -83,9 +86,13 @@ class GameInfo:
         self.metadata_file = environment.GetMetadataFile(self.game_category, self.game_subcategory)
 
         # Get metadata
-        metadata_obj = metadata.Metadata()
-        metadata_obj.import_from_metadata_file(self.metadata_file)
-        metadata_entry = metadata_obj.get_game(self.game_platform, self.game_name)
+        metadata_entry = metadata.GetIndexedMetadataEntry(
+            metadata_file = self.metadata_file,
+            game_platform = self.game_platform,
+            game_name = self.game_name,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
 
         # Set metadata
         self.set_metadata(metadata_entry)
@@ -737,6 +744,8 @@ def DeriveGameAssetPathFromName(game_name, asset_type):
 def DeriveGameCategoriesFromPlatform(game_platform):
     if not game_platform:
         return (None, None, None)
+    if game_platform in derived_platform_categories:
+        return derived_platform_categories[game_platform]
     derived_supercategory = config.Supercategory.ROMS
     derived_category = None
     derived_subcategory = None
@@ -746,7 +755,8 @@ def DeriveGameCategoriesFromPlatform(game_platform):
     for game_subcategory in config.Subcategory.members():
         if game_platform.name.startswith(game_subcategory.name):
             derived_subcategory = game_subcategory
-    return (derived_supercategory, derived_category, derived_subcategory)
+    derived_platform_categories[game_platform] = (derived_supercategory, derived_category, derived_subcategory)
+    return derived_platform_categories[game_platform]
 
 # Derive game platform from categories
 def DeriveGamePlatformFromCategories(game_category, game_subcategory):
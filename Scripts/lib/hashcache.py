@@ -0,0 +1,217 @@
+# Imports
+import os, os.path
+import sys
+import stat
+import time
+import threading
+
+# Local imports
+import config
+import environment
+import system
+
+# Process-wide hash cache
+hash_cache = None
+hash_cache_lock = threading.Lock()
+
+###########################################################
+
+# Get file key
+def GetFileKey(src):
+    try:
+        file_stat = os.stat(src)
+    except OSError:
+        return None
+    if not stat.S_ISREG(file_stat.st_mode) or file_stat.st_ino == 0:
+        return None
+    return (file_stat.st_dev, file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns)
+
+# Hash cache
+class HashCache:
+
+    # Constructor
+    def __init__(self,
+        cache_file,
+        max_entries = config.hash_cache_max_entries,
+        prune_interval = config.hash_cache_prune_interval):
+
+        # Save params
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.prune_interval = prune_interval
+        self.connection = None
+        self.lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    # Open the cache
+    def open(self):
+        import sqlite3
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok = True)
+        self.connection = sqlite3.connect(self.cache_file, timeout = 30, check_same_thread = False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                dev INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                algorithm TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                last_access INTEGER NOT NULL,
+                PRIMARY KEY (dev, inode, size, mtime_ns, algorithm)
+            )""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS hashes_last_access ON hashes (last_access)")
+        self.connection.commit()
+
+    # Close the cache
+    def close(self):
+        with self.lock:
+            if not self.connection:
+                return
+            try:
+                self.prune_locked()
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
+
+    # Get cached digests for a file key
+    def get_digests(self, file_key, algorithms):
+        digests = {}
+        with self.lock:
+            if not self.connection or not file_key:
+                return digests
+            try:
+                rows = self.connection.execute(
+                    "SELECT algorithm, digest FROM hashes WHERE dev = ? AND inode = ? AND size = ? AND mtime_ns = ?",
+                    file_key).fetchall()
+                requested = {str(algorithm): algorithm for algorithm in algorithms}
+                for row_algorithm, row_digest in rows:
+                    if row_algorithm in requested:
+                        digests[requested[row_algorithm]] = row_digest
+                if len(digests) == len(requested):
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                if digests:
+                    self.connection.execute(
+                        "UPDATE hashes SET last_access = ? WHERE dev = ? AND inode = ? AND size = ? AND mtime_ns = ?",
+                        (int(time.time()),) + tuple(file_key))
+                    self.connection.commit()
+            except Exception:
+                self.misses += 1
+        return digests
+
+    # Set cached digests for a file key
+    def set_digests(self, file_key, digests):
+        with self.lock:
+            if not self.connection or not file_key:
+                return False
+            try:
+                now = int(time.time())
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [tuple(file_key) + (str(algorithm), digest, now) for algorithm, digest in digests.items() if digest])
+                self.connection.commit()
+                self.writes += 1
+                if self.prune_interval and self.writes % self.prune_interval == 0:
+                    self.prune_locked()
+                return True
+            except Exception:
+                return False
+
+    # Invalidate all cached digests for a path
+    def invalidate(self, src):
+        with self.lock:
+            if not self.connection:
+                return False
+            try:
+                file_stat = os.stat(src)
+                self.connection.execute(
+                    "DELETE FROM hashes WHERE dev = ? AND inode = ?",
+                    (file_stat.st_dev, file_stat.st_ino))
+                self.connection.commit()
+                return True
+            except Exception:
+                return False
+
+    # Clear the cache
+    def clear(self):
+        with self.lock:
+            if not self.connection:
+                return False
+            self.connection.execute("DELETE FROM hashes")
+            self.connection.commit()
+            return True
+
+    # Evict least recently used entries beyond the size cap (lock must be held)
+    def prune_locked(self):
+        if not self.connection or not self.max_entries:
+            return
+        num_entries = self.connection.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+        num_excess = num_entries - self.max_entries
+        if num_excess > 0:
+            self.connection.execute(
+                "DELETE FROM hashes WHERE rowid IN (SELECT rowid FROM hashes ORDER BY last_access ASC LIMIT ?)",
+                (num_excess,))
+            self.connection.commit()
+            self.evictions += num_excess
+
+    # Evict least recently used entries beyond the size cap
+    def prune(self):
+        with self.lock:
+            self.prune_locked()
+
+    # Get stats
+    def get_stats(self):
+        with self.lock:
+            num_entries = 0
+            if self.connection:
+                num_entries = self.connection.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+            return {
+                "entries": num_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions
+            }
+
+###########################################################
+
+# Get hash cache
+def GetHashCache():
+    global hash_cache
+    with hash_cache_lock:
+        if hash_cache is None:
+            try:
+                cache = HashCache(environment.GetCacheHashesFile())
+                cache.open()
+                import atexit
+                atexit.register(cache.close)
+                hash_cache = cache
+            except Exception as e:
+                system.LogWarning("Hash cache is unavailable, hashing without it (%s)" % e)
+                hash_cache = False
+        return hash_cache if hash_cache else None
+
+# Get hash cache stats
+def GetHashCacheStats():
+    cache = GetHashCache()
+    if cache:
+        return cache.get_stats()
+    return {}
+
+# Invalidate hash cache entries for a path
+def InvalidateHashCache(src):
+    cache = GetHashCache()
+    if cache:
+        return cache.invalidate(src)
+    return False
+
+###########################################################
@@ -1,6 +1,7 @@
 # Imports
 import os, os.path
 import sys
+import stat
 
 # Local imports
 import config
@@ -8,6 +9,7 @@ import environment
 import system
 import archive
 import cryption
+import hashcache
 
 ###########################################################
 
@@ -42,42 +44,161 @@ def CalculateStringSHA256(string):
 # Calculate string XXH3
 def CalculateStringXXH3(string):
     import xxhash
+    if isinstance(string, str):
+        string = string.encode("utf8")
     return xxhash.xxh3_64(string).hexdigest()
 
 ###########################################################
 
-# Calculate file crc32
-def CalculateFileCRC32(
+# Crc32 hasher
+class CRC32Hasher:
+
+    # Constructor
+    def __init__(self):
+        self.checksum = 0
+
+    # Update checksum
+    def update(self, data):
+        import zlib
+        self.checksum = zlib.crc32(data, self.checksum)
+
+    # Get hex digest
+    def hexdigest(self):
+        return "%x" % self.checksum
+
+# Create hasher
+def CreateHasher(algorithm):
+    if algorithm == config.HashType.CRC32:
+        return CRC32Hasher()
+    elif algorithm == config.HashType.MD5:
+        import hashlib
+        return hashlib.md5()
+    elif algorithm == config.HashType.SHA1:
+        import hashlib
+        return hashlib.sha1()
+    elif algorithm == config.HashType.SHA256:
+        import hashlib
+        return hashlib.sha256()
+    elif algorithm == config.HashType.XXH3:
+        import xxhash
+        return xxhash.xxh3_64()
+    return None
+
+# Read file chunks
+# Chunks are views into a reused buffer or a memory map, so each one is only valid until the next is produced
+def ReadFileChunks(file, chunksize = config.hash_chunk_size, mmap_threshold = config.hash_mmap_threshold):
+
+    # Memory map large regular files
+    file_stat = os.fstat(file.fileno())
+    is_regular_file = stat.S_ISREG(file_stat.st_mode) and file_stat.st_size > 0
+    if is_regular_file and isinstance(mmap_threshold, int) and file_stat.st_size >= mmap_threshold:
+        import mmap
+        mapped = None
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            mapped = None
+        if mapped:
+            with mapped:
+                if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                with memoryview(mapped) as view:
+                    for offset in range(0, len(view), chunksize):
+                        chunk = view[offset:offset + chunksize]
+                        try:
+                            yield chunk
+                        finally:
+                            chunk.release()
+            return
+
+    # Read everything else into a reused buffer, sized down for small files
+    buffer_size = chunksize
+    if is_regular_file:
+        buffer_size = min(chunksize, file_stat.st_size)
+    buffer = bytearray(buffer_size)
+    with memoryview(buffer) as view:
+        while (read_size := file.readinto(buffer)):
+            chunk = view[:read_size]
+            try:
+                yield chunk
+            finally:
+                chunk.release()
+
+# Calculate file digests
+def CalculateFileDigests(
     src,
+    algorithms = [config.HashType.XXH3],
     chunksize = config.hash_chunk_size,
+    mmap_threshold = config.hash_mmap_threshold,
+    use_cache = True,
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
+    algorithm_names = ", ".join([algorithm.val().lower() for algorithm in algorithms])
+    digests = {algorithm: "" for algorithm in algorithms}
     try:
+        if pretend_run:
+            if verbose:
+                system.LogInfo("Calculating %s for %s" % (algorithm_names, src))
+            return digests
+
+        # Look up unchanged files in the hash cache
+        hash_cache = None
+        file_key = None
+        if use_cache:
+            hash_cache = hashcache.GetHashCache()
+            if hash_cache:
+                file_key = hashcache.GetFileKey(src)
+                digests.update(hash_cache.get_digests(file_key, algorithms))
+        missing_algorithms = [algorithm for algorithm in algorithms if not digests[algorithm]]
+        if len(missing_algorithms) == 0:
+            return digests
+
+        # Read file and calculate missing digests
         if verbose:
-            system.LogInfo("Calculating crc32 for %s" % src)
-        if not pretend_run:
-            import zlib
-            with open(src, "rb") as file:
-                read_size = 0
-                total_size = os.path.getsize(src)
-                percent_done = 0
-                checksum = 0
+            system.LogInfo("Calculating %s for %s" % (algorithm_names, src))
+        hashers = {algorithm: CreateHasher(algorithm) for algorithm in missing_algorithms}
+        with open(src, "rb", buffering = 0) as file:
+            read_size = 0
+            total_size = os.path.getsize(src)
+            percent_done = 0
+            if verbose:
+                system.LogPercentComplete(percent_done)
+            for chunk in ReadFileChunks(file, chunksize = chunksize, mmap_threshold = mmap_threshold):
+                for hasher in hashers.values():
+                    hasher.update(chunk)
                 if verbose:
+                    read_size += len(chunk)
+                    percent_done = int(round(100 * read_size / total_size))
                     system.LogPercentComplete(percent_done)
-                while (chunk := file.read(chunksize)):
-                    checksum = zlib.crc32(chunk, checksum)
-                    if verbose:
-                        read_size += len(chunk)
-                        percent_done = int(round(100 * read_size / total_size))
-                        system.LogPercentComplete(percent_done)
-                return "%x" % checksum
-        return ""
+        for algorithm, hasher in hashers.items():
+            digests[algorithm] = hasher.hexdigest()
+
+        # Store digests, unless the file changed while it was being read
+        if hash_cache and file_key and file_key == hashcache.GetFileKey(src):
+            hash_cache.set_digests(file_key, {algorithm: digests[algorithm] for algorithm in missing_algorithms})
+        return digests
     except Exception as e:
         if exit_on_failure:
-            system.LogError("Unable to calculate crc32 for %s" % src)
+            system.LogError("Unable to calculate %s for %s" % (algorithm_names, src))
             system.LogError(e, quit_program = True)
-        return ""
+        return {algorithm: "" for algorithm in algorithms}
+
+# Calculate file crc32
+def CalculateFileCRC32(
+    src,
+    chunksize = config.hash_chunk_size,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+    digests = CalculateFileDigests(
+        src = src,
+        algorithms = [config.HashType.CRC32],
+        chunksize = chunksize,
+        verbose = verbose,
+        pretend_run = pretend_run,
+        exit_on_failure = exit_on_failure)
+    return digests[config.HashType.CRC32]
 
 # Calculate file md5
 def CalculateFileMD5(
@@ -86,31 +207,14 @@ def CalculateFileMD5(
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
-    try:
-        if verbose:
-            system.LogInfo("Calculating md5 for %s" % src)
-        if not pretend_run:
-            import hashlib
-            with open(src, "rb") as file:
-                read_size = 0
-                total_size = os.path.getsize(src)
-                percent_done = 0
-                md5_hash = hashlib.md5()
-                if verbose:
-                    system.LogPercentComplete(percent_done)
-                for chunk in iter(lambda: file.read(chunksize),b""):
-                    md5_hash.update(chunk)
-                    if verbose:
-                        read_size += len(chunk)
-                        percent_done = int(round(100 * read_size / total_size))
-                        system.LogPercentComplete(percent_done)
-                return md5_hash.hexdigest()
-        return ""
-    except Exception as e:
-        if exit_on_failure:
-            system.LogError("Unable to calculate md5 for %s" % src)
-            system.LogError(e, quit_program = True)
-        return ""
+    digests = CalculateFileDigests(
+        src = src,
+        algorithms = [config.HashType.MD5],
+        chunksize = chunksize,
+        verbose = verbose,
+        pretend_run = pretend_run,
+        exit_on_failure = exit_on_failure)
+    return digests[config.HashType.MD5]
 
 # Calculate file sha1
 def CalculateFileSHA1(
@@ -119,31 +223,14 @@ def CalculateFileSHA1(
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
-    try:
-        if verbose:
-            system.LogInfo("Calculating sha1 for %s" % src)
-        if not pretend_run:
-            import hashlib
-            with open(src, "rb") as file:
-                read_size = 0
-                total_size = os.path.getsize(src)
-                percent_done = 0
-                sha1_hash = hashlib.sha1()
-                if verbose:
-                    system.LogPercentComplete(percent_done)
-                for chunk in iter(lambda: file.read(chunksize),b""):
-                    sha1_hash.update(chunk)
-                    if verbose:
-                        read_size += len(chunk)
-                        percent_done = int(round(100 * read_size / total_size))
-                        system.LogPercentComplete(percent_done)
-                return sha1_hash.hexdigest()
-        return ""
-    except Exception as e:
-        if exit_on_failure:
-            system.LogError("Unable to calculate sha1 for %s" % src)
-            system.LogError(e, quit_program = True)
-        return ""
+    digests = CalculateFileDigests(
+        src = src,
+        algorithms = [config.HashType.SHA1],
+        chunksize = chunksize,
+        verbose = verbose,
+        pretend_run = pretend_run,
+        exit_on_failure = exit_on_failure)
+    return digests[config.HashType.SHA1]
 
 # Calculate file sha256
 def CalculateFileSHA256(
@@ -152,31 +239,14 @@ def CalculateFileSHA256(
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
-    try:
-        if verbose:
-            system.LogInfo("Calculating sha256 for %s" % src)
-        if not pretend_run:
-            import hashlib
-            with open(src, "rb") as file:
-                read_size = 0
-                total_size = os.path.getsize(src)
-                percent_done = 0
-                sha256_hash = hashlib.sha256()
-                if verbose:
-                    system.LogPercentComplete(percent_done)
-                for chunk in iter(lambda: file.read(chunksize),b""):
-                    sha256_hash.update(chunk)
-                    if verbose:
-                        read_size += len(chunk)
-                        percent_done = int(round(100 * read_size / total_size))
-                        system.LogPercentComplete(percent_done)
-                return sha256_hash.hexdigest()
-        return ""
-    except Exception as e:
-        if exit_on_failure:
-            system.LogError("Unable to calculate sha256 for %s" % src)
-            system.LogError(e, quit_program = True)
-        return ""
+    digests = CalculateFileDigests(
+        src = src,
+        algorithms = [config.HashType.SHA256],
+        chunksize = chunksize,
+        verbose = verbose,
+        pretend_run = pretend_run,
+        exit_on_failure = exit_on_failure)
+    return digests[config.HashType.SHA256]
 
 # Calculate file xxh3
 def CalculateFileXXH3(
@@ -185,33 +255,159 @@ def CalculateFileXXH3(
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
+    digests = CalculateFileDigests(
+        src = src,
+        algorithms = [config.HashType.XXH3],
+        chunksize = chunksize,
+        verbose = verbose,
+        pretend_run = pretend_run,
+        exit_on_failure = exit_on_failure)
+    return digests[config.HashType.XXH3]
+
+###########################################################
+
+# Calculate file partial hash from its head and tail
+def CalculateFilePartialHash(
+    src,
+    sample_size = config.hash_partial_sample_size,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
     try:
         if verbose:
-            system.LogInfo("Calculating xxh3 for %s" % src)
+            system.LogInfo("Calculating partial hash for %s" % src)
         if not pretend_run:
             import xxhash
+            partial_hash = xxhash.xxh3_64()
             with open(src, "rb") as file:
-                read_size = 0
-                total_size = os.path.getsize(src)
-                percent_done = 0
-                xxh3_hash = xxhash.xxh3_64()
-                if verbose:
-                    system.LogPercentComplete(percent_done)
-                for chunk in iter(lambda: file.read(chunksize),b""):
-                    xxh3_hash.update(chunk)
-                    if verbose:
-                        read_size += len(chunk)
-                        percent_done = int(round(100 * read_size / total_size))
-                        system.LogPercentComplete(percent_done)
-                return xxh3_hash.hexdigest()
+                total_size = os.fstat(file.fileno()).st_size
+                partial_hash.update(file.read(sample_size))
+                if total_size > sample_size:
+                    file.seek(max(sample_size, total_size - sample_size))
+                    partial_hash.update(file.read(sample_size))
+            return partial_hash.hexdigest()
         return ""
     except Exception as e:
         if exit_on_failure:
-            system.LogError("Unable to calculate xxh3 for %s" % src)
+            system.LogError("Unable to calculate partial hash for %s" % src)
             system.LogError(e, quit_program = True)
         return ""
 
-###########################################################
+# Find duplicate file groups
+def FindDuplicateFileGroups(
+    paths,
+    include_empty = False,
+    jobs = 1,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+
+    # Group by size, skipping additional hard links to the same file
+    size_groups = {}
+    seen_inodes = set()
+    for path in sorted(paths):
+        try:
+            file_stat = os.stat(path)
+        except OSError:
+            continue
+        if not stat.S_ISREG(file_stat.st_mode):
+            continue
+        if file_stat.st_size == 0 and not include_empty:
+            continue
+        if file_stat.st_ino != 0:
+            inode_key = (file_stat.st_dev, file_stat.st_ino)
+            if inode_key in seen_inodes:
+                continue
+            seen_inodes.add(inode_key)
+        size_groups.setdefault(file_stat.st_size, []).append(path)
+
+    # Regroup files that still collide by a key function
+    def regroup(groups, key_func):
+        import concurrent.futures
+        candidates = [(group_key, group_file) for group_key, group_files in groups.items() if len(group_files) > 1 for group_file in group_files]
+        new_groups = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers = max(jobs, 1)) as executor:
+            file_keys = executor.map(lambda candidate: key_func(candidate[1]), candidates)
+            for (group_key, group_file), file_key in zip(candidates, file_keys):
+                if file_key:
+                    new_groups.setdefault((group_key, file_key), []).append(group_file)
+        return new_groups
+
+    # Narrow by partial hash, then by full hash only where the partial hash did not cover the whole file
+    partial_groups = regroup(size_groups, lambda file: CalculateFilePartialHash(
+        src = file,
+        verbose = verbose,
+        pretend_run = pretend_run,
+        exit_on_failure = exit_on_failure))
+    small_groups = {key: files for key, files in partial_groups.items() if key[0] <= 2 * config.hash_partial_sample_size}
+    large_groups = {key: files for key, files in partial_groups.items() if key[0] > 2 * config.hash_partial_sample_size}
+    full_groups = regroup(large_groups, lambda file: CalculateFileXXH3(
+        src = file,
+        verbose = verbose,
+        pretend_run = pretend_run,
+        exit_on_failure = exit_on_failure))
+
+    # Build results
+    duplicate_groups = []
+    for (file_size, file_hash), group_files in list(small_groups.items()):
+        if len(group_files) > 1:
+            duplicate_groups.append({"type": "file", "size": file_size, "hash": file_hash, "files": sorted(group_files)})
+    for ((file_size, partial_hash), file_hash), group_files in full_groups.items():
+        if len(group_files) > 1:
+            duplicate_groups.append({"type": "file", "size": file_size, "hash": file_hash, "files": sorted(group_files)})
+    return sorted(duplicate_groups, key = lambda group: group["files"])
+
+# Find duplicate archive groups by their contents
+def FindDuplicateArchiveGroups(
+    paths,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+    signature_groups = {}
+    for path in sorted(paths):
+        signature = archive.GetArchiveContentSignature(path)
+        if signature:
+            signature_groups.setdefault(signature, []).append(path)
+    duplicate_groups = []
+    for signature, group_files in signature_groups.items():
+        if len(group_files) > 1:
+            duplicate_groups.append({
+                "type": "archive",
+                "size": sum([entry_size for entry_crc, entry_size in signature]),
+                "hash": CalculateStringXXH3(repr(signature)),
+                "files": sorted(group_files)
+            })
+    return sorted(duplicate_groups, key = lambda group: group["files"])
+
+# Find duplicate groups in a directory tree
+def FindDuplicateGroups(
+    directory,
+    include_archives = False,
+    include_empty = False,
+    jobs = 1,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+    paths = system.BuildFileList(directory, ignore_symlinks = True)
+    duplicate_groups = FindDuplicateFileGroups(
+        paths = paths,
+        include_empty = include_empty,
+        jobs = jobs,
+        verbose = verbose,
+        pretend_run = pretend_run,
+        exit_on_failure = exit_on_failure)
+    if include_archives:
+
+        # Archives that are already byte identical are reported as file duplicates
+        identical_files = set()
+        for duplicate_group in duplicate_groups:
+            identical_files.update(duplicate_group["files"][1:])
+        duplicate_groups += FindDuplicateArchiveGroups(
+            paths = [path for path in paths if path not in identical_files],
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+    return duplicate_groups
 
 # Find duplicate files in the search directory
 def FindDuplicateFiles(
@@ -221,10 +417,15 @@ def FindDuplicateFiles(
     pretend_run = False,
     exit_on_failure = False):
     found_files = []
-    test_checksum = CalculateFileCRC32(filename, verbose = verbose, pretend_run = pretend_run, exit_on_failure = exit_on_failure)
+    if not system.IsPathFile(filename):
+        return found_files
+    test_size = os.path.getsize(filename)
+    test_checksum = None
     for obj in system.GetDirectoryContents(directory):
         obj_path = system.JoinPaths(directory, obj)
-        if system.IsPathFile(obj_path):
+        if system.IsPathFile(obj_path) and os.path.getsize(obj_path) == test_size:
+            if test_checksum is None:
+                test_checksum = CalculateFileCRC32(filename, verbose = verbose, pretend_run = pretend_run, exit_on_failure = exit_on_failure)
             obj_checksum = CalculateFileCRC32(obj_path, verbose = verbose, pretend_run = pretend_run, exit_on_failure = exit_on_failure)
             if test_checksum == obj_checksum:
                 found_files.append(obj_path)
@@ -238,12 +439,12 @@ def FindDuplicateArchives(
     pretend_run = False,
     exit_on_failure = False):
     found_files = []
-    test_checksums = archive.GetArchiveChecksums(filename)
+    test_checksums = set((entry["path"], entry["crc"]) for entry in archive.GetArchiveChecksums(filename))
     for obj in system.GetDirectoryContents(directory):
         obj_path = system.JoinPaths(directory, obj)
         if system.IsPathFile(obj_path):
-            obj_checksums = archive.GetArchiveChecksums(obj_path)
-            if [i for i in test_checksums if i not in obj_checksums] == []:
+            obj_checksums = set((entry["path"], entry["crc"]) for entry in archive.GetArchiveChecksums(obj_path))
+            if test_checksums.issubset(obj_checksums):
                 found_files.append(obj_path)
     return found_files
 
@@ -258,6 +459,8 @@ def ArePlainFilesIdentical(
     first_exists = system.DoesPathExist(first, case_sensitive_paths = case_sensitive_paths)
     second_exists = system.DoesPathExist(second, case_sensitive_paths = case_sensitive_paths)
     if first_exists and second_exists:
+        if os.path.getsize(first) != os.path.getsize(second):
+            return False
         first_crc32 = CalculateFileCRC32(first, verbose = verbose, pretend_run = pretend_run, exit_on_failure = exit_on_failure)
         second_crc32 = CalculateFileCRC32(second, verbose = verbose, pretend_run = pretend_run, exit_on_failure = exit_on_failure)
         return first_crc32 == second_crc32
@@ -368,34 +571,139 @@ def GetFileGroupings(filenames, max_group_size):
 
 ###########################################################
 
+# Get hash journal file
+def GetHashJournalFile(src):
+    return src + config.hash_journal_extension
+
+# Normalize hash entry
+def NormalizeHashEntry(json_hash):
+    if "filename_enc" not in json_hash:
+        json_hash["filename_enc"] = cryption.GenerateEncryptedFilename(json_hash["filename"])
+    if "hash_enc" not in json_hash:
+        json_hash["hash_enc"] = ""
+    if "size_enc" not in json_hash:
+        json_hash["size_enc"] = 0
+    return json_hash
+
+# Read hash journal
+def ReadHashJournal(
+    src,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+    journal_file = GetHashJournalFile(src)
+    journal_entries = []
+    if not system.IsPathFile(journal_file):
+        return journal_entries
+    try:
+        if verbose:
+            system.LogInfo("Reading hash journal %s" % journal_file)
+        import json
+        with open(journal_file, "r", encoding="utf8") as file:
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    journal_entries.append(NormalizeHashEntry(json.loads(line)))
+                except json.JSONDecodeError:
+
+                    # A partially written line is left behind by an interrupted append
+                    continue
+        return journal_entries
+    except Exception as e:
+        if exit_on_failure:
+            system.LogError("Unable to read hash journal %s" % journal_file)
+            system.LogError(e, quit_program = True)
+        return journal_entries
+
+# Append hash journal
+def AppendHashJournal(
+    src,
+    hash_data,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+    journal_file = GetHashJournalFile(src)
+    try:
+        if verbose:
+            system.LogInfo("Appending hash journal %s" % journal_file)
+        if not pretend_run:
+            import json
+            with open(journal_file, "a", encoding="utf8", newline="\n") as file:
+                file.write(json.dumps(hash_data, sort_keys = True) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+        return True
+    except Exception as e:
+        if exit_on_failure:
+            system.LogError("Unable to append hash journal %s" % journal_file)
+            system.LogError(e, quit_program = True)
+        return False
+
+# Compact hash journal
+def CompactHashJournal(
+    src,
+    hash_contents,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+
+    # Write hash file
+    success = WriteHashFile(
+        src = src,
+        hash_contents = hash_contents,
+        atomic = True,
+        verbose = verbose,
+        pretend_run = pretend_run,
+        exit_on_failure = exit_on_failure)
+    if not success:
+        return False
+
+    # Remove journal now that its entries are in the hash file
+    journal_file = GetHashJournalFile(src)
+    if system.IsPathFile(journal_file):
+        success = system.RemoveFile(
+            file = journal_file,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+    return success
+
 # Read hash file
 def ReadHashFile(
     src,
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
-    json_hashes = system.ReadJsonFile(
+    hash_contents = {}
+    if system.IsPathFile(src):
+        json_hashes = system.ReadJsonFile(
+            src = src,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+        if isinstance(json_hashes, list):
+            for json_hash in json_hashes:
+                json_hash = NormalizeHashEntry(json_hash)
+                file_location = system.JoinPaths(json_hash["dir"], json_hash["filename"])
+                hash_contents[file_location] = json_hash
+
+    # Replay entries journaled since the last compaction
+    journal_entries = ReadHashJournal(
         src = src,
         verbose = verbose,
         pretend_run = pretend_run,
         exit_on_failure = exit_on_failure)
-    hash_contents = {}
-    if isinstance(json_hashes, list):
-        for json_hash in json_hashes:
-            if "filename_enc" not in json_hash:
-                json_hash["filename_enc"] = cryption.GenerateEncryptedFilename(json_hash["filename"])
-            if "hash_enc" not in json_hash:
-                json_hash["hash_enc"] = ""
-            if "size_enc" not in json_hash:
-                json_hash["size_enc"] = 0
-            file_location = system.JoinPaths(json_hash["dir"], json_hash["filename"])
-            hash_contents[file_location] = json_hash
+    for journal_entry in journal_entries:
+        MergeHashData(hash_contents, journal_entry)
     return hash_contents
 
 # Write hash file
 def WriteHashFile(
     src,
     hash_contents,
+    atomic = False,
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
@@ -406,6 +714,7 @@ def WriteHashFile(
         src = src,
         json_data = json_hashes,
         sort_keys = True,
+        atomic = atomic,
         verbose = verbose,
         pretend_run = pretend_run,
         exit_on_failure = exit_on_failure)
@@ -467,7 +776,8 @@ def CalculateHash(
         file_info = cryption.GetEmbeddedFileInfo(
             src = path_full,
             passphrase = passphrase,
-            hasher = CalculateFileXXH3,
+            algorithms = [config.HashType.XXH3],
+            encrypted_algorithms = [config.HashType.MD5],
             verbose = verbose,
             pretend_run = pretend_run,
             exit_on_failure = exit_on_failure)
@@ -476,23 +786,20 @@ def CalculateHash(
             hash_data["filename"] = file_info["filename"]
             hash_data["filename_enc"] = path_file
             hash_data["hash"] = file_info["hash"]
-            hash_data["hash_enc"] = CalculateFileMD5(
-                src = path_full,
-                verbose = verbose,
-                pretend_run = pretend_run,
-                exit_on_failure = exit_on_failure)
+            hash_data["hash_enc"] = file_info["hash_enc"]
             hash_data["size"] = file_info["size"]
-            hash_data["size_enc"] = os.path.getsize(path_full)
+            hash_data["size_enc"] = file_info["size_enc"]
             hash_data["mtime"] = file_info["mtime"]
     else:
         hash_data["dir"] = path_dir
         hash_data["filename"] = path_file
         hash_data["filename_enc"] = cryption.GenerateEncryptedFilename(path_file)
-        hash_data["hash"] = CalculateFileXXH3(
+        hash_data["hash"] = CalculateFileDigests(
             src = path_full,
+            algorithms = [config.HashType.XXH3],
             verbose = verbose,
             pretend_run = pretend_run,
-            exit_on_failure = exit_on_failure)
+            exit_on_failure = exit_on_failure)[config.HashType.XXH3]
         hash_data["hash_enc"] = ""
         hash_data["size"] = os.path.getsize(path_full)
         hash_data["size_enc"] = 0
@@ -501,12 +808,62 @@ def CalculateHash(
     # Return hash data
     return hash_data
 
+# Calculate hashes
+def CalculateHashes(
+    hash_targets,
+    passphrase = None,
+    jobs = 1,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+
+    # Hash a single target
+    def hash_target(hash_target):
+        relative_file, relative_base = hash_target
+        return CalculateHash(
+            src = relative_file,
+            base_path = relative_base,
+            passphrase = passphrase,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+
+    # Hash serially
+    if not isinstance(jobs, int) or jobs <= 1:
+        for target in hash_targets:
+            yield hash_target(target)
+        return
+
+    # Hash with a pool of workers, yielding results in target order
+    import concurrent.futures
+    with concurrent.futures.ThreadPoolExecutor(max_workers = jobs) as executor:
+        yield from executor.map(hash_target, hash_targets)
+
+# Merge hash data
+def MergeHashData(hash_contents, hash_data):
+    hash_entry_key = system.JoinPaths(hash_data["dir"], hash_data["filename"])
+    if hash_entry_key in hash_contents:
+        different_hash = hash_contents[hash_entry_key]["hash"] == hash_data["hash"]
+        different_size = int(hash_contents[hash_entry_key]["size"]) == int(hash_data["size"])
+        different_hash_enc = hash_contents[hash_entry_key]["hash_enc"] == hash_data["hash_enc"]
+        different_size_enc = int(hash_contents[hash_entry_key]["size_enc"]) == int(hash_data["size_enc"])
+        if different_hash or different_size or different_hash_enc or different_size_enc:
+            hash_contents[hash_entry_key] = system.MergeDictionaries(
+                dict1 = hash_contents[hash_entry_key],
+                dict2 = hash_data,
+                merge_type = config.MergeType.REPLACE)
+    else:
+        hash_contents[hash_entry_key] = hash_data
+    return hash_contents
+
 # Hash files
 def HashFiles(
     src,
     offset,
     output_file,
     passphrase = None,
+    jobs = 1,
+    checkpoint_interval = config.hash_journal_compact_interval,
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
@@ -519,15 +876,25 @@ def HashFiles(
         exit_on_failure = exit_on_failure)
 
     # Get hash contents
-    hash_contents = {}
-    if system.IsPathFile(output_file):
-        hash_contents = ReadHashFile(
+    hash_contents = ReadHashFile(
+        src = output_file,
+        verbose = verbose,
+        pretend_run = pretend_run,
+        exit_on_failure = exit_on_failure)
+
+    # Fold in any journal left behind by an interrupted run
+    if system.IsPathFile(GetHashJournalFile(output_file)):
+        success = CompactHashJournal(
             src = output_file,
+            hash_contents = hash_contents,
             verbose = verbose,
             pretend_run = pretend_run,
             exit_on_failure = exit_on_failure)
+        if not success:
+            return False
 
-    # Hash each file in the input path
+    # Find each file in the input path that needs to be hashed
+    hash_targets = []
     for file in system.BuildFileList(src):
         if os.path.realpath(file) == os.path.realpath(output_file):
             continue
@@ -541,33 +908,36 @@ def HashFiles(
         relative_base = file_parts[0]
         relative_file = system.JoinPaths(offset, file_parts[1])
         if DoesFileNeedToBeHashed(relative_file, relative_base, hash_contents):
+            hash_targets.append((relative_file, relative_base))
 
-            # Calculate hash
-            hash_data = CalculateHash(
-                src = relative_file,
-                base_path = relative_base,
-                passphrase = passphrase,
-                verbose = verbose,
-                pretend_run = pretend_run,
-                exit_on_failure = exit_on_failure)
-            hash_entry_key = system.JoinPaths(hash_data["dir"], hash_data["filename"])
-
-            # Merge hash
-            if hash_entry_key in hash_contents:
-                different_hash = hash_contents[hash_entry_key]["hash"] == hash_data["hash"]
-                different_size = int(hash_contents[hash_entry_key]["size"]) == int(hash_data["size"])
-                different_hash_enc = hash_contents[hash_entry_key]["hash_enc"] == hash_data["hash_enc"]
-                different_size_enc = int(hash_contents[hash_entry_key]["size_enc"]) == int(hash_data["size_enc"])
-                if different_hash or different_size or different_hash_enc or different_size_enc:
-                    hash_contents[hash_entry_key] = system.MergeDictionaries(
-                        dict1 = hash_contents[hash_entry_key],
-                        dict2 = hash_data,
-                        merge_type = config.MergeType.REPLACE)
-            else:
-                hash_contents[hash_entry_key] = hash_data
-
-            # Write hash file
-            success = WriteHashFile(
+    # Calculate hashes
+    hash_results = CalculateHashes(
+        hash_targets = hash_targets,
+        passphrase = passphrase,
+        jobs = jobs,
+        verbose = verbose,
+        pretend_run = pretend_run,
+        exit_on_failure = exit_on_failure)
+    journal_count = 0
+    for hash_data in hash_results:
+
+        # Merge hash
+        MergeHashData(hash_contents, hash_data)
+
+        # Journal hash
+        success = AppendHashJournal(
+            src = output_file,
+            hash_data = hash_data,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+        if not success:
+            return False
+        journal_count += 1
+
+        # Periodically compact journal into hash file
+        if journal_count >= checkpoint_interval:
+            success = CompactHashJournal(
                 src = output_file,
                 hash_contents = hash_contents,
                 verbose = verbose,
@@ -575,9 +945,10 @@ def HashFiles(
                 exit_on_failure = exit_on_failure)
             if not success:
                 return False
+            journal_count = 0
 
-    # Write hash file
-    return WriteHashFile(
+    # Compact journal into hash file
+    return CompactHashJournal(
         src = output_file,
         hash_contents = hash_contents,
         verbose = verbose,
@@ -1,14 +1,86 @@
 # Imports
 import os, os.path
 import sys
+import threading
 import configparser
 
 # Ini file location
 ini_folder = os.path.realpath(os.path.join(os.path.dirname(__file__), "..", ".."))
 ini_file = os.path.join(ini_folder, "JoyBox.ini")
 
-# Ini file parser
-ini_parser = configparser.ConfigParser(interpolation=None)
+# Ini snapshot (replaced whenever the ini file changes)
+ini_snapshot = None
+ini_snapshot_lock = threading.Lock()
+ini_parse_count = 0
+
+# Ini snapshot
+class IniSnapshot:
+
+    # Constructor
+    def __init__(self, signature, sections):
+        self.signature = signature
+        self.sections = sections
+        self.typed_values = {}
+
+    # Get section names
+    def get_sections(self):
+        return [section for section in self.sections.keys() if section != configparser.DEFAULTSECT]
+
+    # Determine if section exists
+    def has_section(self, section):
+        return section in self.sections
+
+    # Determine if field exists
+    def has_field(self, section, field):
+        return (section in self.sections) and (field.lower() in self.sections[section])
+
+    # Get raw value
+    def get_value(self, section, field):
+        return self.sections[section][field.lower()]
+
+    # Get typed value (memoized per key)
+    def get_typed_value(self, key, converter, section, field):
+        try:
+            return self.typed_values[key]
+        except KeyError:
+            value = converter(self.get_value(section, field))
+            self.typed_values[key] = value
+            return value
+
+# Get ini file signature
+def GetIniFileSignature():
+    try:
+        file_stat = os.stat(ini_file)
+        return (file_stat.st_size, file_stat.st_mtime_ns)
+    except OSError:
+        return None
+
+# Parse ini snapshot
+def ParseIniSnapshot(signature):
+    global ini_parse_count
+    ini_parser = configparser.ConfigParser(interpolation=None)
+    ini_parser.read(ini_file)
+    ini_parse_count += 1
+    sections = {}
+    for section in [configparser.DEFAULTSECT] + ini_parser.sections():
+        sections[section] = dict(ini_parser[section])
+    return IniSnapshot(signature, sections)
+
+# Get ini snapshot
+def GetIniSnapshot():
+    global ini_snapshot
+    signature = GetIniFileSignature()
+    snapshot = ini_snapshot
+    if snapshot is None or snapshot.signature != signature:
+        with ini_snapshot_lock:
+            if ini_snapshot is None or ini_snapshot.signature != signature:
+                ini_snapshot = ParseIniSnapshot(signature)
+            snapshot = ini_snapshot
+    return snapshot
+
+# Get ini parse count
+def GetIniParseCount():
+    return ini_parse_count
 
 # Check if ini is present
 def IsIniPresent():
@@ -17,63 +89,56 @@ def IsIniPresent():
 # Get ini sections
 def GetIniSections():
     try:
-        ini_parser.read(ini_file)
-        return ini_parser.sections()
+        return GetIniSnapshot().get_sections()
     except:
         raise RuntimeError("Unable to read ini sections [file=%s]" % ini_file)
 
 # Determine if ini has section
 def HasIniSection(section):
     try:
-        ini_parser.read(ini_file)
-        return section in ini_parser
+        return GetIniSnapshot().has_section(section)
     except:
         raise RuntimeError("Unable to check ini section [file=%s][section=%s]" % (ini_file, section))
 
 # Determine if ini has field
 def HasIniField(section, field):
     try:
-        ini_parser.read(ini_file)
-        return (section in ini_parser) and (field in ini_parser[section])
+        return GetIniSnapshot().has_field(section, field)
     except:
         raise RuntimeError("Unable to check ini field [file=%s][section=%s][field=%s]" % (ini_file, section, field))
 
 # Get ini value
 def GetIniValue(section, field):
     try:
-        ini_parser.read(ini_file)
-        return ini_parser[section][field]
+        return GetIniSnapshot().get_value(section, field)
     except:
         raise RuntimeError("Unable to get ini value [file=%s][section=%s][field=%s]" % (ini_file, section, field))
 
 # Get ini integer value
 def GetIniIntegerValue(section, field):
     try:
-        value = GetIniValue(section, field)
-        return int(value)
+        return GetIniSnapshot().get_typed_value(("int", section, field), int, section, field)
     except:
         raise RuntimeError("Unable to get ini integer value [file=%s][section=%s][field=%s]" % (ini_file, section, field))
 
 # Get ini bool value
 def GetIniBoolValue(section, field):
     try:
-        value = GetIniValue(section, field)
-        return value == "True"
+        return GetIniSnapshot().get_typed_value(("bool", section, field), lambda value: value == "True", section, field)
     except:
         raise RuntimeError("Unable to get ini boolean value [file=%s][section=%s][field=%s]" % (ini_file, section, field))
 
 # Get ini path value
 def GetIniPathValue(section, field):
     try:
-        value = GetIniValue(section, field)
-        return os.path.expandvars(value)
+        return GetIniSnapshot().get_typed_value(("path", section, field), os.path.expandvars, section, field)
     except:
         raise RuntimeError("Unable to get ini path value [file=%s][section=%s][field=%s]" % (ini_file, section, field))
 
 # Get ini list value
 def GetIniListValue(section, field, delimiter = ","):
     try:
-        value = GetIniValue(section, field)
-        return value.split(delimiter)
+        value = GetIniSnapshot().get_typed_value(("list", section, field, delimiter), lambda value: tuple(value.split(delimiter)), section, field)
+        return list(value)
     except:
         raise RuntimeError("Unable to get ini list value [file=%s][section=%s][field=%s][delimiter=%s]" % (ini_file, section, field, delimiter))
@@ -7,10 +7,11 @@ import config
 import system
 import environment
 import metadata
-import programs
 import gameinfo
 import saves
 import cache
+import cachemanager
+import launcherindex
 import gui
 
 # Launch game
@@ -40,12 +41,12 @@ def LaunchGame(
     if not success:
         return False
 
+    # Record launch
+    if not pretend_run:
+        cachemanager.RecordGameLaunch(game_category, game_subcategory, game_name)
+
     # Get launcher
-    game_launcher = None
-    for emulator in programs.GetEmulators():
-        if game_platform in emulator.GetPlatforms():
-            game_launcher = emulator
-            break
+    game_launcher = launcherindex.GetLauncherForPlatform(game_platform)
 
     # Check game launcher
     if not game_launcher:
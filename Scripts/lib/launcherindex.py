@@ -0,0 +1,126 @@
+# Imports
+import os, os.path
+import sys
+import threading
+
+# Local imports
+import config
+import environment
+import system
+import emulators
+
+# Process-wide platform launcher index
+launcher_index = None
+launcher_index_lock = threading.Lock()
+
+###########################################################
+
+# Get emulator plugin signature
+def GetEmulatorPluginSignature():
+    signature = []
+    plugin_dir = os.path.dirname(emulators.__file__)
+    for emulator_name in emulators.GetEmulatorNames():
+        module_name, class_name, program_names = emulators.emulator_plugins[emulator_name]
+        plugin_file = os.path.join(plugin_dir, module_name.lstrip(".") + ".py")
+        try:
+            file_stat = os.stat(plugin_file)
+            signature.append([emulator_name, file_stat.st_size, file_stat.st_mtime_ns])
+        except OSError:
+            signature.append([emulator_name, None, None])
+    return signature
+
+# Build platform launcher table (first emulator to claim a platform wins)
+def BuildPlatformLauncherTable():
+    platform_launchers = {}
+    for emulator_name in emulators.GetEmulatorNames():
+        emulator = emulators.GetEmulatorByName(emulator_name)
+        for emulator_platform in emulator.GetPlatforms():
+            platform_launchers.setdefault(str(emulator_platform), emulator_name)
+    return platform_launchers
+
+# Platform launcher index
+class PlatformLauncherIndex:
+
+    # Constructor
+    def __init__(self, index_file):
+
+        # Save params
+        self.index_file = index_file
+
+        # Platform to emulator name
+        self.signature = None
+        self.platform_launchers = {}
+
+    # Load index from disk
+    def load(self):
+        if not os.path.isfile(self.index_file):
+            return
+        index_data = system.ReadJsonFile(self.index_file)
+        if index_data.get("version") != config.launcher_index_version:
+            return
+        platform_launchers = index_data.get("platforms")
+        if isinstance(platform_launchers, dict):
+            self.signature = index_data.get("signature")
+            self.platform_launchers = platform_launchers
+
+    # Save index to disk
+    def save(self):
+        os.makedirs(os.path.dirname(self.index_file), exist_ok = True)
+        return system.WriteJsonFile(
+            src = self.index_file,
+            json_data = {
+                "version": config.launcher_index_version,
+                "signature": self.signature,
+                "platforms": self.platform_launchers
+            },
+            atomic = True)
+
+    # Rebuild index if emulator plugins changed
+    def refresh(self, force = False):
+        signature = GetEmulatorPluginSignature()
+        if not force and self.signature == signature:
+            return False
+        self.platform_launchers = BuildPlatformLauncherTable()
+        self.signature = signature
+        self.save()
+        return True
+
+    # Get emulator name for a platform
+    def get_launcher_name(self, platform_type):
+        return self.platform_launchers.get(str(platform_type))
+
+###########################################################
+
+# Get platform launcher index
+def GetPlatformLauncherIndex():
+    global launcher_index
+    with launcher_index_lock:
+        if launcher_index is None:
+            index = PlatformLauncherIndex(environment.GetCacheLauncherIndexFile())
+            try:
+                index.load()
+                index.refresh()
+            except Exception as e:
+                system.LogWarning("Unable to persist platform launcher index, building it in memory (%s)" % e)
+                index.platform_launchers = BuildPlatformLauncherTable()
+            launcher_index = index
+        return launcher_index
+
+# Build platform launcher index
+def BuildPlatformLauncherIndex():
+    index = GetPlatformLauncherIndex()
+    with launcher_index_lock:
+        return index.refresh(force = True)
+
+# Get launcher name for platform
+def GetLauncherNameForPlatform(platform_type):
+    return GetPlatformLauncherIndex().get_launcher_name(platform_type)
+
+# Get launcher for platform
+def GetLauncherForPlatform(platform_type):
+    launcher_name = GetLauncherNameForPlatform(platform_type)
+    if not launcher_name:
+        return None
+    return emulators.GetEmulatorByName(launcher_name)
+
+###########################################################
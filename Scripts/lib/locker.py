@@ -2,6 +2,8 @@
 import os
 import os.path
 import sys
+import time
+import threading
 
 # Local imports
 import config
@@ -69,10 +71,24 @@ def DoesRemotePathContainFiles(path):
         remote_path = ConvertToRemotePath(path))
     return success
 
+# Get remote path size
+def GetRemotePathSize(path):
+
+    # Get options
+    locker_remote_name = ini.GetIniValue("UserData.Share", "locker_remote_name")
+    locker_remote_type = ini.GetIniValue("UserData.Share", "locker_remote_type")
+
+    # Get path size
+    return sync.GetPathSize(
+        remote_name = locker_remote_name,
+        remote_type = locker_remote_type,
+        remote_path = ConvertToRemotePath(path))
+
 # Download path
 def DownloadPath(
     src,
     dest = None,
+    file_func = None,
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
@@ -93,6 +109,7 @@ def DownloadPath(
         remote_type = locker_remote_type,
         remote_path = remote_path,
         local_path = local_path,
+        file_func = file_func,
         verbose = verbose,
         pretend_run = pretend_run,
         exit_on_failure = exit_on_failure)
@@ -143,38 +160,111 @@ def UploadPath(
 def DownloadAndDecryptPath(
     src,
     dest = None,
+    output_dir = None,
+    jobs = None,
+    timings = None,
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
+    import concurrent.futures
 
     # Get options
     locker_passphrase = ini.GetIniValue("UserData.Protection", "locker_passphrase")
 
-    # Download files
-    success, result = DownloadPath(
-        src = src,
-        dest = dest,
-        verbose = verbose,
-        pretend_run = pretend_run,
-        exit_on_failure = exit_on_failure)
-    if not success:
-        return (False, "")
+    # Get paths
+    download_dir = dest
+    if not download_dir:
+        download_dir = ConvertToLocalPath(ConvertToRemotePath(src))
+
+    # Decrypt each file as soon as it lands
+    start_time = time.perf_counter()
+    stage_times = {"decrypt_start": None, "decrypt_end": None}
+    decrypt_futures = {}
+    decrypt_lock = threading.Lock()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers = cryption.GetDefaultCryptionJobs() if not jobs else jobs)
+    def decrypt_file(local_file):
+        with decrypt_lock:
+            if stage_times["decrypt_start"] is None:
+                stage_times["decrypt_start"] = time.perf_counter()
+        local_output_dir = system.GetFilenameDirectory(local_file)
+        if output_dir and os.path.isdir(download_dir):
+            local_output_dir = system.RebaseFilePath(local_output_dir, download_dir, output_dir)
+        elif output_dir:
+            local_output_dir = output_dir
+        system.MakeDirectory(
+            dir = local_output_dir,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+        output_file = cryption.DecryptFileToDirectory(
+            src = local_file,
+            passphrase = locker_passphrase,
+            output_dir = local_output_dir,
+            delete_original = True,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+        with decrypt_lock:
+            stage_times["decrypt_end"] = time.perf_counter()
+        return output_file
+    def submit_file(local_file):
+        local_file = os.path.abspath(local_file)
+        with decrypt_lock:
+            if local_file in decrypt_futures or not os.path.isfile(local_file):
+                return
+            decrypt_futures[local_file] = executor.submit(decrypt_file, local_file)
+    def on_file_landed(relative_file):
+        if system.IsPathFile(download_dir):
+            submit_file(download_dir)
+        else:
+            submit_file(system.JoinPaths(download_dir, relative_file))
 
-    # Decrypt files
-    output_files = cryption.DecryptFiles(
-        src = result,
-        passphrase = locker_passphrase,
-        delete_original = True,
-        verbose = verbose,
-        pretend_run = pretend_run,
-        exit_on_failure = exit_on_failure)
-    if len(output_files) == 0:
+    # Download files
+    try:
+        success, result = DownloadPath(
+            src = src,
+            dest = dest,
+            file_func = on_file_landed,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+        download_end_time = time.perf_counter()
+
+        # Pick up any files that landed without a notification
+        output_files = set()
+        if success:
+            while True:
+                with decrypt_lock:
+                    pending_futures = list(decrypt_futures.values())
+                for future in pending_futures:
+                    if future.result():
+                        output_files.add(future.result())
+                remaining_files = []
+                for local_file in system.BuildFileList(result):
+                    if local_file not in decrypt_futures and local_file not in output_files:
+                        remaining_files.append(local_file)
+                if len(remaining_files) == 0:
+                    break
+                for local_file in remaining_files:
+                    submit_file(local_file)
+    finally:
+        executor.shutdown(wait = True)
+
+    # Record stage timing
+    if isinstance(timings, dict):
+        timings["download"] = download_end_time - start_time
+        if stage_times["decrypt_start"] is not None:
+            timings["decrypt"] = stage_times["decrypt_end"] - stage_times["decrypt_start"]
+            timings["decrypt_tail"] = max(stage_times["decrypt_end"] - download_end_time, 0)
+        timings["total"] = time.perf_counter() - start_time
+    if not success or len(output_files) == 0:
         return (False, "")
 
     # Return result
+    output_files = system.SortStrings(list(output_files))
     if system.IsPathFile(result) or len(output_files) == 1:
         return (True, output_files[0])
-    return (True, result)
+    return (True, output_dir if output_dir else result)
 
 # Upload and encrypt path
 def UploadAndEncryptPath(
@@ -217,14 +307,11 @@ def BackupFiles(
     skip_identical = False,
     case_sensitive_paths = True,
     upload_encrypted = False,
+    upload_files = True,
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
 
-    # Get options
-    locker_remote_name = ini.GetIniValue("UserData.Share", "locker_remote_name")
-    locker_remote_type = ini.GetIniValue("UserData.Share", "locker_remote_type")
-
     # Transfer files
     success = system.SmartTransfer(
         src = src,
@@ -241,32 +328,59 @@ def BackupFiles(
         return False
 
     # Upload files
-    if sync.IsToolInstalled():
-
-        # Check if remote configured
-        if sync.IsRemoteConfigured(
-            remote_name = locker_remote_name,
-            remote_type = locker_remote_type):
-
-            # Upload encryped files
-            if upload_encrypted:
-                success = UploadAndEncryptPath(
-                    src = dest,
-                    verbose = verbose,
-                    pretend_run = pretend_run,
-                    exit_on_failure = exit_on_failure)
-                if not success:
-                    return False
-
-            # Upload plain files
-            else:
-                success = UploadPath(
-                    src = dest,
-                    verbose = verbose,
-                    pretend_run = pretend_run,
-                    exit_on_failure = exit_on_failure)
-                if not success:
-                    return False
+    if upload_files:
+        return UploadBackupPaths(
+            paths = [dest],
+            upload_encrypted = upload_encrypted,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+
+    # Should be successful
+    return True
+
+# Upload backup paths
+def UploadBackupPaths(
+    paths,
+    upload_encrypted = False,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+
+    # Get options
+    locker_remote_name = ini.GetIniValue("UserData.Share", "locker_remote_name")
+    locker_remote_type = ini.GetIniValue("UserData.Share", "locker_remote_type")
+
+    # Check if remote is usable
+    if not sync.IsToolInstalled():
+        return True
+    if not sync.IsRemoteConfigured(
+        remote_name = locker_remote_name,
+        remote_type = locker_remote_type):
+        return True
+
+    # Upload each path
+    for path in paths:
+
+        # Upload encryped files
+        if upload_encrypted:
+            success = UploadAndEncryptPath(
+                src = path,
+                verbose = verbose,
+                pretend_run = pretend_run,
+                exit_on_failure = exit_on_failure)
+            if not success:
+                return False
+
+        # Upload plain files
+        else:
+            success = UploadPath(
+                src = path,
+                verbose = verbose,
+                pretend_run = pretend_run,
+                exit_on_failure = exit_on_failure)
+            if not success:
+                return False
 
     # Should be successful
     return True
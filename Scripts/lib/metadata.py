@@ -2,6 +2,7 @@
 import os, os.path
 import sys
 import random
+import threading
 
 # Local imports
 import config
@@ -11,6 +12,10 @@ import platforms
 import gameinfo
 import metadataentry
 
+# Process-wide metadata index
+metadata_index = {}
+metadata_index_lock = threading.Lock()
+
 # Metadata database class
 class Metadata:
 
@@ -149,139 +154,139 @@ class Metadata:
     def import_from_pegasus_file(
         self,
         pegasus_file,
+        entry_filter = None,
         verbose = False,
         pretend_run = False,
         exit_on_failure = False):
-        if os.path.exists(pegasus_file):
-            with open(pegasus_file, "r", encoding="utf8") as file:
-                data = file.read()
-
-                # Read header
-                collection_platform = ""
-                for line in data.split("\n"):
-                    if line.startswith("collection:"):
-                        collection_platform = line.replace("collection:", "").strip()
-                        break
-
-                # Read game entries
-                for token in data.split("\n\n"):
-
-                    # Create new entry
+        for game_entry in ParsePegasusFile(
+            pegasus_file = pegasus_file,
+            entry_filter = entry_filter,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure):
+            self.add_game(game_entry)
+
+    # Import from sidecar file
+    def import_from_sidecar_file(
+        self,
+        metadata_file,
+        verbose = False,
+        pretend_run = False,
+        exit_on_failure = False):
+        sidecar_file = GetMetadataSidecarFile(metadata_file)
+        signature = GetMetadataFileSignature(metadata_file)
+        if not signature or not os.path.isfile(sidecar_file):
+            return False
+        try:
+            import marshal
+            with open(sidecar_file, "rb") as file:
+                sidecar_data = marshal.loads(file.read())
+            if sidecar_data.get("version") != GetMetadataSidecarVersion():
+                return False
+            if tuple(sidecar_data.get("signature", ())) != signature:
+                return False
+            if verbose:
+                system.LogInfo("Loaded metadata sidecar %s" % sidecar_file)
+            for platform_value, platform_entries in sidecar_data["database"].items():
+                game_platform = config.Platform.from_string(platform_value)
+                game_supercategory, game_category, game_subcategory = gameinfo.DeriveGameCategoriesFromPlatform(game_platform)
+                platform_database = self.game_database.setdefault(game_platform, {})
+                for game_name, game_values in platform_entries.items():
+                    game_values[config.metadata_key_platform] = game_platform
+                    game_values[config.metadata_key_supercategory] = game_supercategory
+                    game_values[config.metadata_key_category] = game_category
+                    game_values[config.metadata_key_subcategory] = game_subcategory
                     game_entry = metadataentry.MetadataEntry()
-                    game_entry.set_platform(config.Platform.from_string(collection_platform))
-                    in_description_section = False
-
-                    # Parse entry tokens
-                    for line in token.split("\n"):
-
-                        # Game
-                        if line.startswith("game:"):
-                            in_description_section = False
-                            game_entry.set_game(line.replace("game:", "").strip())
-
-                        # File
-                        elif line.startswith("file:"):
-                            in_description_section = False
-                            game_entry.set_file(line.replace("file:", "").strip())
-
-                        # Developer
-                        elif line.startswith("developer:"):
-                            in_description_section = False
-                            game_entry.set_developer(line.replace("developer:", "").strip())
-
-                        # Publisher
-                        elif line.startswith("publisher:"):
-                            in_description_section = False
-                            game_entry.set_publisher(line.replace("publisher:", "").strip())
-
-                        # Genre
-                        elif line.startswith("genre:"):
-                            in_description_section = False
-                            game_entry.set_genre(line.replace("genre:", "").strip())
-
-                        # Tag
-                        elif line.startswith("tag:"):
-                            in_description_section = False
-                            game_entry.set_tag(line.replace("tag:", "").strip())
-
-                        # Description
-                        elif line.startswith("description:"):
-                            in_description_section = True
-                            game_entry.set_description([])
-                        elif line.startswith("  ") and in_description_section:
-                            description_lines = game_entry.get_description()
-                            description_lines.append(line.strip())
-                            game_entry.set_description(description_lines)
-
-                        # Release
-                        elif line.startswith("release:"):
-                            in_description_section = False
-                            game_entry.set_release(line.replace("release:", "").strip())
-
-                        # Players
-                        elif line.startswith("players:"):
-                            in_description_section = False
-                            game_entry.set_players(line.replace("players:", "").strip())
-
-                        # Boxfront
-                        elif line.startswith("assets.boxfront:"):
-                            in_description_section = False
-                            game_entry.set_boxfront(line.replace("assets.boxfront:", "").strip())
-
-                        # Boxback
-                        elif line.startswith("assets.boxback:"):
-                            in_description_section = False
-                            game_entry.set_boxback(line.replace("assets.boxback:", "").strip())
-
-                        # Background
-                        elif line.startswith("assets.background:"):
-                            in_description_section = False
-                            game_entry.set_background(line.replace("assets.background:", "").strip())
-
-                        # Screenshot
-                        elif line.startswith("assets.screenshot:"):
-                            in_description_section = False
-                            game_entry.set_screenshot(line.replace("assets.screenshot:", "").strip())
-
-                        # Video
-                        elif line.startswith("assets.video:"):
-                            in_description_section = False
-                            game_entry.set_video(line.replace("assets.video:", "").strip())
-
-                        # Url
-                        elif line.startswith("x-url:"):
-                            in_description_section = False
-                            game_entry.set_url(line.replace("x-url:", "").strip())
-
-                        # Co-op
-                        elif line.startswith("x-co-op:"):
-                            in_description_section = False
-                            game_entry.set_coop(line.replace("x-co-op:", "").strip())
-
-                        # Playable
-                        elif line.startswith("x-playable:"):
-                            in_description_section = False
-                            game_entry.set_playable(line.replace("x-playable:", "").strip())
-
-                    # Add new entry
-                    if game_entry.has_minimum_keys():
-                        self.add_game(game_entry)
+                    game_entry.game_entry = game_values
+                    platform_database[game_name] = game_entry
+            return True
+        except Exception as e:
+            if verbose:
+                system.LogWarning("Ignoring unreadable metadata sidecar %s (%s)" % (sidecar_file, e))
+            return False
+
+    # Export to sidecar file
+    def export_to_sidecar_file(
+        self,
+        metadata_file,
+        verbose = False,
+        pretend_run = False,
+        exit_on_failure = False):
+        sidecar_file = GetMetadataSidecarFile(metadata_file)
+        signature = GetMetadataFileSignature(metadata_file)
+        if not signature:
+            return False
+        try:
+            if verbose:
+                system.LogInfo("Writing metadata sidecar %s" % sidecar_file)
+            if not pretend_run:
+                import marshal
+
+                # Platform and categories are stored once per platform and derived again on load
+                derived_keys = [
+                    config.metadata_key_platform,
+                    config.metadata_key_supercategory,
+                    config.metadata_key_category,
+                    config.metadata_key_subcategory
+                ]
+                sidecar_database = {}
+                for game_platform, game_entries in self.game_database.items():
+                    sidecar_database[game_platform.val()] = {
+                        game_name: {key: value for key, value in game_entry.game_entry.items() if key not in derived_keys}
+                        for game_name, game_entry in game_entries.items()
+                    }
+                sidecar_data = {
+                    "version": GetMetadataSidecarVersion(),
+                    "signature": signature,
+                    "database": sidecar_database
+                }
+                with open(sidecar_file + ".tmp", "wb") as file:
+                    file.write(marshal.dumps(sidecar_data))
+                os.replace(sidecar_file + ".tmp", sidecar_file)
+            return True
+        except Exception as e:
+            if exit_on_failure:
+                system.LogError("Unable to write metadata sidecar %s" % sidecar_file)
+                system.LogError(e, quit_program = True)
+            return False
 
     # Import from metadata file
     def import_from_metadata_file(
         self,
         metadata_file,
         metadata_format = config.MetadataFormatType.PEGASUS,
+        entry_filter = None,
+        use_sidecar = False,
         verbose = False,
         pretend_run = False,
         exit_on_failure = False):
+
+        # Load sidecar snapshot if it is still current
+        use_sidecar = use_sidecar and not callable(entry_filter) and len(self.game_database) == 0
+        if use_sidecar:
+            if self.import_from_sidecar_file(
+                metadata_file = metadata_file,
+                verbose = verbose,
+                pretend_run = pretend_run,
+                exit_on_failure = exit_on_failure):
+                return
+
+        # Parse metadata file
         if metadata_format == config.MetadataFormatType.PEGASUS:
             self.import_from_pegasus_file(
                 pegasus_file = metadata_file,
+                entry_filter = entry_filter,
                 verbose = verbose,
                 pretend_run = pretend_run,
                 exit_on_failure = exit_on_failure)
 
+        # Refresh sidecar snapshot
+        if use_sidecar:
+            self.export_to_sidecar_file(
+                metadata_file = metadata_file,
+                verbose = verbose,
+                pretend_run = pretend_run)
+
     # Export to pegasus file
     def export_to_pegasus_file(
         self,
@@ -386,6 +391,9 @@ class Metadata:
                     # Divider
                     file.write("\n\n")
 
+        # Drop any indexed copy of the old contents
+        InvalidateIndexedMetadata(pegasus_file)
+
     # Export to metadata file
     def export_to_metadata_file(
         self,
@@ -402,3 +410,171 @@ class Metadata:
                 verbose = verbose,
                 pretend_run = pretend_run,
                 exit_on_failure = exit_on_failure)
+
+###########################################################
+
+# Pegasus field setters
+pegasus_field_setters = {
+    "game": metadataentry.MetadataEntry.set_game,
+    "file": metadataentry.MetadataEntry.set_file,
+    "developer": metadataentry.MetadataEntry.set_developer,
+    "publisher": metadataentry.MetadataEntry.set_publisher,
+    "genre": metadataentry.MetadataEntry.set_genre,
+    "release": metadataentry.MetadataEntry.set_release,
+    "players": metadataentry.MetadataEntry.set_players,
+    "assets.boxfront": metadataentry.MetadataEntry.set_boxfront,
+    "assets.boxback": metadataentry.MetadataEntry.set_boxback,
+    "assets.background": metadataentry.MetadataEntry.set_background,
+    "assets.screenshot": metadataentry.MetadataEntry.set_screenshot,
+    "assets.video": metadataentry.MetadataEntry.set_video,
+    "x-url": metadataentry.MetadataEntry.set_url,
+    "x-co-op": metadataentry.MetadataEntry.set_coop,
+    "x-playable": metadataentry.MetadataEntry.set_playable
+}
+
+# Parse pegasus file
+# Yields each complete game entry while reading the file line by line.
+# The optional entry filter is called with the platform and name of each game,
+# and entries it rejects are skipped without being built.
+def ParsePegasusFile(
+    pegasus_file,
+    entry_filter = None,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+    if not os.path.exists(pegasus_file):
+        return
+    if verbose:
+        system.LogInfo("Parsing pegasus file %s" % pegasus_file)
+    with open(pegasus_file, "r", encoding="utf8") as file:
+        collection_platform = None
+        game_entry = None
+        description_lines = None
+        skip_entry = False
+        for line in file:
+            line = line.rstrip("\n")
+
+            # Entries are separated by blank lines
+            if not line:
+                if game_entry and not skip_entry and game_entry.has_minimum_keys():
+                    yield game_entry
+                game_entry = None
+                description_lines = None
+                skip_entry = False
+                continue
+            if skip_entry:
+                continue
+
+            # Description lines
+            if description_lines is not None and line.startswith("  "):
+                description_lines.append(line.strip())
+                continue
+
+            # Split field
+            field_key, field_sep, field_value = line.partition(":")
+            if not field_sep:
+                continue
+
+            # Collection
+            if field_key == "collection":
+                collection_platform = config.Platform.from_string(field_value.strip())
+                continue
+
+            # Fields
+            if field_key == "description":
+                if not game_entry:
+                    game_entry = metadataentry.MetadataEntry()
+                    game_entry.set_platform(collection_platform)
+                description_lines = []
+                game_entry.set_description(description_lines)
+                continue
+            field_setter = pegasus_field_setters.get(field_key)
+            if not field_setter:
+                continue
+            description_lines = None
+            field_value = field_value.strip()
+            if field_key == "game" and callable(entry_filter) and not entry_filter(collection_platform, field_value):
+                game_entry = None
+                skip_entry = True
+                continue
+            if not game_entry:
+                game_entry = metadataentry.MetadataEntry()
+                game_entry.set_platform(collection_platform)
+            field_setter(game_entry, field_value)
+
+        # Final entry
+        if game_entry and not skip_entry and game_entry.has_minimum_keys():
+            yield game_entry
+
+###########################################################
+
+# Get metadata sidecar file
+def GetMetadataSidecarFile(metadata_file):
+    return metadata_file + config.metadata_sidecar_extension
+
+# Get metadata sidecar version
+# The marshal format is only guaranteed to be readable by the same python version
+def GetMetadataSidecarVersion():
+    return "%d-%d.%d" % (config.metadata_sidecar_version, sys.version_info[0], sys.version_info[1])
+
+# Get metadata file signature
+def GetMetadataFileSignature(metadata_file):
+    try:
+        file_stat = os.stat(metadata_file)
+        return (file_stat.st_size, file_stat.st_mtime_ns)
+    except OSError:
+        return None
+
+# Get indexed metadata
+# The returned database is shared by every caller, so it must be treated as read only
+def GetIndexedMetadata(
+    metadata_file,
+    metadata_format = config.MetadataFormatType.PEGASUS,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+    signature = GetMetadataFileSignature(metadata_file)
+    with metadata_index_lock:
+        if metadata_file in metadata_index:
+            indexed_signature, indexed_metadata = metadata_index[metadata_file]
+            if indexed_signature == signature:
+                return indexed_metadata
+        metadata_obj = Metadata()
+        if signature:
+            metadata_obj.import_from_metadata_file(
+                metadata_file = metadata_file,
+                metadata_format = metadata_format,
+                use_sidecar = True,
+                verbose = verbose,
+                pretend_run = pretend_run,
+                exit_on_failure = exit_on_failure)
+        metadata_index[metadata_file] = (signature, metadata_obj)
+        return metadata_obj
+
+# Get indexed metadata entry
+def GetIndexedMetadataEntry(
+    metadata_file,
+    game_platform,
+    game_name,
+    metadata_format = config.MetadataFormatType.PEGASUS,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+    metadata_obj = GetIndexedMetadata(
+        metadata_file = metadata_file,
+        metadata_format = metadata_format,
+        verbose = verbose,
+        pretend_run = pretend_run,
+        exit_on_failure = exit_on_failure)
+    metadata_entry = metadata_obj.get_game(game_platform, game_name)
+    if metadata_entry:
+        return metadata_entry.copy()
+    return None
+
+# Invalidate indexed metadata
+def InvalidateIndexedMetadata(metadata_file = None):
+    with metadata_index_lock:
+        if metadata_file:
+            metadata_index.pop(metadata_file, None)
+        else:
+            metadata_index.clear()
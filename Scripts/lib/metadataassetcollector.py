@@ -190,6 +190,29 @@ def CollectMetadataAssetFromAll(
     pretend_run = False,
     exit_on_failure = False):
 
+    # Collect possible assets
+    metadata_assets = CollectMetadataAssetsFromAll(
+        game_platform = game_platform,
+        game_name = game_name,
+        asset_type = asset_type,
+        verbose = verbose,
+        pretend_run = pretend_run,
+        exit_on_failure = exit_on_failure)
+
+    # Let the user choose
+    return ChooseMetadataAsset(
+        game_name = game_name,
+        metadata_assets = metadata_assets)
+
+# Collect metadata assets from all
+def CollectMetadataAssetsFromAll(
+    game_platform,
+    game_name,
+    asset_type,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+
     # Metadata assets
     metadata_assets = []
 
@@ -228,6 +251,10 @@ def CollectMetadataAssetFromAll(
         verbose = verbose,
         pretend_run = pretend_run,
         exit_on_failure = exit_on_failure)
+    return metadata_assets
+
+# Choose metadata asset
+def ChooseMetadataAsset(game_name, metadata_assets):
 
     # Show possible assets to the user
     system.LogInfo(f"Here are the results for \"{game_name}\"")
@@ -242,6 +269,7 @@ def CollectMetadataAssetFromAll(
         return None
 
     # Get asset link
+    metadata_asset = None
     if value.startswith("http"):
         metadata_asset = value
     elif value.isdigit():
@@ -1,6 +1,7 @@
 # Imports
 import os, os.path
 import sys
+import concurrent.futures
 
 # Local imports
 import config
@@ -9,12 +10,56 @@ import environment
 import platforms
 import gameinfo
 import webpage
+import webdriverpool
+import network
 import google
 import metadata
 import metadataentry
 
 ############################################################
 
+# Collect metadata for one entry
+def CollectMetadataEntry(
+    game_platform,
+    game_name,
+    game_entry,
+    metadata_source,
+    select_automatically = False,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+    import stores
+
+    # Collect metadata
+    if verbose:
+        system.LogInfo("Collecting metadata for %s - %s ..." % (game_platform, game_name))
+    metadata_result = None
+    if metadata_source == config.MetadataSourceType.THEGAMESDB:
+        metadata_result = CollectMetadataFromTGDB(
+            game_platform = game_platform,
+            game_name = game_name,
+            select_automatically = select_automatically,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+    elif metadata_source == config.MetadataSourceType.GAMEFAQS:
+        metadata_result = CollectMetadataFromGameFAQS(
+            game_platform = game_platform,
+            game_name = game_name,
+            select_automatically = select_automatically,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+    elif metadata_source == config.MetadataSourceType.STORE:
+        store_obj = stores.GetStoreByPlatform(game_platform)
+        if store_obj:
+            metadata_result = store_obj.GetLatestMetadata(
+                identifier = game_entry.get_url(),
+                verbose = verbose,
+                pretend_run = pretend_run,
+                exit_on_failure = exit_on_failure)
+    return metadata_result
+
 # Collect metadata from file
 def CollectMetadataFromFile(
     metadata_file,
@@ -23,6 +68,7 @@ def CollectMetadataFromFile(
     force_download = False,
     allow_replacing = False,
     select_automatically = False,
+    jobs = 1,
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
@@ -42,45 +88,57 @@ def CollectMetadataFromFile(
     else:
         metadata_keys_to_check = config.metadata_keys_downloadable
 
-    # Iterate through each game entry to fill in any missing data
+    # Find each game entry with missing data
+    missing_entries = []
     for game_platform in metadata_obj.get_sorted_platforms():
         for game_name in metadata_obj.get_sorted_names(game_platform):
             if not force_download:
                 if not metadata_obj.is_entry_missing_data(game_platform, game_name, metadata_keys_to_check):
                     continue
+            missing_entries.append((game_platform, game_name))
+
+    # Entries picked by hand need one visible browser at a time
+    if not select_automatically:
+        jobs = 1
+
+    # Workers share one limiter, so the request rate does not grow with jobs
+    rate_limiter = network.RateLimiter(1.0 / config.metadata_scrape_delay if config.metadata_scrape_delay else 0)
+
+    # Collect metadata for one entry once the limiter allows it
+    def CollectEntry(game_platform, game_name):
+        if verbose:
+            system.LogInfo("Waiting to get next entry ...")
+        rate_limiter.wait()
+        return CollectMetadataEntry(
+            game_platform = game_platform,
+            game_name = game_name,
+            game_entry = metadata_obj.get_game(game_platform, game_name),
+            metadata_source = metadata_source,
+            select_automatically = select_automatically,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
 
-            # Get entry
-            if verbose:
-                system.LogInfo("Collecting metadata for %s - %s ..." % (game_platform, game_name))
+    # Scrape across the web driver pool, merging results as they arrive
+    webdriverpool.GetWebDriverPool(make_headless = select_automatically, max_drivers = jobs)
+    with concurrent.futures.ThreadPoolExecutor(max_workers = max(jobs, 1)) as executor:
+        futures = {}
+        for game_platform, game_name in missing_entries:
+            future = executor.submit(CollectEntry, game_platform, game_name)
+            futures[future] = (game_platform, game_name)
+        for future in concurrent.futures.as_completed(futures):
+            game_platform, game_name = futures[future]
+            try:
+                metadata_result = future.result()
+            except Exception as e:
+                system.LogError("Unable to collect metadata for %s - %s (%s)" % (game_platform, game_name, e))
+                if exit_on_failure:
+                    for pending_future in futures.keys():
+                        pending_future.cancel()
+                    system.QuitProgram()
+                continue
             game_entry = metadata_obj.get_game(game_platform, game_name)
 
-            # Collect metadata
-            metadata_result = None
-            if metadata_source == config.MetadataSourceType.THEGAMESDB:
-                metadata_result = CollectMetadataFromTGDB(
-                    game_platform = game_platform,
-                    game_name = game_name,
-                    select_automatically = select_automatically,
-                    verbose = verbose,
-                    pretend_run = pretend_run,
-                    exit_on_failure = exit_on_failure)
-            elif metadata_source == config.MetadataSourceType.GAMEFAQS:
-                metadata_result = CollectMetadataFromGameFAQS(
-                    game_platform = game_platform,
-                    game_name = game_name,
-                    select_automatically = select_automatically,
-                    verbose = verbose,
-                    pretend_run = pretend_run,
-                    exit_on_failure = exit_on_failure)
-            elif metadata_source == config.MetadataSourceType.STORE:
-                store_obj = stores.GetStoreByPlatform(game_platform)
-                if store_obj:
-                    metadata_result = store_obj.GetLatestMetadata(
-                        identifier = game_entry.get_url(),
-                        verbose = verbose,
-                        pretend_run = pretend_run,
-                        exit_on_failure = exit_on_failure)
-
             # Merge in metadata result
             if metadata_result:
 
@@ -96,11 +154,6 @@ def CollectMetadataFromFile(
             metadata_obj.set_game(game_platform, game_name, game_entry)
             metadata_obj.export_to_metadata_file(metadata_file)
 
-            # Wait
-            if verbose:
-                system.LogInfo("Waiting to get next entry ...")
-            system.SleepProgram(5)
-
     # Should be successful
     return True
 
@@ -112,6 +165,7 @@ def CollectMetadataFromDirectory(
     force_download = False,
     allow_replacing = False,
     select_automatically = False,
+    jobs = 1,
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
@@ -125,6 +179,7 @@ def CollectMetadataFromDirectory(
             force_download = force_download,
             allow_replacing = allow_replacing,
             select_automatically = select_automatically,
+            jobs = jobs,
             verbose = verbose,
             pretend_run = pretend_run,
             exit_on_failure = exit_on_failure)
@@ -143,6 +198,7 @@ def CollectMetadataFromCategories(
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
+    import stores
 
     # Get metadata platform
     metadata_platform = gameinfo.DeriveGamePlatformFromCategories(metadata_category, metadata_subcategory)
@@ -171,6 +227,47 @@ def CollectMetadataFromCategories(
 
 ############################################################
 
+# Collect metadata from a site using a pooled web driver
+def CollectMetadataFromSite(
+    site_name,
+    site_url,
+    scrape_func,
+    game_platform,
+    game_name,
+    select_automatically = False,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+
+    # Borrow a web driver, browsers only run headless when nobody has to pick a result
+    pool = webdriverpool.GetWebDriverPool(make_headless = select_automatically)
+    try:
+        with pool.driver(verbose = verbose, pretend_run = pretend_run, exit_on_failure = exit_on_failure) as web_driver:
+            if not web_driver:
+                return None
+
+            # Reuse saved cookies for this site
+            pool.load_site_cookies(
+                driver = web_driver,
+                site_name = site_name,
+                site_url = site_url,
+                verbose = verbose,
+                pretend_run = pretend_run,
+                exit_on_failure = exit_on_failure)
+
+            # Scrape metadata
+            return scrape_func(
+                web_driver = web_driver,
+                game_platform = game_platform,
+                game_name = game_name,
+                select_automatically = select_automatically,
+                verbose = verbose,
+                pretend_run = pretend_run,
+                exit_on_failure = exit_on_failure)
+    except Exception as e:
+        system.LogError("Unable to collect metadata for %s from %s (%s)" % (game_name, site_name, e), quit_program = exit_on_failure)
+        return None
+
 # Collect metadata from TheGamesDB
 def CollectMetadataFromTGDB(
     game_platform,
@@ -179,9 +276,66 @@ def CollectMetadataFromTGDB(
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
+    return CollectMetadataFromSite(
+        site_name = "thegamesdb",
+        site_url = "https://thegamesdb.net",
+        scrape_func = ScrapeMetadataFromTGDB,
+        game_platform = game_platform,
+        game_name = game_name,
+        select_automatically = select_automatically,
+        verbose = verbose,
+        pretend_run = pretend_run,
+        exit_on_failure = exit_on_failure)
 
-    # Create web driver
-    web_driver = webpage.CreateWebDriver()
+# Collect metadata from GameFAQs
+def CollectMetadataFromGameFAQS(
+    game_platform,
+    game_name,
+    select_automatically = False,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+    return CollectMetadataFromSite(
+        site_name = "gamefaqs",
+        site_url = "https://gamefaqs.gamespot.com",
+        scrape_func = ScrapeMetadataFromGameFAQS,
+        game_platform = game_platform,
+        game_name = game_name,
+        select_automatically = select_automatically,
+        verbose = verbose,
+        pretend_run = pretend_run,
+        exit_on_failure = exit_on_failure)
+
+# Collect metadata from BigFishGames
+def CollectMetadataFromBigFishGames(
+    game_platform,
+    game_name,
+    select_automatically = False,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+    return CollectMetadataFromSite(
+        site_name = "bigfishgames",
+        site_url = "https://www.bigfishgames.com",
+        scrape_func = ScrapeMetadataFromBigFishGames,
+        game_platform = game_platform,
+        game_name = game_name,
+        select_automatically = select_automatically,
+        verbose = verbose,
+        pretend_run = pretend_run,
+        exit_on_failure = exit_on_failure)
+
+############################################################
+
+# Scrape metadata from TheGamesDB
+def ScrapeMetadataFromTGDB(
+    web_driver,
+    game_platform,
+    game_name,
+    select_automatically = False,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
 
     # Get search terms
     search_terms = gameinfo.DeriveGameSearchTermsFromName(game_name, game_platform)
@@ -298,16 +452,14 @@ def CollectMetadataFromTGDB(
                 release_text = system.TrimSubstringFromStart(element_text, "ReleaseDate:").strip()
                 metadata_result.set_release(release_text)
 
-    # Cleanup web driver
-    webpage.DestroyWebDriver(web_driver)
-
     # Return metadata
     return metadata_result
 
 ############################################################
 
-# Collect metadata from GameFAQs
-def CollectMetadataFromGameFAQS(
+# Scrape metadata from GameFAQs
+def ScrapeMetadataFromGameFAQS(
+    web_driver,
     game_platform,
     game_name,
     select_automatically = False,
@@ -315,9 +467,6 @@ def CollectMetadataFromGameFAQS(
     pretend_run = False,
     exit_on_failure = False):
 
-    # Create web driver
-    web_driver = webpage.CreateWebDriver()
-
     # Get search terms
     search_terms = gameinfo.DeriveGameSearchTermsFromName(game_name, game_platform)
 
@@ -449,16 +598,14 @@ def CollectMetadataFromGameFAQS(
             release_text = system.ConvertUnknownDateString(release_text, "%Y-%m-%d")
             metadata_result.set_release(release_text)
 
-    # Cleanup web driver
-    webpage.DestroyWebDriver(web_driver)
-
     # Return metadata
     return metadata_result
 
 ############################################################
 
-# Collect metadata from BigFishGames
-def CollectMetadataFromBigFishGames(
+# Scrape metadata from BigFishGames
+def ScrapeMetadataFromBigFishGames(
+    web_driver,
     game_platform,
     game_name,
     select_automatically = False,
@@ -466,9 +613,6 @@ def CollectMetadataFromBigFishGames(
     pretend_run = False,
     exit_on_failure = False):
 
-    # Create web driver
-    web_driver = webpage.CreateWebDriver()
-
     # Get search terms
     search_terms = gameinfo.DeriveGameSearchTermsFromName(game_name, game_platform)
 
@@ -506,9 +650,6 @@ def CollectMetadataFromBigFishGames(
     if isinstance(raw_game_description, str) and isinstance(raw_game_bullets, str):
         metadata_result.set_description(raw_game_description + "\n" + raw_game_bullets)
 
-    # Cleanup web driver
-    webpage.DestroyWebDriver(web_driver)
-
     # Return metadata
     return metadata_result
 
@@ -1,6 +1,7 @@
 # Imports
 import os, os.path
 import sys
+import copy
 
 # Local imports
 import config
@@ -40,6 +41,12 @@ class MetadataEntry:
     def delete_value(self, key):
         del self.game_entry[key]
 
+    # Copy entry
+    def copy(self):
+        entry_copy = MetadataEntry()
+        entry_copy.game_entry = copy.deepcopy(self.game_entry)
+        return entry_copy
+
     # Merge data
     def merge(self, other, merge_type = None):
         if not merge_type:
@@ -2,6 +2,9 @@
 import os, os.path
 import sys
 import getpass
+import time
+import threading
+import hashlib
 
 # Local imports
 import config
@@ -16,35 +19,247 @@ import webpage
 import registry
 import locker
 
+###########################################################
+# Throttling
+###########################################################
+
+# Rate limiter shared by worker threads
+class RateLimiter:
+
+    # Constructor
+    def __init__(self, requests_per_second = 0):
+        self.interval = (1.0 / requests_per_second) if requests_per_second else 0
+        self.next_time = 0
+        self.lock = threading.Lock()
+
+    # Wait until the next request is allowed
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            wait_time = self.next_time - now
+            self.next_time = max(self.next_time, now) + self.interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+###########################################################
+# Sessions
+###########################################################
+
+# Per-thread http sessions (requests sessions are not safe to share between threads)
+http_sessions = threading.local()
+
+# Create http session
+def CreateHttpSession():
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    retry = Retry(
+        total = config.http_retry_count,
+        backoff_factor = config.http_retry_backoff,
+        status_forcelist = [429, 500, 502, 503, 504],
+        allowed_methods = ["HEAD", "GET", "OPTIONS"],
+        respect_retry_after_header = True,
+        raise_on_status = False)
+    adapter = HTTPAdapter(
+        pool_connections = config.http_pool_connections,
+        pool_maxsize = config.http_pool_maxsize,
+        max_retries = retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# Get http session for the current thread
+def GetHttpSession():
+    session = getattr(http_sessions, "session", None)
+    if session is None:
+        session = CreateHttpSession()
+        http_sessions.session = session
+    return session
+
+###########################################################
+# Caching
+###########################################################
+
+# Http cache writes
+http_cache_lock = threading.Lock()
+
+# Check if a request may be cached, credentials never go to disk
+def IsHttpRequestCacheable(url, headers = None):
+    import urllib.parse
+    url_parts = urllib.parse.urlsplit(url)
+    if url_parts.username or url_parts.password:
+        return False
+    for param_name, param_value in urllib.parse.parse_qsl(url_parts.query, keep_blank_values = True):
+        if param_name.lower() in config.http_cache_credential_params:
+            return False
+    for header_name in (headers or {}).keys():
+        if header_name.lower() in config.http_cache_credential_headers:
+            return False
+    return True
+
+# Check if a response may be stored
+def IsHttpResponseStorable(response):
+    cache_control = response.headers.get("Cache-Control", "").lower()
+    return "no-store" not in [directive.strip() for directive in cache_control.split(",")]
+
+# Get http cache file
+def GetHttpCacheFile(url, headers = None):
+    cache_key = url + "\n" + "\n".join("%s: %s" % (key.lower(), value) for key, value in sorted((headers or {}).items()))
+    cache_hash = hashlib.sha256(cache_key.encode("utf-8")).hexdigest()
+    return system.JoinPaths(environment.GetCacheHttpDir(), cache_hash[:2], cache_hash + ".json")
+
+# Read http cache entry
+def ReadHttpCacheEntry(cache_file):
+    if not os.path.isfile(cache_file):
+        return None
+    cache_entry = system.ReadJsonFile(cache_file)
+    if cache_entry.get("version") != config.http_cache_version or "text" not in cache_entry:
+        return None
+    return cache_entry
+
+# Write http cache entry
+def WriteHttpCacheEntry(cache_file, response):
+    with http_cache_lock:
+        os.makedirs(os.path.dirname(cache_file), exist_ok = True)
+        return system.WriteJsonFile(
+            src = cache_file,
+            json_data = {
+                "version": config.http_cache_version,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched": time.time(),
+                "text": response.text
+            },
+            atomic = True)
+
+# Refresh http cache entry
+def RefreshHttpCacheEntry(cache_file, cache_entry):
+    with http_cache_lock:
+        cache_entry["fetched"] = time.time()
+        return system.WriteJsonFile(
+            src = cache_file,
+            json_data = cache_entry,
+            atomic = True)
+
+# Get remote text, answering from the http cache when possible
+def GetRemoteText(
+    url,
+    headers = None,
+    use_cache = False,
+    cache_ttl = config.http_cache_ttl,
+    timeout = config.network_request_timeout,
+    verbose = False):
+
+    # Fresh cache entries need no request at all
+    cache_file = None
+    cache_entry = None
+    request_headers = dict(headers) if headers else {}
+    if use_cache and IsHttpRequestCacheable(url, headers):
+        try:
+            cache_file = GetHttpCacheFile(url, headers)
+            cache_entry = ReadHttpCacheEntry(cache_file)
+        except Exception:
+            cache_file = None
+        if cache_entry:
+            if time.time() - cache_entry.get("fetched", 0) < cache_ttl:
+                if verbose:
+                    system.LogInfo("Using cached response for '%s'" % url)
+                return cache_entry["text"]
+            if cache_entry.get("etag"):
+                request_headers["If-None-Match"] = cache_entry["etag"]
+            if cache_entry.get("last_modified"):
+                request_headers["If-Modified-Since"] = cache_entry["last_modified"]
+
+    # Send request
+    response = GetHttpSession().get(url, headers = request_headers, timeout = timeout)
+
+    # Stale but unchanged
+    if response.status_code == 304 and cache_entry:
+        if verbose:
+            system.LogInfo("Cached response for '%s' is unchanged" % url)
+        RefreshHttpCacheEntry(cache_file, cache_entry)
+        return cache_entry["text"]
+    if response.status_code != 200:
+        return None
+
+    # Store response
+    if cache_file and IsHttpResponseStorable(response):
+        WriteHttpCacheEntry(cache_file, response)
+    return response.text
+
 ###########################################################
 # Info
 ###########################################################
 
+# Parse content range total size
+def ParseContentRangeSize(content_range):
+    if not content_range or "/" not in content_range:
+        return None
+    total_size = content_range.rsplit("/", 1)[-1].strip()
+    if total_size.isdigit():
+        return int(total_size)
+    return None
+
+# Probe url with a HEAD request, falling back to a single byte ranged GET
+def ProbeUrl(url, headers = None, timeout = config.network_probe_timeout):
+    probe = {
+        "url": url,
+        "reachable": False,
+        "status": None,
+        "size": None,
+        "content_type": None,
+        "etag": None,
+        "last_modified": None
+    }
+    if not url:
+        return probe
+    try:
+        session = GetHttpSession()
+        response = session.head(url, headers = headers, allow_redirects = True, timeout = timeout)
+        if response.status_code != 200:
+            range_headers = dict(headers) if headers else {}
+            range_headers["Range"] = "bytes=0-0"
+            response = session.get(url, headers = range_headers, allow_redirects = True, stream = True, timeout = timeout)
+            response.close()
+    except Exception:
+        return probe
+    probe["url"] = response.url
+    probe["status"] = response.status_code
+    probe["reachable"] = response.status_code in [200, 206]
+    probe["content_type"] = response.headers.get("Content-Type")
+    probe["etag"] = response.headers.get("ETag")
+    probe["last_modified"] = response.headers.get("Last-Modified")
+    if response.status_code == 206:
+        probe["size"] = ParseContentRangeSize(response.headers.get("Content-Range"))
+    elif response.headers.get("Content-Length", "").isdigit():
+        probe["size"] = int(response.headers.get("Content-Length"))
+    return probe
+
 # Check if url is reachable
 def IsUrlReachable(url):
-    try:
-        import requests
-        get = requests.get(url)
-        return (get.status_code == 200)
-    except:
-        return False
+    return ProbeUrl(url)["reachable"]
 
 # Get remote json
 def GetRemoteJson(
     url,
     headers = None,
+    use_cache = False,
+    cache_ttl = config.http_cache_ttl,
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
     try:
         if verbose:
             system.LogInfo("Processing GET request to '%s'" % url)
-        import requests
+        import json
         if not headers:
             headers = {"Accept": "application/json"}
-        get = requests.get(url, headers=headers)
-        if get.status_code == 200:
-            return get.json()
+        text = GetRemoteText(url, headers = headers, use_cache = use_cache, cache_ttl = cache_ttl, verbose = verbose)
+        if text is not None:
+            return json.loads(text)
         return None
     except Exception as e:
         if exit_on_failure:
@@ -63,10 +278,9 @@ def PostRemoteJson(
     try:
         if verbose:
             system.LogInfo("Processing POST request to '%s'" % url)
-        import requests
         if not headers:
             headers = {"Accept": "application/json"}
-        post = requests.post(url, headers=headers, json=data)
+        post = GetHttpSession().post(url, headers = headers, json = data, timeout = config.network_request_timeout)
         if verbose:
             system.LogInfo("Got response: " + post.text)
         if post.status_code == 200:
@@ -82,19 +296,20 @@ def PostRemoteJson(
 def GetRemoteXml(
     url,
     headers = None,
+    use_cache = False,
+    cache_ttl = config.http_cache_ttl,
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
     try:
         if verbose:
             system.LogInfo("Processing GET request to '%s'" % url)
-        import requests
         import xmltodict
         if not headers:
             headers = {"Accept": "text/xml"}
-        get = requests.get(url, headers=headers)
-        if get.status_code == 200:
-            return xmltodict.parse(get.text)
+        text = GetRemoteText(url, headers = headers, use_cache = use_cache, cache_ttl = cache_ttl, verbose = verbose)
+        if text is not None:
+            return xmltodict.parse(text)
         return None
     except Exception as e:
         if exit_on_failure:
@@ -169,6 +384,36 @@ def DownloadUrl(
         return system.IsPathFile(output_file)
     return False
 
+# Download url to file with a single streamed fetch
+def DownloadUrlToFile(
+    url,
+    output_file,
+    headers = None,
+    chunksize = config.transfer_chunk_size,
+    timeout = config.network_download_timeout,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+    if verbose:
+        system.LogInfo("Downloading %s to %s" % (url, output_file))
+    if pretend_run:
+        return True
+    partial_file = system.JoinPaths(system.GetFilenameDirectory(output_file), "." + system.GetFilenameFile(output_file) + ".partial")
+    try:
+        with GetHttpSession().get(url, headers = headers, allow_redirects = True, stream = True, timeout = timeout) as response:
+            if response.status_code != 200:
+                raise Exception("Server returned status %d" % response.status_code)
+            with open(partial_file, "wb") as output:
+                for chunk in response.iter_content(chunk_size = chunksize):
+                    output.write(chunk)
+        os.replace(partial_file, output_file)
+        return True
+    except Exception as e:
+        if os.path.exists(partial_file):
+            os.remove(partial_file)
+        system.LogError("Download of %s failed (%s)" % (url, e), quit_program = exit_on_failure)
+        return False
+
 # Download git url
 def DownloadGitUrl(
     url,
@@ -66,7 +66,10 @@ def GetLauncherTypes(platform_type):
 
 # Check if no launcher available
 def HasNoLauncher(platform_type):
-    return config.LaunchType.NO_LAUNCHER in GetLauncherTypes(platform_type)
+    import launcherindex
+    if config.LaunchType.NO_LAUNCHER in GetLauncherTypes(platform_type):
+        return True
+    return launcherindex.GetLauncherNameForPlatform(platform_type) is None
 
 # Check if launched by name
 def IsLaunchedByName(platform_type):
@@ -1,15 +1,21 @@
 # Imports
 import os, os.path
 import sys
+import threading
 
 # Local imports
 import config
 import command
 import environment
 import system
+import ini
 import tools
 import emulators
 
+# Process-wide program registry
+program_registry = None
+program_registry_lock = threading.Lock()
+
 ###########################################################
 
 # Get config value
@@ -44,6 +50,96 @@ def GetProgram(program_config, base_dir, program_name, program_platform = None):
 
 ###########################################################
 
+# Program registry
+class ProgramRegistry:
+
+    # Constructor
+    def __init__(self, ini_snapshot):
+        self.ini_snapshot = ini_snapshot
+        self.plugin_configs = {}
+        self.merged_configs = {}
+        self.path_indices = {}
+        self.lock = threading.RLock()
+
+    # Get plugin name that provides a program
+    def get_plugin_name(self, program_type, program_name):
+        if program_type == "tool":
+            return tools.GetToolNameForProgram(program_name)
+        return emulators.GetEmulatorNameForProgram(program_name)
+
+    # Get config for a single plugin, loading it on first use
+    def get_plugin_config(self, program_type, plugin_name):
+        config_key = (program_type, plugin_name)
+        with self.lock:
+            if config_key not in self.plugin_configs:
+                if program_type == "tool":
+                    plugin = tools.GetToolByName(plugin_name)
+                else:
+                    plugin = emulators.GetEmulatorByName(plugin_name)
+                self.plugin_configs[config_key] = plugin.GetConfig() if plugin else {}
+            return self.plugin_configs[config_key]
+
+    # Get config for the plugin that provides a program
+    def get_program_config(self, program_type, program_name):
+        plugin_name = self.get_plugin_name(program_type, program_name)
+        if not plugin_name:
+            return {}
+        return self.get_plugin_config(program_type, plugin_name)
+
+    # Get merged config of all plugins
+    def get_merged_config(self, program_type):
+        with self.lock:
+            if program_type not in self.merged_configs:
+                if program_type == "tool":
+                    plugin_names = tools.GetToolNames()
+                else:
+                    plugin_names = emulators.GetEmulatorNames()
+                merged_config = {}
+                for plugin_name in plugin_names:
+                    merged_config.update(self.get_plugin_config(program_type, plugin_name))
+                self.merged_configs[program_type] = merged_config
+            return self.merged_configs[program_type]
+
+    # Build reverse index of normalized program paths to names
+    def build_path_index(self, program_config, base_dir, program_platform):
+        path_index = {}
+        for program_name in program_config.keys():
+            program_value = GetConfigValue(program_config, program_name, "program", program_platform)
+            if not isinstance(program_value, str) or not program_value:
+                continue
+            for program_path in [program_value, system.JoinPaths(base_dir, program_value)]:
+                path_index.setdefault(os.path.normpath(program_path), program_name)
+        return path_index
+
+    # Get reverse path index
+    def get_path_index(self, program_type, program_platform = None):
+        if not program_platform:
+            program_platform = environment.GetCurrentPlatform()
+        index_key = (program_type, program_platform)
+        with self.lock:
+            if index_key not in self.path_indices:
+                if program_type == "tool":
+                    base_dir = environment.GetToolsRootDir()
+                else:
+                    base_dir = environment.GetEmulatorsRootDir()
+                self.path_indices[index_key] = self.build_path_index(
+                    self.get_merged_config(program_type), base_dir, program_platform)
+            return self.path_indices[index_key]
+
+# Get program registry
+def GetProgramRegistry():
+    global program_registry
+    ini_snapshot = ini.GetIniSnapshot()
+    registry = program_registry
+    if registry is None or registry.ini_snapshot is not ini_snapshot:
+        with program_registry_lock:
+            if program_registry is None or program_registry.ini_snapshot is not ini_snapshot:
+                program_registry = ProgramRegistry(ini_snapshot)
+            registry = program_registry
+    return registry
+
+###########################################################
+
 # Get program install dir
 def GetProgramInstallDir(program_name, program_platform = None):
     if IsProgramNameTool(program_name, program_platform):
@@ -84,9 +180,9 @@ def ShouldProgramBeInstalled(program_name, program_platform = None):
     # Get program path
     program_path = None
     if IsProgramNameTool(program_name, program_platform):
-        program_path = GetProgram(GetToolConfig(), environment.GetToolsRootDir(), program_name, program_platform)
+        program_path = GetProgram(GetToolProgramConfig(program_name), environment.GetToolsRootDir(), program_name, program_platform)
     elif IsProgramNameEmulator(program_name, program_platform):
-        program_path = GetProgram(GetEmulatorConfig(), environment.GetEmulatorsRootDir(), program_name, program_platform)
+        program_path = GetProgram(GetEmulatorProgramConfig(program_name), environment.GetEmulatorsRootDir(), program_name, program_platform)
 
     # Check program path
     if not program_path:
@@ -121,27 +217,29 @@ def GetEmulators():
 
 # Get tool config
 def GetToolConfig():
-    merged_config = {}
-    for tool in tools.GetToolList():
-        merged_config.update(tool.GetConfig())
-    return merged_config
+    return GetProgramRegistry().get_merged_config("tool")
 
 # Get emulator config
 def GetEmulatorConfig():
-    merged_config = {}
-    for emulator in emulators.GetEmulatorList():
-        merged_config.update(emulator.GetConfig())
-    return merged_config
+    return GetProgramRegistry().get_merged_config("emulator")
+
+# Get tool config for a single program
+def GetToolProgramConfig(tool_name):
+    return GetProgramRegistry().get_program_config("tool", tool_name)
+
+# Get emulator config for a single program
+def GetEmulatorProgramConfig(emulator_name):
+    return GetProgramRegistry().get_program_config("emulator", emulator_name)
 
 ###########################################################
 
 # Get tool program
 def GetToolProgram(tool_name, tool_platform = None):
-    return GetProgram(GetToolConfig(), environment.GetToolsRootDir(), tool_name, tool_platform)
+    return GetProgram(GetToolProgramConfig(tool_name), environment.GetToolsRootDir(), tool_name, tool_platform)
 
 # Get emulator program
 def GetEmulatorProgram(emulator_name, emulator_platform = None):
-    return GetProgram(GetEmulatorConfig(), environment.GetEmulatorsRootDir(), emulator_name, emulator_platform)
+    return GetProgram(GetEmulatorProgramConfig(emulator_name), environment.GetEmulatorsRootDir(), emulator_name, emulator_platform)
 
 # Get tool program dir
 def GetToolProgramDir(tool_name, tool_platform = None):
@@ -153,50 +251,44 @@ def GetEmulatorProgramDir(emulator_name, emulator_platform = None):
 
 # Get tool config value
 def GetToolConfigValue(tool_name, tool_key, tool_platform = None):
-    return GetConfigValue(GetToolConfig(), tool_name, tool_key, tool_platform)
+    return GetConfigValue(GetToolProgramConfig(tool_name), tool_name, tool_key, tool_platform)
 
 # Get emulator config value
 def GetEmulatorConfigValue(emulator_name, emulator_key, emulator_platform = None):
-    return GetConfigValue(GetEmulatorConfig(), emulator_name, emulator_key, emulator_platform)
+    return GetConfigValue(GetEmulatorProgramConfig(emulator_name), emulator_name, emulator_key, emulator_platform)
 
 # Get tool path config value
 def GetToolPathConfigValue(tool_name, tool_key, tool_platform = None):
-    return GetPathConfigValue(GetToolConfig(), environment.GetToolsRootDir(), tool_name, tool_key, tool_platform)
+    return GetPathConfigValue(GetToolProgramConfig(tool_name), environment.GetToolsRootDir(), tool_name, tool_key, tool_platform)
 
 # Get emulator path config value
 def GetEmulatorPathConfigValue(emulator_name, emulator_key, emulator_platform = None):
-    return GetPathConfigValue(GetEmulatorConfig(), environment.GetEmulatorsRootDir(), emulator_name, emulator_key, emulator_platform)
+    return GetPathConfigValue(GetEmulatorProgramConfig(emulator_name), environment.GetEmulatorsRootDir(), emulator_name, emulator_key, emulator_platform)
 
 # Derive tool name from program path
 def DeriveToolNameFromProgramPath(program_path, tool_platform = None):
     if not program_path or not os.path.exists(program_path):
         return None
-    for tool_name in GetToolConfig().keys():
-        tool_path = GetToolProgram(tool_name, tool_platform)
-        if tool_path and os.path.normpath(tool_path) == os.path.normpath(program_path):
-            return tool_name
-    return None
+    path_index = GetProgramRegistry().get_path_index("tool", tool_platform)
+    return path_index.get(os.path.normpath(program_path))
 
 # Derive emulator name from program path
 def DeriveEmulatorNameFromProgramPath(program_path, emulator_platform = None):
     if not program_path or not os.path.exists(program_path):
         return None
-    for emulator_name in GetEmulatorConfig().keys():
-        emulator_path = GetEmulatorProgram(emulator_name, emulator_platform)
-        if emulator_path and os.path.normpath(emulator_path) == os.path.normpath(program_path):
-            return emulator_name
-    return None
+    path_index = GetProgramRegistry().get_path_index("emulator", emulator_platform)
+    return path_index.get(os.path.normpath(program_path))
 
 ###########################################################
 
 # Determine if program name is a tool
 def IsProgramNameTool(program_name, program_platform = None):
-    tool_program = GetProgram(GetToolConfig(), environment.GetToolsRootDir(), program_name, program_platform)
+    tool_program = GetProgram(GetToolProgramConfig(program_name), environment.GetToolsRootDir(), program_name, program_platform)
     return tool_program is not None
 
 # Determine if program name is an emulator
 def IsProgramNameEmulator(program_name, program_platform = None):
-    emulator_program = GetProgram(GetEmulatorConfig(), environment.GetEmulatorsRootDir(), program_name, program_platform)
+    emulator_program = GetProgram(GetEmulatorProgramConfig(program_name), environment.GetEmulatorsRootDir(), program_name, program_platform)
     return emulator_program is not None
 
 # Determine if tool is installed
@@ -478,6 +478,7 @@ def DownloadGithubRelease(
     # Get release json list
     release_json_list = network.GetRemoteJson(
         url = github_url,
+        use_cache = True,
         verbose = verbose,
         pretend_run = pretend_run,
         exit_on_failure = exit_on_failure)
@@ -7,6 +7,7 @@ import config
 import environment
 import system
 import programs
+import launcherindex
 import ini
 
 # Check requirements
@@ -60,6 +61,8 @@ def SetupTools(offline = False, configure = False, verbose = False, pretend_run
 
 # Setup emulators
 def SetupEmulators(offline = False, configure = False, verbose = False, pretend_run = False, exit_on_failure = False):
+    if not pretend_run:
+        launcherindex.BuildPlatformLauncherIndex()
     for emulator in programs.GetEmulators():
         system.LogInfo("Installing emulator %s ..." % emulator.GetName())
         success = False
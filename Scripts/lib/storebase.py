@@ -16,6 +16,7 @@ import programs
 import webpage
 import metadataentry
 import metadatacollector
+import storeindex
 
 # Translate store path
 def TranslateStorePath(path, base_path = None):
@@ -599,23 +600,10 @@ class StoreBase:
         verbose = False,
         pretend_run = False,
         exit_on_failure = False):
-        json_files = system.BuildFileListByExtensions(
-            root = environment.GetJsonMetadataDir(self.GetSupercategory(), self.GetCategory(), self.GetSubcategory()),
-            extensions = [".json"])
-        for json_file in json_files:
-            json_data = system.ReadJsonFile(
-                src = json_file,
-                exit_on_failure = exit_on_failure)
-            if self.GetKey() not in json_data:
-                continue
-            json_store_data = json_data[self.GetKey()]
-            for appdata_key in config.json_keys_store_appdata:
-                if appdata_key not in json_store_data:
-                    continue
-                for identifier in identifiers:
-                    if identifier and identifier == json_store_data[appdata_key]:
-                        return json_file
-        return None
+        return storeindex.FindJsonByStoreIdentifiers(
+            json_dir = environment.GetJsonMetadataDir(self.GetSupercategory(), self.GetCategory(), self.GetSubcategory()),
+            store_key = self.GetKey(),
+            identifiers = identifiers)
 
     ############################################################
 
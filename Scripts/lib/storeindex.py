@@ -0,0 +1,206 @@
+# Imports
+import os, os.path
+import sys
+import threading
+
+# Local imports
+import config
+import environment
+import system
+
+# Process-wide store identifier index
+store_index = None
+store_index_lock = threading.Lock()
+
+###########################################################
+
+# Get json file signature
+def GetJsonFileSignature(json_file):
+    try:
+        file_stat = os.stat(json_file)
+        return [file_stat.st_size, file_stat.st_mtime_ns]
+    except OSError:
+        return None
+
+# Get store identifiers from json data
+def GetStoreIdentifiers(json_data):
+    store_identifiers = {}
+    if not isinstance(json_data, dict):
+        return store_identifiers
+    for store_key, store_data in json_data.items():
+        if not isinstance(store_data, dict):
+            continue
+        identifiers = []
+        for appdata_key in config.json_keys_store_appdata:
+            identifier = store_data.get(appdata_key)
+            if isinstance(identifier, (str, int)) and not isinstance(identifier, bool) and identifier != "":
+                identifiers.append(identifier)
+        if identifiers:
+            store_identifiers[store_key] = identifiers
+    return store_identifiers
+
+# Scan json files for store identifiers
+def ScanJsonByStoreIdentifiers(json_dir, store_key, identifiers):
+    for json_file in system.BuildFileListByExtensions(json_dir, extensions = [".json"]):
+        store_identifiers = GetStoreIdentifiers(system.ReadJsonFile(json_file))
+        for identifier in identifiers:
+            if identifier and identifier in store_identifiers.get(store_key, []):
+                return json_file
+    return None
+
+# Store identifier index
+class StoreIdentifierIndex:
+
+    # Constructor
+    def __init__(self, index_file):
+
+        # Save params
+        self.index_file = index_file
+
+        # Per-directory file entries and lookups
+        self.dirs = {}
+        self.lookups = {}
+        self.refreshed_dirs = set()
+        self.dirty = False
+
+    # Load index from disk
+    def load(self):
+        if not os.path.isfile(self.index_file):
+            return
+        index_data = system.ReadJsonFile(self.index_file)
+        if index_data.get("version") != config.store_index_version:
+            return
+        dirs = index_data.get("dirs")
+        if isinstance(dirs, dict):
+            self.dirs = dirs
+
+    # Save index to disk
+    def save(self):
+        if not self.dirty:
+            return True
+        os.makedirs(os.path.dirname(self.index_file), exist_ok = True)
+        success = system.WriteJsonFile(
+            src = self.index_file,
+            json_data = {
+                "version": config.store_index_version,
+                "dirs": self.dirs
+            },
+            atomic = True)
+        if success:
+            self.dirty = False
+        return success
+
+    # Build index entry for a json file
+    def build_entry(self, json_file, signature):
+        return {
+            "signature": signature,
+            "stores": GetStoreIdentifiers(system.ReadJsonFile(json_file))
+        }
+
+    # Rebuild lookup for a directory, keeping each file's position in scan order
+    def rebuild_lookup(self, json_dir):
+        lookup = {}
+        dir_entries = self.dirs.get(json_dir, {})
+        for file_position, json_file in enumerate(dir_entries.keys()):
+            for store_key, identifiers in dir_entries[json_file].get("stores", {}).items():
+                for identifier in identifiers:
+                    lookup.setdefault((store_key, identifier), (file_position, json_file))
+        self.lookups[json_dir] = lookup
+
+    # Refresh a directory, rereading only files whose signature changed
+    def refresh(self, json_dir):
+        old_entries = self.dirs.get(json_dir, {})
+        new_entries = {}
+        changed = json_dir not in self.dirs
+        for json_file in system.BuildFileListByExtensions(json_dir, extensions = [".json"]):
+            signature = GetJsonFileSignature(json_file)
+            if not signature:
+                continue
+            old_entry = old_entries.get(json_file)
+            if old_entry and old_entry.get("signature") == signature:
+                new_entries[json_file] = old_entry
+            else:
+                new_entries[json_file] = self.build_entry(json_file, signature)
+                changed = True
+        if len(new_entries) != len(old_entries):
+            changed = True
+        self.dirs[json_dir] = new_entries
+        self.rebuild_lookup(json_dir)
+        self.refreshed_dirs.add(json_dir)
+        if changed:
+            self.dirty = True
+
+    # Find the first json file (in scan order) matching any identifier
+    def find(self, json_dir, store_key, identifiers):
+        json_dir = os.path.abspath(json_dir)
+        if json_dir not in self.refreshed_dirs:
+            self.refresh(json_dir)
+        lookup = self.lookups.get(json_dir, {})
+        matches = [lookup[(store_key, identifier)] for identifier in identifiers if identifier and (store_key, identifier) in lookup]
+        if matches:
+            return min(matches)[1]
+        return None
+
+    # Update a single json file
+    def update_file(self, json_file):
+        json_file = os.path.abspath(json_file)
+        json_dir = None
+        for indexed_dir in self.dirs.keys():
+            if json_file.startswith(indexed_dir + os.sep):
+                json_dir = indexed_dir
+                break
+        if not json_dir:
+            return False
+        signature = GetJsonFileSignature(json_file)
+        if signature:
+            self.dirs[json_dir][json_file] = self.build_entry(json_file, signature)
+        else:
+            self.dirs[json_dir].pop(json_file, None)
+        if json_dir in self.refreshed_dirs:
+            self.rebuild_lookup(json_dir)
+        self.dirty = True
+        return True
+
+###########################################################
+
+# Get store identifier index
+def GetStoreIdentifierIndex():
+    global store_index
+    if store_index is None:
+        index = StoreIdentifierIndex(environment.GetCacheStoreIndexFile())
+        index.load()
+        import atexit
+        atexit.register(FlushStoreIdentifierIndex)
+        store_index = index
+    return store_index
+
+# Find json file by store identifiers
+def FindJsonByStoreIdentifiers(json_dir, store_key, identifiers):
+    with store_index_lock:
+        try:
+            return GetStoreIdentifierIndex().find(json_dir, store_key, identifiers)
+        except Exception as e:
+            system.LogWarning("Store identifier index is unavailable, scanning instead (%s)" % e)
+            return ScanJsonByStoreIdentifiers(json_dir, store_key, identifiers)
+
+# Update store identifier index for a json file
+def UpdateStoreIdentifierIndex(json_file):
+    with store_index_lock:
+        try:
+            return GetStoreIdentifierIndex().update_file(json_file)
+        except Exception as e:
+            system.LogWarning("Unable to update store identifier index (%s)" % e)
+            return False
+
+# Write pending store identifier index changes to disk
+def FlushStoreIdentifierIndex():
+    with store_index_lock:
+        if store_index is None:
+            return True
+        try:
+            return store_index.save()
+        except Exception as e:
+            system.LogWarning("Unable to save store identifier index (%s)" % e)
+            return False
+
+###########################################################
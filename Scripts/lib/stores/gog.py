@@ -206,6 +206,7 @@ class GOG(storebase.StoreBase):
         # Get gog json
         gog_json = network.GetRemoteJson(
             url = gog_url,
+            use_cache = True,
             verbose = verbose,
             pretend_run = pretend_run,
             exit_on_failure = exit_on_failure)
@@ -3,6 +3,7 @@ import os
 import os.path
 import sys
 import re
+import json
 
 # Local imports
 import config
@@ -461,6 +462,49 @@ def DoesPathContainFiles(
         list_text = list_output.decode()
     return len(list_text.strip()) > 0
 
+# Get path size
+def GetPathSize(
+    remote_name,
+    remote_type,
+    remote_path,
+    verbose = False,
+    pretend_run = False,
+    exit_on_failure = False):
+
+    # Get tool
+    rclone_tool = None
+    if programs.IsToolInstalled("RClone"):
+        rclone_tool = programs.GetToolProgram("RClone")
+    if not rclone_tool:
+        system.LogError("RClone was not found")
+        return None
+
+    # Get size command
+    size_cmd = [
+        rclone_tool,
+        "size",
+        "--json",
+        GetRemoteConnectionPath(remote_name, remote_type, remote_path)
+    ]
+
+    # Run size command
+    size_output = command.RunOutputCommand(
+        cmd = size_cmd,
+        options = command.CommandOptions(
+            blocking_processes = [rclone_tool]),
+        verbose = verbose,
+        pretend_run = pretend_run,
+        exit_on_failure = exit_on_failure)
+
+    # Get size
+    size_text = size_output
+    if isinstance(size_output, bytes):
+        size_text = size_output.decode()
+    try:
+        return int(json.loads(size_text).get("bytes", 0))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
 # Download files from remote
 def DownloadFilesFromRemote(
     remote_name,
@@ -469,6 +513,7 @@ def DownloadFilesFromRemote(
     local_path,
     excludes = None,
     interactive = False,
+    file_func = None,
     verbose = False,
     pretend_run = False,
     exit_on_failure = False):
@@ -503,6 +548,35 @@ def DownloadFilesFromRemote(
             "--progress"
         ]
 
+    # Run copy command, reporting each file as soon as it lands
+    if callable(file_func):
+        copy_cmd = [arg for arg in copy_cmd if arg != "--verbose"]
+        copy_cmd += [
+            "--use-json-log",
+            "--log-level", "INFO"
+        ]
+        def read_log(line):
+            try:
+                log_entry = json.loads(line)
+            except ValueError:
+                if verbose and line:
+                    system.LogInfo(line)
+                return
+            log_object = log_entry.get("object")
+            log_message = log_entry.get("msg", "").strip()
+            if verbose and log_message:
+                system.LogInfo("%s: %s" % (log_object, log_message) if log_object else log_message)
+            if log_object and log_message.startswith("Copied"):
+                file_func(log_object)
+        code = command.RunPipedCommand(
+            cmd = copy_cmd,
+            output_func = None,
+            error_func = read_log,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+        return code == 0
+
     # Run copy command
     code = command.RunBlockingCommand(
         cmd = copy_cmd,
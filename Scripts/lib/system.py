@@ -915,6 +915,68 @@ def CreateTemporaryDirectory(verbose = False, pretend_run = False):
         return (False, "Unable to create temporary directory")
     return (True, dir)
 
+# Lock file shared between processes (released by the OS if the holder dies)
+class LockFile:
+
+    # Constructor
+    def __init__(self, path, poll_interval = config.lock_file_poll_interval):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.lock_fd = None
+
+    # Try to lock the open file once
+    def try_lock(self):
+        try:
+            if os.name == "nt":
+                import msvcrt
+                msvcrt.locking(self.lock_fd, msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self.lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    # Acquire lock, returning False if it could not be taken in time
+    def acquire(self, blocking = True, timeout = None):
+        if self.lock_fd is not None:
+            return True
+        os.makedirs(os.path.dirname(self.path), exist_ok = True)
+        self.lock_fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+        start_time = time.monotonic()
+        while not self.try_lock():
+            if not blocking or (timeout is not None and time.monotonic() - start_time >= timeout):
+                os.close(self.lock_fd)
+                self.lock_fd = None
+                return False
+            time.sleep(self.poll_interval)
+        return True
+
+    # Release lock
+    def release(self):
+        if self.lock_fd is None:
+            return
+        try:
+            if os.name == "nt":
+                import msvcrt
+                os.lseek(self.lock_fd, 0, os.SEEK_SET)
+                msvcrt.locking(self.lock_fd, msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self.lock_fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self.lock_fd)
+            self.lock_fd = None
+
+    # Enter context
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    # Exit context
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
 # Create symlink
 def CreateSymlink(src, dest, cwd = None, verbose = False, pretend_run = False, exit_on_failure = False):
     try:
@@ -1590,16 +1652,22 @@ def ReadJsonFile(src, verbose = False, pretend_run = False, exit_on_failure = Fa
         return {}
 
 # Write json file
-def WriteJsonFile(src, json_data, sort_keys = False, verbose = False, pretend_run = False, exit_on_failure = False):
+def WriteJsonFile(src, json_data, sort_keys = False, atomic = False, verbose = False, pretend_run = False, exit_on_failure = False):
     try:
         if not src.endswith(".json"):
             return False
         if verbose:
             LogInfo("Writing %s" % src)
         if not pretend_run:
-            with open(src, "w", newline='\n') as output_file:
+            write_path = src + ".tmp" if atomic else src
+            with open(write_path, "w", newline='\n') as output_file:
                 json_string = json.dumps(json_data, indent = 4, sort_keys = sort_keys)
                 output_file.write(json_string)
+                if atomic:
+                    output_file.flush()
+                    os.fsync(output_file.fileno())
+            if atomic:
+                os.replace(write_path, src)
         return True
     except Exception as e:
         if exit_on_failure:
@@ -1,142 +1,135 @@
 # Imports
-from .appimagetool import AppImageTool
-from .balenaetcher import BalenaEtcher
-from .brave import Brave
-from .cdecrypt import CDecrypt
-from .chrome import Chrome
-from .chromedriver import ChromeDriver
-from .curl import Curl
-from .dxvk import DXVK
-from .dxvk import GetLibs32 as GetDXVKLibs32
-from .dxvk import GetLibs64 as GetDXVKLibs64
-from .exiftool import ExifTool
-from .extractxiso import ExtractXIso
-from .ffmpeg import FFMpeg
-from .firefox import Firefox
-from .geckodriver import GeckoDriver
-from .git import Git
-from .goldbergemu import GoldbergEmu
-from .gpg import Gpg
-from .hactool import HacTool
-from .heirloom import Heirloom
-from .itchdl import ItchDL
-from .jdupes import JDupes
-from .mkpl import Mkpl
-from .legendary import Legendary
-from .lgogdownloader import LGOGDownloader
-from .ludusavi import Ludusavi
-from .ludusavimanifest import LudusaviManifest
-from .mametools import MameTools
-from .moonlight import Moonlight
-from .ndecrypt import NDecrypt
-from .nile import Nile
-from .nircmd import NirCmd
-from .pegasus import Pegasus
-from .perl import Perl
-from .projectctr import ProjectCTR
-from .ps3dec import PS3Dec
-from .psngetpkginfo import PSNGetPkgInfo
-from .psvstrip import PSVStrip
-from .psvtools import PSVTools
-from .pylnk import PyLnk
-from .pysimplegui import PySimpleGUI
-from .pysteamgriddb import PySteamGridDB
-from .python import Python
-from .rclone import RClone
-from .sandboxie import Sandboxie
-from .sevenzip import SevenZip
-from .sigtop import Sigtop
-from .steam import Steam
-from .steamappidlist import SteamAppIDList
-from .steamcmd import SteamCMD
-from .steamdepotdownloader import SteamDepotDownloader
-from .steamless import Steamless
-from .sunshine import Sunshine
-from .tar import Tar
-from .threedsromtool import ThreeDSRomTool
-from .vkd3d import VKD3D
-from .vkd3d import GetLibs32 as GetVKD3DLibs32
-from .vkd3d import GetLibs64 as GetVKD3DLibs64
-from .wad2bin import Wad2Bin
-from .wine import Wine
-from .xcitrimmer import XCITrimmer
-from .xorriso import XorrISO
-from .ytdlp import YtDlp
+import importlib
+import threading
+
+# Tool plugins (name: module, class, program names)
+tool_plugins = {
+    "AppImageTool": (".appimagetool", "AppImageTool", ["AppImageTool"]),
+    "BalenaEtcher": (".balenaetcher", "BalenaEtcher", ["BalenaEtcher"]),
+    "Brave": (".brave", "Brave", ["Brave"]),
+    "CDecrypt": (".cdecrypt", "CDecrypt", ["CDecrypt"]),
+    "Chrome": (".chrome", "Chrome", ["Chrome"]),
+    "ChromeDriver": (".chromedriver", "ChromeDriver", ["ChromeDriver"]),
+    "Curl": (".curl", "Curl", ["Curl"]),
+    "DXVK": (".dxvk", "DXVK", ["DXVK"]),
+    "ExifTool": (".exiftool", "ExifTool", ["ExifTool"]),
+    "ExtractXIso": (".extractxiso", "ExtractXIso", ["ExtractXIso"]),
+    "FFMpeg": (".ffmpeg", "FFMpeg", ["FFMpeg"]),
+    "Firefox": (".firefox", "Firefox", ["Firefox"]),
+    "GeckoDriver": (".geckodriver", "GeckoDriver", ["GeckoDriver"]),
+    "Git": (".git", "Git", ["Git"]),
+    "GoldbergEmu": (".goldbergemu", "GoldbergEmu", ["GoldbergEmu"]),
+    "Gpg": (".gpg", "Gpg", ["Gpg"]),
+    "HacTool": (".hactool", "HacTool", ["HacTool"]),
+    "Heirloom": (".heirloom", "Heirloom", ["Heirloom"]),
+    "ItchDL": (".itchdl", "ItchDL", ["ItchDL"]),
+    "JDupes": (".jdupes", "JDupes", ["JDupes"]),
+    "Mkpl": (".mkpl", "Mkpl", ["Mkpl"]),
+    "Legendary": (".legendary", "Legendary", ["Legendary"]),
+    "LGOGDownloader": (".lgogdownloader", "LGOGDownloader", ["LGOGDownloader"]),
+    "Ludusavi": (".ludusavi", "Ludusavi", ["Ludusavi"]),
+    "LudusaviManifest": (".ludusavimanifest", "LudusaviManifest", ["LudusaviManifest"]),
+    "MameTools": (".mametools", "MameTools", ["MameChdman"]),
+    "Moonlight": (".moonlight", "Moonlight", ["Moonlight"]),
+    "NDecrypt": (".ndecrypt", "NDecrypt", ["NDecrypt"]),
+    "NirCmd": (".nircmd", "NirCmd", ["NirCmd"]),
+    "Nile": (".nile", "Nile", ["Nile"]),
+    "Pegasus": (".pegasus", "Pegasus", ["Pegasus"]),
+    "Perl": (".perl", "Perl", ["Perl"]),
+    "ProjectCTR": (".projectctr", "ProjectCTR", ["CtrMakeRom", "CtrTool"]),
+    "PS3Dec": (".ps3dec", "PS3Dec", ["PS3Dec"]),
+    "PSNGetPkgInfo": (".psngetpkginfo", "PSNGetPkgInfo", ["PSNGetPkgInfo"]),
+    "PSVStrip": (".psvstrip", "PSVStrip", ["PSVStrip"]),
+    "PSVTools": (".psvtools", "PSVTools", ["PSVTools"]),
+    "PyLnk": (".pylnk", "PyLnk", ["PyLnk"]),
+    "PySimpleGUI": (".pysimplegui", "PySimpleGUI", ["PySimpleGUI"]),
+    "PySteamGridDB": (".pysteamgriddb", "PySteamGridDB", ["PySteamGridDB"]),
+    "Python": (".python", "Python", ["Python", "PythonVenvPython", "PythonVenvPip"]),
+    "RClone": (".rclone", "RClone", ["RClone"]),
+    "Sandboxie": (".sandboxie", "Sandboxie", []),
+    "7-Zip": (".sevenzip", "SevenZip", ["7-Zip"]),
+    "Sigtop": (".sigtop", "Sigtop", ["Sigtop"]),
+    "Steam": (".steam", "Steam", ["Steam"]),
+    "SteamAppIDList": (".steamappidlist", "SteamAppIDList", ["SteamAppIDList"]),
+    "SteamCMD": (".steamcmd", "SteamCMD", ["SteamCMD"]),
+    "SteamDepotDownloader": (".steamdepotdownloader", "SteamDepotDownloader", ["SteamDepotDownloader"]),
+    "Steamless": (".steamless", "Steamless", ["Steamless"]),
+    "Sunshine": (".sunshine", "Sunshine", ["Sunshine"]),
+    "Tar": (".tar", "Tar", ["Tar"]),
+    "3DSRomTool": (".threedsromtool", "ThreeDSRomTool", ["3DSRomTool"]),
+    "VKD3D": (".vkd3d", "VKD3D", ["VKD3D"]),
+    "Wad2Bin": (".wad2bin", "Wad2Bin", ["Wad2Bin"]),
+    "Wine": (".wine", "Wine", ["Wine", "WineBoot", "WineServer", "WineTricks"]),
+    "XCITrimmer": (".xcitrimmer", "XCITrimmer", ["XCITrimmer"]),
+    "XorrISO": (".xorriso", "XorrISO", ["XorrISO"]),
+    "YtDlp": (".ytdlp", "YtDlp", ["YtDlp"])
+}
+
+# Lazily exported helpers (attribute: module, function)
+tool_exports = {
+    "GetDXVKLibs32": (".dxvk", "GetLibs32"),
+    "GetDXVKLibs64": (".dxvk", "GetLibs64"),
+    "GetVKD3DLibs32": (".vkd3d", "GetLibs32"),
+    "GetVKD3DLibs64": (".vkd3d", "GetLibs64")
+}
+
+# Loaded tool instances
+tool_instances = {}
+tool_instances_lock = threading.Lock()
+
+# Program name to tool name
+tool_program_names = {
+    program_name: tool_name
+    for tool_name, (module_name, class_name, program_names) in tool_plugins.items()
+    for program_name in program_names
+}
+
+# Load attribute from a plugin module
+def LoadAttribute(module_name, attribute_name):
+    return getattr(importlib.import_module(module_name, __name__), attribute_name)
+
+# Resolve tool classes and helpers on first access
+def __getattr__(attribute_name):
+    if attribute_name in tool_exports:
+        return LoadAttribute(*tool_exports[attribute_name])
+    for module_name, class_name, program_names in tool_plugins.values():
+        if class_name == attribute_name:
+            return LoadAttribute(module_name, class_name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, attribute_name))
+
+# Get tool names
+def GetToolNames():
+    return list(tool_plugins.keys())
+
+# Get tool program names
+def GetToolProgramNames():
+    return list(tool_program_names.keys())
+
+# Get tool name for program
+def GetToolNameForProgram(program_name):
+    return tool_program_names.get(program_name)
+
+# Get tool by name
+def GetToolByName(tool_name):
+    if tool_name not in tool_plugins:
+        return None
+    with tool_instances_lock:
+        if tool_name not in tool_instances:
+            module_name, class_name, program_names = tool_plugins[tool_name]
+            tool_instances[tool_name] = LoadAttribute(module_name, class_name)()
+        return tool_instances[tool_name]
+
+# Get tool by program name
+def GetToolByProgramName(program_name):
+    return GetToolByName(GetToolNameForProgram(program_name))
 
 # Get tool map
 def GetToolMap():
     instances = {}
-    def AddInstance(class_name):
-        instance = class_name()
-        instances[instance.GetName()] = instance
-    AddInstance(AppImageTool)
-    AddInstance(BalenaEtcher)
-    AddInstance(Brave)
-    AddInstance(CDecrypt)
-    AddInstance(Chrome)
-    AddInstance(ChromeDriver)
-    AddInstance(Curl)
-    AddInstance(DXVK)
-    AddInstance(ExifTool)
-    AddInstance(ExtractXIso)
-    AddInstance(FFMpeg)
-    AddInstance(Firefox)
-    AddInstance(GeckoDriver)
-    AddInstance(Git)
-    AddInstance(GoldbergEmu)
-    AddInstance(Gpg)
-    AddInstance(HacTool)
-    AddInstance(Heirloom)
-    AddInstance(ItchDL)
-    AddInstance(JDupes)
-    AddInstance(Mkpl)
-    AddInstance(Legendary)
-    AddInstance(LGOGDownloader)
-    AddInstance(Ludusavi)
-    AddInstance(LudusaviManifest)
-    AddInstance(MameTools)
-    AddInstance(Moonlight)
-    AddInstance(NDecrypt)
-    AddInstance(NirCmd)
-    AddInstance(Nile)
-    AddInstance(Pegasus)
-    AddInstance(Perl)
-    AddInstance(ProjectCTR)
-    AddInstance(PS3Dec)
-    AddInstance(PSNGetPkgInfo)
-    AddInstance(PSVStrip)
-    AddInstance(PSVTools)
-    AddInstance(PyLnk)
-    AddInstance(PySimpleGUI)
-    AddInstance(PySteamGridDB)
-    AddInstance(Python)
-    AddInstance(RClone)
-    AddInstance(Sandboxie)
-    AddInstance(SevenZip)
-    AddInstance(Sigtop)
-    AddInstance(Steam)
-    AddInstance(SteamAppIDList)
-    AddInstance(SteamCMD)
-    AddInstance(SteamDepotDownloader)
-    AddInstance(Steamless)
-    AddInstance(Sunshine)
-    AddInstance(Tar)
-    AddInstance(ThreeDSRomTool)
-    AddInstance(VKD3D)
-    AddInstance(Wad2Bin)
-    AddInstance(Wine)
-    AddInstance(XCITrimmer)
-    AddInstance(XorrISO)
-    AddInstance(YtDlp)
+    for tool_name in tool_plugins.keys():
+        instances[tool_name] = GetToolByName(tool_name)
     return instances
 
 # Get tool list
 def GetToolList():
     return GetToolMap().values()
-
-# Get tool by name
-def GetToolByName(tool_name):
-    for instance in GetToolList():
-        if instance.GetName() == tool_name:
-            return instance
-    return None
@@ -0,0 +1,189 @@
+# Imports
+import threading
+import contextlib
+
+# Local imports
+import config
+import system
+import environment
+import webpage
+
+# Process-wide web driver pools (one per headless mode)
+web_driver_pools = {}
+web_driver_pools_lock = threading.Lock()
+
+###########################################################
+
+# Get site cookie file
+def GetSiteCookieFile(site_name):
+    return system.JoinPaths(environment.GetCookieDirectory(), site_name.lower() + ".cookie.txt")
+
+# Check if web driver is still usable
+def IsWebDriverHealthy(driver):
+    try:
+        driver.current_url
+        driver.window_handles
+        return True
+    except Exception:
+        return False
+
+# Bounded pool of long-lived web drivers
+class WebDriverPool:
+
+    # Constructor
+    def __init__(self, max_drivers = config.web_driver_pool_max_drivers, make_headless = True):
+
+        # Save params
+        self.max_drivers = max(max_drivers, 1)
+        self.make_headless = make_headless
+
+        # Pool state
+        self.idle_drivers = []
+        self.num_drivers = 0
+        self.site_cookies = {}
+        self.condition = threading.Condition()
+        self.closed = False
+
+    # Create a new driver
+    def create_driver(self, verbose = False, pretend_run = False, exit_on_failure = False):
+        return webpage.CreateWebDriver(
+            make_headless = self.make_headless,
+            verbose = verbose,
+            pretend_run = pretend_run,
+            exit_on_failure = exit_on_failure)
+
+    # Destroy a driver
+    def destroy_driver(self, driver, verbose = False):
+        self.site_cookies.pop(id(driver), None)
+        webpage.DestroyWebDriver(driver, verbose = verbose)
+
+    # Acquire a driver, waiting for one to free up if the pool is full
+    def acquire(self, verbose = False, pretend_run = False, exit_on_failure = False):
+        with self.condition:
+            while True:
+                if self.closed:
+                    return None
+
+                # Reuse an idle driver that is still alive
+                while self.idle_drivers:
+                    driver = self.idle_drivers.pop()
+                    if IsWebDriverHealthy(driver):
+                        return driver
+                    if verbose:
+                        system.LogWarning("Replacing unhealthy web driver")
+                    self.num_drivers -= 1
+                    self.destroy_driver(driver)
+
+                # Start another driver while below the bound
+                if self.num_drivers < self.max_drivers:
+                    self.num_drivers += 1
+                    break
+                self.condition.wait()
+
+        # Create outside the lock, browser startup takes seconds
+        driver = None
+        try:
+            driver = self.create_driver(verbose = verbose, pretend_run = pretend_run, exit_on_failure = exit_on_failure)
+        finally:
+            if not driver:
+                with self.condition:
+                    self.num_drivers -= 1
+                    self.condition.notify()
+        return driver
+
+    # Return a driver to the pool
+    def release(self, driver, healthy = True, verbose = False):
+        if not driver:
+            return
+        if healthy:
+            try:
+                driver.get("about:blank")
+            except Exception:
+                healthy = False
+        with self.condition:
+            if healthy and not self.closed:
+                self.idle_drivers.append(driver)
+                self.condition.notify()
+                return
+            self.num_drivers -= 1
+            self.condition.notify()
+        self.destroy_driver(driver, verbose = verbose)
+
+    # Borrow a driver for the duration of a block
+    @contextlib.contextmanager
+    def driver(self, verbose = False, pretend_run = False, exit_on_failure = False):
+        driver = self.acquire(verbose = verbose, pretend_run = pretend_run, exit_on_failure = exit_on_failure)
+        healthy = True
+        try:
+            yield driver
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            self.release(driver, healthy = healthy and driver is not None and IsWebDriverHealthy(driver), verbose = verbose)
+
+    # Load saved cookies for a site once per driver
+    def load_site_cookies(self, driver, site_name, site_url, verbose = False, pretend_run = False, exit_on_failure = False):
+        loaded_sites = self.site_cookies.setdefault(id(driver), set())
+        if site_name in loaded_sites:
+            return True
+        cookie_file = GetSiteCookieFile(site_name)
+        if not system.DoesPathExist(cookie_file):
+            loaded_sites.add(site_name)
+            return False
+
+        # Cookies can only be added for the domain currently loaded
+        success = webpage.LoadUrl(driver, site_url, verbose = verbose, pretend_run = pretend_run)
+        if success:
+            try:
+                success = webpage.LoadCookie(
+                    driver = driver,
+                    path = cookie_file,
+                    verbose = verbose,
+                    pretend_run = pretend_run,
+                    exit_on_failure = exit_on_failure)
+            except Exception as e:
+                system.LogWarning("Unable to load cookies for %s (%s)" % (site_name, e))
+                success = False
+        loaded_sites.add(site_name)
+        return success
+
+    # Destroy all drivers
+    def close(self, verbose = False):
+        with self.condition:
+            self.closed = True
+            idle_drivers = self.idle_drivers
+            self.idle_drivers = []
+            self.num_drivers -= len(idle_drivers)
+            self.condition.notify_all()
+        for driver in idle_drivers:
+            self.destroy_driver(driver, verbose = verbose)
+
+###########################################################
+
+# Get web driver pool
+def GetWebDriverPool(make_headless = True, max_drivers = None):
+    with web_driver_pools_lock:
+        pool = web_driver_pools.get(make_headless)
+        if pool is None or pool.closed:
+            pool = WebDriverPool(
+                max_drivers = max_drivers or config.web_driver_pool_max_drivers,
+                make_headless = make_headless)
+            import atexit
+            atexit.register(pool.close)
+            web_driver_pools[make_headless] = pool
+        elif max_drivers and max_drivers > pool.max_drivers:
+            with pool.condition:
+                pool.max_drivers = max_drivers
+                pool.condition.notify_all()
+        return pool
+
+# Close web driver pools
+def CloseWebDriverPools(verbose = False):
+    with web_driver_pools_lock:
+        pools = list(web_driver_pools.values())
+        web_driver_pools.clear()
+    for pool in pools:
+        pool.close(verbose = verbose)
+
+###########################################################
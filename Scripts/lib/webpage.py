@@ -462,11 +462,14 @@ def LoadCookie(
     exit_on_failure = False):
     if not system.DoesPathExist(path):
         return False
-    cookie_list = system.ReadJsonFile(
-        src = path,
-        verbose = verbose,
-        pretend_run = pretend_run,
-        exit_on_failure = exit_on_failure)
+    try:
+        with open(path, "r") as input_file:
+            cookie_list = json.loads(input_file.read())
+    except Exception as e:
+        if exit_on_failure:
+            system.LogError("Unable to read cookie %s" % path)
+            system.LogError(e, quit_program = True)
+        return False
     if isinstance(cookie_list, list):
         for cookie in cookie_list:
             driver.add_cookie(cookie)